@@ -104,6 +104,12 @@ app.on('ready', () => {
   }
 });
 
+app.on('will-quit', () => {
+  if (PythonProcessHandler.instance?.isRunning()) {
+    PythonProcessHandler.instance.stop();
+  }
+});
+
 app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') {
     app.quit();
@@ -1,4 +1,5 @@
 import { IpcMain } from "electron";
+import { randomUUID } from "crypto";
 import { AppController } from "../appController/appController";
 import { IfcCreationMessageSender } from "./messageSenders/ifcCreationMessageSender";
 import { PythonProcessHandler } from "../processHandler/pythonProcessHandler";
@@ -22,8 +23,10 @@ export function setIPCElectronIFCHandler(ipcMain: IpcMain) {
 
         (async () => {
             try {
-                // Python 프로세스 시작
-                handler.start();
+                // Python 프로세스 시작 (이미 실행 중이면 재사용)
+                if(!handler.isRunning()) {
+                    handler.start();
+                }
 
                 // Path
                 const outputFile = AppController.getInstance().getDataStore().getIfcPath();
@@ -32,23 +35,18 @@ export function setIPCElectronIFCHandler(ipcMain: IpcMain) {
                 }
         
                 // JSON 데이터를 기반으로 IFC 파일 생성 요청
-                const jsonData = {
-                    "header": {
-                        "action": "create_ifc",
-                        "projectName": "My Building Project",
-                        "siteName": "my_site",
-                        "ifcFilePath": outputFile
-                    },
-                    "entities": mappedItems
+                const header = {
+                    "jobId": randomUUID(),
+                    "projectName": "My Building Project",
+                    "siteName": "my_site",
+                    "ifcFilePath": outputFile
                 };
                 
-                await handler.sendMessage(jsonData, countListner);
+                await handler.sendEntityStream(header, mappedItems, countListner);
             } catch (error) {
                 console.error('Error during Python IPC communication:', error);
-            } finally {
-                // Python 프로세스 종료
+                // 오류 시 Python 프로세스 종료, 다음 작업에서 다시 시작
                 handler.stop();
-                return;
             }
         })();
     });
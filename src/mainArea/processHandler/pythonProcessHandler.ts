@@ -3,6 +3,13 @@ import { AppController } from '../appController/appController';
 import { spawn, ChildProcessWithoutNullStreams } from 'node:child_process';
 import path from 'path';
 
+export type SendOptions = {
+    // Milliseconds until the job is cancelled. No timeout if undefined.
+    timeoutMs?: number;
+    // Cancels the job when aborted.
+    signal?: AbortSignal;
+};
+
 export class PythonProcessHandler {
     static instance: PythonProcessHandler;
     private pyProcess: ChildProcessWithoutNullStreams | null = null;
@@ -61,66 +68,160 @@ export class PythonProcessHandler {
         }
     }
 
-    async sendMessage(data: object, countListner?: (count: number, message: string) => void): Promise<any> {
-        if(!this.pyProcess) {
-            throw new Error('Python process is not running.');
+    async sendMessage(data: {header?: {jobId?: string}}, countListner?: (count: number, message: string) => void, options?: SendOptions): Promise<any> {
+        return this.sendMessages([data], countListner, data.header?.jobId, options);
+    }
+
+    /**
+     * Send the entities of one IFC creation job in chunks (begin_job, entities..., end_job).
+     * Python side writes each chunk as it arrives, so the job is not parsed as one huge line.
+     */
+    async sendEntityStream(header: {jobId: string}, entities: object[], countListner?: (count: number, message: string) => void, chunkSize: number = 1000, options?: SendOptions): Promise<any> {
+        const messages: object[] = [{header: {...header, action: "begin_job", totalEntities: entities.length}}];
+        for(let i = 0; i < entities.length; i += chunkSize) {
+            messages.push({header: {...header, action: "entities"}, entities: entities.slice(i, i + chunkSize)});
+        }
+        messages.push({header: {...header, action: "end_job"}});
+
+        return this.sendMessages(messages, countListner, header.jobId, options);
+    }
+
+    /**
+     * Send messages to the python process, and resolve when the job ends (jobComplete or jobFailed).
+     * The python process is kept alive after the job, so the next job does not pay the startup cost.
+     * Rejected if the python process closes or fails before the job ends, or if the job is cancelled by
+     * `options.signal` or `options.timeoutMs`. A cancelled job is stopped by the "cancel" message.
+     */
+    private sendMessages(messages: object[], countListner?: (count: number, message: string) => void, jobId?: string, options: SendOptions = {}): Promise<any> {
+        const pyProcess = this.pyProcess;
+        if(!pyProcess) {
+            return Promise.reject(new Error('Python process is not running.'));
         }
         
         let count = 0;
         return new Promise((resolve, reject) => {
-            const message = JSON.stringify(data) + '\n';
-            const [stdin, stdout] = [this.pyProcess?.stdin, this.pyProcess?.stdout];
+            const [stdin, stdout] = [pyProcess.stdin, pyProcess.stdout];
             
             if(!stdin || !stdout) {
-                return reject('Python process stdin or stdout is not available.');
+                return reject(new Error('Python process stdin or stdout is not available.'));
             }
 
             stdout.removeAllListeners('data');
 
+            // Listeners are removed once the job ends, is cancelled or the process is gone
+            let settled = false;
+            let timer: NodeJS.Timeout | undefined;
+            const settle = (callback: () => void) => {
+                if(settled) {
+                    return;
+                }
+                settled = true;
+
+                stdout.off('data', onData);
+                pyProcess.off('close', onClose);
+                pyProcess.off('error', onError);
+                options.signal?.removeEventListener('abort', onAbort);
+                if(timer !== undefined) {
+                    clearTimeout(timer);
+                }
+                callback();
+            };
+
+            const cancel = (reason: string) => {
+                if(jobId !== undefined && stdin.writable) {
+                    stdin.write(JSON.stringify({header: {action: "cancel", jobId: jobId}}) + '\n');
+                }
+                settle(() => reject(new Error(reason)));
+            };
+
+            const onClose = (code: number | null) => settle(() => reject(new Error(`Python process exited with code ${code} before the job ended.`)));
+            const onError = (error: Error) => settle(() => reject(error));
+            const onAbort = () => cancel('Job is cancelled.');
+
+            // Python responds with NDJSON, one response per line.
             let buffer = '';
-            let jsonBuffer: string[] = [];
+            const onLine = (line: string) => {
+                const parseJob = JSON.tryParse<any>(line);
+                if(!parseJob.success || !parseJob.data || !("action" in parseJob.data) || !("result" in parseJob.data)) {
+                    return;
+                }
+
+                const parsedData = parseJob.data;
+                const timestamp = getCurrentTimestamp();
+                const writingResult = parsedData.result ? "done" : "failed";
+                let message: string = "";
+                switch(parsedData.action) {
+                    case "progress":
+                        count = parsedData.processed;
+                        message = `[${timestamp}] Written ${parsedData.succeeded} entities, ${parsedData.failed} failed (${parsedData.rate ?? '-'} entities/s)`;
+                        break;
+                    case "writingEntity":
+                        message = `[${timestamp}] Writing ${parsedData.entityType} #${parsedData.index} is ${writingResult}: ${parsedData.message}`;
+                        break;
+                    case "writingFile":
+                        count = (parsedData.processed ?? count) + 1;
+                        message = `[${timestamp}] Writing IFC file is ${writingResult}`;
+                        break;
+                    case "jobComplete":
+                    case "jobFailed":
+                        if(jobId !== undefined && parsedData.jobId !== jobId) {
+                            return;
+                        }
+                        if(parsedData.action === "jobFailed") {
+                            message = `[${timestamp}] Job is failed: ${parsedData.message}`;
+                        }
+                        break;
+                    default:
+                        return;
+                }
+
+                if(countListner && message.length > 0) {
+                    countListner(count, message);
+                }
+
+                if(parsedData.action === "jobComplete" || parsedData.action === "jobFailed") {
+                    settle(() => resolve(parsedData));
+                }
+            };
+
             const onData = (chunk: Buffer) => {
                 buffer += chunk.toString();
                 const lines = buffer.split('\n');
                 buffer = lines.pop() || '';
 
                 for (const line of lines) {
-                    jsonBuffer.push(line);
-                }
-                
-                const joinedBuffer = jsonBuffer.join('');
-                const parseJob = JSON.tryParse<Object>(joinedBuffer);
-                let parsedData;
-                if(parseJob.success && Object.keys(parseJob.data).includes("action") && Object.keys(parseJob.data).includes("result")) {
-                    parsedData = parseJob.data;
-                    count++;
-                }
-
-                jsonBuffer.length = 0;
-                buffer = '';
-                
-                if(countListner && parseJob.success) {
-                    let message: string = "";
-                    const timestamp = getCurrentTimestamp();
-                    const writingResult = parsedData.result ? "done" : "failed";
-                    switch(parsedData.action) {
-                        case "writingEntity":
-                            message = `[${timestamp}] Writing ${parsedData.entityType} is ${writingResult}`;
-                            break;
-                        case "writingFile":
-                            message = `[${timestamp}] Writing IFC file is ${writingResult}`;
-                            break;
-                        default:
-                            return;
+                    if(line.trim().length > 0) {
+                        onLine(line);
                     }
-                    
-                    countListner(count, message);
-                }                
+                }
             };
 
             stdout.on('data', onData);
-            
-            stdin.write(message);
+            pyProcess.once('close', onClose);
+            pyProcess.once('error', onError);
+
+            if(options.signal?.aborted) {
+                return onAbort();
+            }
+            options.signal?.addEventListener('abort', onAbort, {once: true});
+            if(options.timeoutMs !== undefined) {
+                timer = setTimeout(() => cancel(`Job is timed out after ${options.timeoutMs} ms.`), options.timeoutMs);
+            }
+
+            // Remaining messages are not sent once the job is settled
+            const writeMessages = async () => {
+                for(const data of messages) {
+                    if(settled) {
+                        return;
+                    }
+
+                    const message = JSON.stringify(data) + '\n';
+                    if(!stdin.write(message)) {
+                        await new Promise((resolveDrain) => stdin.once('drain', resolveDrain));
+                    }
+                }
+            };
+            writeMessages().catch(onError);
         });
     }
 
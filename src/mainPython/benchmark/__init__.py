@@ -0,0 +1 @@
+from .syntheticBuilding import generate_building, generate_entities
\ No newline at end of file
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark.syntheticBuilding import generate_entities
+from converter.processMemory import peak_rss_bytes
+
+# Metrics compared against the baseline. Larger is worse for all of them.
+compared_metrics = ["parseSeconds", "buildSeconds", "saveSeconds", "totalSeconds", "peakRssBytes", "outputBytes"]
+
+def run_scale(element_count: int, storey_count: int | None = None, schema: str = "IFC2x3", workers: int = 0, stream_batch_size: int = 0, gc_mode: str | None = None) -> dict:
+    """
+    Convert a synthetic building of the given scale, and measure it.
+    Peak RSS is measured for the whole process, so run one scale per process to compare scales.
+    :param element_count: Approximate count of elements.
+    :param storey_count: Count of storeys. If None, it is decided by `generate_entities`.
+    :param schema: Schema of IFC file.
+    :param workers: If more than 1, storeys are built in parallel. Build time is then reported as a whole, not by class.
+                    Otherwise the entities are written by `ConversionJob.write_entities`, as a request is,
+                    and the build time by class and phase is taken from `JobProfiler`.
+    :param stream_batch_size: If more than 0, the file is streamed while building. Save time is then the time of closing.
+    :param gc_mode: "tuned" or "monitor" mode of `GcTuning`. Its report is added to the result.
+    """
+    from converter import ConversionJob
+    from converter.parallelBuild import build_parallel
+
+    payload = json.dumps({"entities": generate_entities(element_count, storey_count)})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, "benchmark.ifc")
+
+        started = time.perf_counter()
+        entities = json.loads(payload)["entities"]
+        parse_seconds = time.perf_counter() - started
+        del payload
+
+        build_seconds_by_class: dict[str, float] = {}
+        count_by_class: dict[str, int] = {}
+        # The job reports its progress to stdout, which is not a concern of the benchmark.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Memory is not traced, since tracemalloc slows the build down considerably
+            job = ConversionJob(
+                output_file,
+                schema=schema,
+                total=len(entities),
+                stream_batch_size=stream_batch_size,
+                profile={"memory": False} if workers <= 1 else None,
+                gc_mode=gc_mode
+            )
+
+            for entity in entities:
+                count_by_class[entity["ifcClass"]] = count_by_class.get(entity["ifcClass"], 0) + 1
+
+            if workers > 1:
+                build_started = time.perf_counter()
+                build_parallel(job, entities, workers)
+                build_seconds_by_class[f"parallel({workers})"] = time.perf_counter() - build_started
+            else:
+                build_started = time.perf_counter()
+                job.write_entities(entities)
+                build_seconds = time.perf_counter() - build_started
+
+                job.profiler.stop()
+                profile = job.profiler.report()
+                for ifc_class, record in profile["byClass"].items():
+                    build_seconds_by_class[ifc_class] = record["seconds"]
+                for phase, seconds in profile["phases"].items():
+                    build_seconds_by_class[f"({phase})"] = seconds
+
+                # Rest of the build, e.g. planning the batches
+                build_seconds_by_class["(other)"] = max(build_seconds - sum(build_seconds_by_class.values()), 0.)
+
+            save_started = time.perf_counter()
+            if job.stream is not None:
+                job.stream.close()
+            else:
+                job.writer.save(output_file)
+            save_seconds = time.perf_counter() - save_started
+
+            if job.gc_tuning is not None:
+                job.gc_tuning.stop()
+
+        failed = job.reporter.summary()["failed"]
+        ifc_entity_count = job.stream.written_count if job.stream is not None else sum(1 for _ in job.writer.model)
+        output_bytes = os.path.getsize(output_file)
+
+    build_seconds = sum(build_seconds_by_class.values())
+    result = {
+        "elements": len(entities),
+        "elementsByClass": count_by_class,
+        "failed": failed,
+        "parseSeconds": parse_seconds,
+        "buildSeconds": build_seconds,
+        "buildSecondsByClass": build_seconds_by_class,
+        "saveSeconds": save_seconds,
+        "totalSeconds": parse_seconds + build_seconds + save_seconds,
+        "peakRssBytes": peak_rss_bytes(),
+        "ifcEntityCount": ifc_entity_count,
+        "outputBytes": output_bytes,
+    }
+    if job.gc_tuning is not None:
+        result["gc"] = job.gc_tuning.report()
+
+    return result
+
+def run_scale_isolated(element_count: int, storey_count: int | None = None, schema: str = "IFC2x3", workers: int = 0, stream_batch_size: int = 0, gc_mode: str | None = None) -> dict:
+    """
+    Run `run_scale` in a child process, so the peak RSS of each scale is measured separately.
+    """
+    command = [sys.executable, "-m", "benchmark.conversionBenchmark", "--single", str(element_count), "--schema", schema, "--workers", str(workers), "--stream-batch-size", str(stream_batch_size)]
+    if storey_count is not None:
+        command += ["--storeys", str(storey_count)]
+    if gc_mode is not None:
+        command += ["--gc", gc_mode]
+
+    completed = subprocess.run(
+        command,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compare the results with the baseline.
+    :param results: Results by scale.
+    :param baseline: Baseline results by scale.
+    :param tolerance: Allowed ratio of increase, e.g. 0.1 for 10%.
+    :return: Descriptions of regressions.
+    """
+    regressions = []
+    for scale, result in results.items():
+        base = baseline.get(scale)
+        if base is None:
+            continue
+
+        for metric in compared_metrics:
+            current_value, base_value = result.get(metric), base.get(metric)
+            if not current_value or not base_value:
+                continue
+
+            if current_value > base_value * (1 + tolerance):
+                regressions.append(f"{scale} {metric}: {base_value:.4g} -> {current_value:.4g} (+{(current_value / base_value - 1) * 100:.1f}%)")
+
+    return regressions
+
+def print_table(results: dict, baseline: dict) -> None:
+    header = f"{'scale':>8} {'metric':<14} {'current':>14} {'baseline':>14} {'change':>9}"
+    print(header)
+    print("-" * len(header))
+    for scale, result in results.items():
+        base = baseline.get(scale, {})
+        for metric in compared_metrics:
+            current_value, base_value = result.get(metric), base.get(metric)
+            change = f"{(current_value / base_value - 1) * 100:+.1f}%" if current_value and base_value else ""
+            base_text = f"{base_value:.4g}" if base_value is not None else "-"
+            current_text = f"{current_value:.4g}" if current_value is not None else "-"
+            print(f"{scale:>8} {metric:<14} {current_text:>14} {base_text:>14} {change:>9}")
+
+        by_class = ", ".join(f"{ifc_class} {seconds:.3f}s" for ifc_class, seconds in result["buildSecondsByClass"].items())
+        print(f"{scale:>8} {'byClass':<14} {by_class}")
+
+        gc_report = result.get("gc")
+        if gc_report is not None:
+            collections = ", ".join(f"{generation} {count}" for generation, count in gc_report["collections"].items())
+            print(f"{scale:>8} {'gc':<14} {gc_report['mode']}: {collections}, pause {gc_report['pauseSeconds']:.3f}s")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of IFC conversion with synthetic buildings.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="Counts of elements to benchmark.")
+    parser.add_argument("--storeys", type=int, default=None, help="Count of storeys. Decided by the scale if omitted.")
+    parser.add_argument("--schema", default="IFC2x3")
+    parser.add_argument("--stream-batch-size", type=int, default=0, help="Elements between flushes of streaming output. 0 saves at once.")
+    parser.add_argument("--workers", type=int, default=0, help="Processes building storeys in parallel. 0 builds sequentially.")
+    parser.add_argument("--gc", choices=["tuned", "monitor"], default=None, help="Tune or measure the garbage collector while building.")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed ratio of regression.")
+    parser.add_argument("--single", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(run_scale(args.single, args.storeys, args.schema, args.workers, args.stream_batch_size, args.gc)))
+        return 0
+
+    # Results of parallel builds and streaming output are kept apart from the others in the baseline.
+    # Results of gc modes are not, so the table shows their impact on the default results.
+    suffix = f"@{args.workers}" if args.workers > 1 else ""
+    suffix += f"~{args.stream_batch_size}" if args.stream_batch_size > 0 else ""
+    results = {f"{scale}{suffix}": run_scale_isolated(scale, args.storeys, args.schema, args.workers, args.stream_batch_size, args.gc) for scale in args.scales}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file).get("scales", {})
+
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"python": sys.version.split()[0], "scales": {**baseline, **results}}, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
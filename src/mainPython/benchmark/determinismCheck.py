@@ -0,0 +1,77 @@
+import argparse
+import contextlib
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmark.syntheticBuilding import generate_entities
+
+main_python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def convert(output_file: str, element_count: int, guid_namespace: str, stream_batch_size: int = 0) -> None:
+    """
+    Convert a synthetic building with keyed elements in deterministic mode.
+    """
+    from converter import ConversionJob
+
+    entities = generate_entities(element_count)
+    for index, entity in enumerate(entities):
+        if entity["ifcClass"] != "IfcBuildingStorey":
+            entity["key"] = f"element-{index}"
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        job = ConversionJob(output_file, total=len(entities), guid_namespace=guid_namespace, stream_batch_size=stream_batch_size)
+        job.write_entities(entities)
+        job.finish()
+
+def convert_isolated(output_file: str, element_count: int, guid_namespace: str, stream_batch_size: int = 0) -> None:
+    """
+    Run `convert` in a fresh interpreter, so nothing of a previous run (e.g. the cached skeleton) is shared.
+    """
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmark.determinismCheck",
+            "--single", output_file,
+            "--elements", str(element_count),
+            "--namespace", guid_namespace,
+            "--stream-batch-size", str(stream_batch_size)
+        ],
+        cwd=main_python_dir,
+        check=True
+    )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that deterministic mode gives the same bytes in separate processes.")
+    parser.add_argument("--elements", type=int, default=2000, help="Approximate count of elements.")
+    parser.add_argument("--namespace", default="determinism-check", help="guidNamespace of the runs.")
+    parser.add_argument("--runs", type=int, default=2, help="Count of processes to compare.")
+    parser.add_argument("--stream-batch-size", type=int, default=0, help="Elements between flushes of streaming output. 0 saves at once.")
+    parser.add_argument("--single", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        convert(args.single, args.elements, args.namespace, args.stream_batch_size)
+        return 0
+
+    digests = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for run in range(args.runs):
+            output_file = os.path.join(temp_dir, f"run{run}.ifc")
+            convert_isolated(output_file, args.elements, args.namespace, args.stream_batch_size)
+            with open(output_file, "rb") as output:
+                digests.append(hashlib.sha256(output.read()).hexdigest())
+
+    for run, digest in enumerate(digests):
+        print(f"run {run}: {digest}")
+
+    if len(set(digests)) != 1:
+        print("NOT DETERMINISTIC: The runs wrote different files.")
+        return 1
+
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+main_python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_budget_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "importBudget.json")
+
+def measure_import(module: str) -> dict:
+    """
+    Import the module in a fresh interpreter with `-X importtime`.
+    :param module: Name of module, importable from `src/mainPython`.
+    :return: {"totalMs", "modules": {name: {"selfMs", "cumulativeMs"}}}
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=main_python_dir,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    total_us = 0
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented, so only top level imports are summed.
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+
+        modules[name.strip()] = {"selfMs": int(self_us) / 1000, "cumulativeMs": int(cumulative_us) / 1000}
+
+    return {"totalMs": total_us / 1000, "modules": modules}
+
+def measure_handshake() -> float:
+    """
+    Start `main.py`, and measure milliseconds until it answers "pythonTest".
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=main_python_dir,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    try:
+        process.stdin.write(json.dumps({"header": {"action": "pythonTest"}}) + "\n")
+        process.stdin.flush()
+        process.stdout.readline()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        process.stdin.write(json.dumps({"header": {"action": "shutdown"}}) + "\n")
+        process.stdin.flush()
+        process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    return elapsed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import time of the Python sidecar, compared with the budget.")
+    parser.add_argument("--budget", default=default_budget_file)
+    parser.add_argument("--runs", type=int, default=5, help="Runs of each measurement. The median is compared.")
+    parser.add_argument("--top", type=int, default=10, help="Count of the slowest modules to print.")
+    parser.add_argument("--update-budget", action="store_true", help="Write the measurements with 50% headroom as the new budget.")
+    args = parser.parse_args()
+
+    with open(args.budget) as budget_file:
+        budget = json.load(budget_file)
+
+    results = {}
+    for target in budget["budgetsMs"].keys():
+        if target == "handshake":
+            results[target] = statistics.median(measure_handshake() for _ in range(args.runs))
+            continue
+
+        measurements = [measure_import(target) for _ in range(args.runs)]
+        results[target] = statistics.median(measurement["totalMs"] for measurement in measurements)
+
+        slowest = sorted(measurements[-1]["modules"].items(), key=lambda item: item[1]["selfMs"], reverse=True)[:args.top]
+        print(f"{target}: slowest modules by self time")
+        for name, timing in slowest:
+            print(f"  {timing['selfMs']:9.2f} ms  {name}")
+
+    if args.update_budget:
+        budget["budgetsMs"] = {target: round(elapsed * 1.5, 1) for target, elapsed in results.items()}
+        with open(args.budget, "w") as budget_file:
+            json.dump(budget, budget_file, indent=2)
+        print(f"Budget written to {args.budget}")
+        return 0
+
+    exceeded = False
+    for target, elapsed in results.items():
+        limit = budget["budgetsMs"][target]
+        status = "OK" if elapsed <= limit else "OVER BUDGET"
+        exceeded = exceeded or elapsed > limit
+        print(f"{target:<12} {elapsed:9.1f} ms / {limit:9.1f} ms  {status}")
+
+    return 1 if exceeded else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,109 @@
+import math
+import random
+
+def generate_building(
+    storey_count: int,
+    grid_x: int,
+    grid_y: int,
+    span: float = 8.,
+    storey_height: float = 3.5,
+    wall_thickness: float = 0.2,
+    as_strings: bool = False,
+    seed: int = 0
+) -> list[dict]:
+    """
+    Generate entities of a synthetic building in the format of `create_ifc_from_json`.
+    Each storey has a column grid, beams along the grid lines, and walls along the perimeter.
+    :param storey_count: Count of storeys.
+    :param grid_x: Count of columns along X axis.
+    :param grid_y: Count of columns along Y axis.
+    :param span: Distance between grid lines.
+    :param storey_height: Height of each storey.
+    :param wall_thickness: Thickness of perimeter walls.
+    :param as_strings: Write numbers as strings, as the mapping writer of Electron side may do.
+    :param seed: Seed of random rotations.
+    """
+    rng = random.Random(seed)
+    value = str if as_strings else float
+
+    entities: list[dict] = []
+    for storey_index in range(storey_count):
+        storey_name = f"{storey_index + 1}F"
+        elevation = storey_index * storey_height
+        entities.append({
+            "ifcClass": "IfcBuildingStorey",
+            "name": storey_name,
+            "height": value(elevation),
+        })
+
+        for i in range(grid_x):
+            for j in range(grid_y):
+                entities.append({
+                    "ifcClass": "IfcColumn",
+                    "targetStorey": storey_name,
+                    "coordinate": [value(i * span), value(j * span)],
+                    "height": value(storey_height),
+                    "rotation": value(rng.choice((0., 90.))),
+                })
+
+        for i in range(grid_x):
+            for j in range(grid_y):
+                if i + 1 < grid_x:
+                    entities.append(_beam(storey_name, (i * span, j * span), ((i + 1) * span, j * span), storey_height, value))
+                if j + 1 < grid_y:
+                    entities.append(_beam(storey_name, (i * span, j * span), (i * span, (j + 1) * span), storey_height, value))
+
+        corners = [
+            (0., 0.),
+            ((grid_x - 1) * span, 0.),
+            ((grid_x - 1) * span, (grid_y - 1) * span),
+            (0., (grid_y - 1) * span),
+        ]
+        for corner_index, corner in enumerate(corners):
+            next_corner = corners[(corner_index + 1) % len(corners)]
+            segment_count = max(grid_x, grid_y) - 1
+            for segment_index in range(segment_count):
+                t_start = segment_index / segment_count
+                t_end = (segment_index + 1) / segment_count
+                pt_start = (corner[0] + (next_corner[0] - corner[0]) * t_start, corner[1] + (next_corner[1] - corner[1]) * t_start)
+                pt_end = (corner[0] + (next_corner[0] - corner[0]) * t_end, corner[1] + (next_corner[1] - corner[1]) * t_end)
+                if pt_start == pt_end:
+                    continue
+
+                entities.append({
+                    "ifcClass": "IfcWallStandardCase",
+                    "targetStorey": storey_name,
+                    "startPt": [value(pt_start[0]), value(pt_start[1])],
+                    "endPt": [value(pt_end[0]), value(pt_end[1])],
+                    "zOffset": value(0.),
+                    "thickness": value(wall_thickness),
+                    "height": value(storey_height),
+                })
+
+    return entities
+
+def generate_entities(element_count: int, storey_count: int | None = None, **kwargs) -> list[dict]:
+    """
+    Generate a synthetic building with about `element_count` elements (columns, beams and walls).
+    :param element_count: Approximate count of elements, e.g. 1,000 to 500,000.
+    :param storey_count: Count of storeys. If None, about 2,000 elements are placed on each storey.
+    :param kwargs: Other arguments of `generate_building`.
+    """
+    if storey_count is None:
+        storey_count = max(1, round(element_count / 2000))
+
+    # A grid of n x n columns has n^2 columns, 2n(n-1) beams and about 4(n-1) walls.
+    per_storey = element_count / storey_count
+    grid = max(2, round(math.sqrt(per_storey / 3)))
+
+    return generate_building(storey_count=storey_count, grid_x=grid, grid_y=grid, **kwargs)
+
+def _beam(storey_name: str, pt_start: tuple, pt_end: tuple, height: float, value) -> dict:
+    return {
+        "ifcClass": "IfcBeam",
+        "targetStorey": storey_name,
+        "startPt": [value(pt_start[0]), value(pt_start[1])],
+        "endPt": [value(pt_end[0]), value(pt_end[1])],
+        "height": value(height),
+        "rotation": value(0.),
+    }
\ No newline at end of file
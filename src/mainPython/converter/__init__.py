@@ -0,0 +1 @@
+from .conversionJob import ConversionJob
\ No newline at end of file
@@ -0,0 +1,44 @@
+class BuildPlan:
+    """
+    Order of building the entities of an input, independent of the order of input.
+    1. Storeys, in the order of input.
+    2. Shared resources of the element classes (profiles, types, materials), created once before the elements.
+    3. Elements, grouped by class and target storey, so each group is written as a homogeneous batch.
+    4. The others (e.g. not supported classes), in the order of input.
+    Entities are referred to by their position in the input.
+    """
+    def __init__(self):
+        self.storeys: list[int] = []
+        self.groups: dict[tuple[str, str], list[int]] = {}
+        self.others: list[int] = []
+
+    @property
+    def element_classes(self) -> list[str]:
+        """
+        Element classes in the input, in the order of their first group.
+        """
+        return list(dict.fromkeys(ifc_class for ifc_class, _ in self.groups.keys()))
+
+    def class_positions(self, ifc_class: str) -> list[int]:
+        return [position for (group_class, _), positions in self.groups.items() if group_class == ifc_class for position in positions]
+
+def plan_build(entities: list[dict], element_classes, skipped=()) -> BuildPlan:
+    """
+    :param entities: List of entities. Each entity has 'ifcClass' and the values by its class.
+    :param element_classes: Classes of elements placed in a target storey.
+    :param skipped: Positions of entities not to build, e.g. built before a checkpoint.
+    """
+    plan = BuildPlan()
+    for position, entity in enumerate(entities):
+        if position in skipped:
+            continue
+
+        ifc_class = entity.get('ifcClass')
+        if ifc_class == 'IfcBuildingStorey':
+            plan.storeys.append(position)
+        elif ifc_class in element_classes:
+            plan.groups.setdefault((ifc_class, entity.get('targetStorey')), []).append(position)
+        else:
+            plan.others.append(position)
+
+    return plan
\ No newline at end of file
@@ -0,0 +1,126 @@
+import csv
+
+# Fields of each ifcClass in columnar input.
+# - "point": (x, y). Array of shape (N, 2) in JSON and NPZ, "<field>_x" and "<field>_y" columns in CSV.
+# - "float": Array of shape (N,).
+# - "str": List of N strings.
+columnar_fields: dict[str, dict[str, str]] = {
+    "IfcBuildingStorey": {"name": "str", "height": "float"},
+    "IfcColumn": {"coordinate": "point", "height": "float", "rotation": "float", "targetStorey": "str"},
+    "IfcBeam": {"startPt": "point", "endPt": "point", "height": "float", "rotation": "float", "targetStorey": "str"},
+    "IfcWallStandardCase": {
+        "startPt": "point", "endPt": "point", "zOffset": "float", "thickness": "float", "height": "float", "targetStorey": "str"
+    },
+}
+
+def load_columnar_input(request: dict) -> dict[str, dict[str, any]] | None:
+    """
+    Load the columnar input of request, if it has one.
+    - "columns": Struct of arrays JSON. {ifcClass: {field: [values...]}}
+    - header "inputPath": Path to a NumPy .npz file with arrays named "<ifcClass>.<field>",
+      or to a CSV file with an "ifcClass" column, or {ifcClass: path to CSV file}.
+    :return: Columns by ifcClass, coerced by `columnar_fields`. None if the request has entities instead.
+    """
+    if request.get("columns") is not None:
+        return from_struct_of_arrays(request["columns"])
+
+    input_path = (request.get("header") or {}).get("inputPath")
+    if input_path is None:
+        return None
+
+    if isinstance(input_path, str) and input_path.lower().endswith(".npz"):
+        return from_npz(input_path)
+
+    return from_csv(input_path)
+
+def from_struct_of_arrays(columns: dict[str, dict[str, list]]) -> dict[str, dict[str, any]]:
+    return {ifc_class: coerce_columns(ifc_class, fields) for ifc_class, fields in columns.items()}
+
+def from_npz(path: str) -> dict[str, dict[str, any]]:
+    import numpy as np
+
+    raw_columns: dict[str, dict[str, any]] = {}
+    with np.load(path, allow_pickle=False) as archive:
+        for name in archive.files:
+            ifc_class, _, field = name.partition(".")
+            raw_columns.setdefault(ifc_class, {})[field] = archive[name]
+
+    return from_struct_of_arrays(raw_columns)
+
+def from_csv(path: str | dict[str, str]) -> dict[str, dict[str, any]]:
+    """
+    :param path: Path to a CSV file with an "ifcClass" column, or paths to a CSV file by ifcClass.
+    """
+    if isinstance(path, dict):
+        columns = {}
+        for ifc_class, class_path in path.items():
+            with open(class_path, newline="", encoding="utf-8") as csv_file:
+                columns[ifc_class] = _read_csv_columns(csv.reader(csv_file))
+        return {ifc_class: coerce_columns(ifc_class, _join_points(ifc_class, raw)) for ifc_class, raw in columns.items()}
+
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        reader = csv.reader(csv_file)
+        names = next(reader)
+        class_position = names.index("ifcClass")
+
+        rows_by_class: dict[str, list[list[str]]] = {}
+        for row in reader:
+            if row:
+                rows_by_class.setdefault(row[class_position], []).append(row)
+
+    columns = {}
+    for ifc_class, rows in rows_by_class.items():
+        raw = {name: list(values) for name, values in zip(names, zip(*rows))}
+        columns[ifc_class] = coerce_columns(ifc_class, _join_points(ifc_class, raw))
+
+    return columns
+
+def coerce_columns(ifc_class: str, fields: dict[str, any]) -> dict[str, any]:
+    """
+    Convert the fields of class into arrays at once, by the types of `columnar_fields`.
+    :raise ValueError: If the class is not supported, a field is missing or has a wrong length.
+    """
+    import numpy as np
+
+    field_types = columnar_fields.get(ifc_class)
+    if field_types is None:
+        raise ValueError(f"Not supported IfcClass '{ifc_class}' in columnar input.")
+
+    columns = {}
+    count = None
+    for field, field_type in field_types.items():
+        if field not in fields:
+            raise ValueError(f"Field '{field}' of '{ifc_class}' is missing in columnar input.")
+
+        if field_type == "str":
+            values = [str(value) for value in fields[field]]
+        elif field_type == "point":
+            values = np.asarray(fields[field], dtype=float).reshape(-1, 2)
+        else:
+            values = np.asarray(fields[field], dtype=float).reshape(-1)
+
+        if count is None:
+            count = len(values)
+        elif len(values) != count:
+            raise ValueError(f"Field '{field}' of '{ifc_class}' has {len(values)} values, not {count}.")
+
+        columns[field] = values
+
+    return columns
+
+def count_entities(columns: dict[str, dict[str, any]]) -> int:
+    return sum(len(next(iter(fields.values()))) for fields in columns.values() if fields)
+
+def _read_csv_columns(reader) -> dict[str, list[str]]:
+    names = next(reader)
+    rows = [row for row in reader if row]
+    return {name: list(values) for name, values in zip(names, zip(*rows))} if rows else {name: [] for name in names}
+
+def _join_points(ifc_class: str, raw: dict[str, list[str]]) -> dict[str, any]:
+    # CSV has a column per coordinate, e.g. "startPt_x", "startPt_y".
+    fields = dict(raw)
+    for field, field_type in columnar_fields.get(ifc_class, {}).items():
+        if field_type == "point" and f"{field}_x" in raw and f"{field}_y" in raw:
+            fields[field] = list(zip(raw[f"{field}_x"], raw[f"{field}_y"]))
+
+    return fields
\ No newline at end of file
@@ -0,0 +1,550 @@
+from contextlib import nullcontext
+
+from writer import IfcWriter, IfcStepStreamWriter
+from printer import print_response, ProgressReporter
+from .buildPlan import BuildPlan, plan_build
+from .columnarInput import columnar_fields
+from .gcTuning import GcTuning
+from .inputValidation import InputValidationError, validate_entities, validate_columns, invalid_rows
+from .jobCheckpoint import JobCheckpoint
+from .jobControl import JobCancelled, JobControl
+from .jobProfiler import JobProfiler
+
+# Element classes written by the batch methods of IfcSharedElementDataUtil
+batch_classes = ("IfcColumn", "IfcBeam", "IfcWallStandardCase")
+
+# Shorter runs of elements are written one by one
+min_batch_size = 8
+
+# Longer batches are split, so the job control is checked between them
+control_batch_size = 2048
+
+# Profile and types of the columns and beams written by the job
+member_profile_name = "H300x300"
+member_profile_arg = {"w": 0.3, "h": 0.3, "tw": 0.01, "tf": 0.015, "r": 0.01}
+column_type_name = "COL-H300x300"
+beam_type_name = "BEAM-H300x300"
+
+class ConversionJob:
+    """
+    Conversion of entities into an IFC file.
+    The entities can be written at once, or chunk by chunk as they arrive. The file is saved by `finish`.
+    """
+    def __init__(
+        self,
+        output_file: str,
+        schema: str = "IFC2x3",
+        total: int | None = None,
+        progress_interval_count: int = 500,
+        progress_interval_ms: float = 200.,
+        parallel_workers: int = 0,
+        reporter: ProgressReporter | None = None,
+        stream_batch_size: int = 0,
+        profile: dict | None = None,
+        writer: IfcWriter | None = None,
+        guid_namespace: str | None = None,
+        compression: str | None = None,
+        compression_level: int | None = None,
+        validate: bool = True,
+        control: JobControl | None = None,
+        checkpoint: JobCheckpoint | None = None,
+        gc_mode: str | None = None
+    ):
+        """
+        :param output_file: The file path where the IFC file will be saved.
+        :param schema: Schema of IFC file.
+        :param total: Total count of entities, if known. Use for progress responses.
+        :param progress_interval_count: Count of entities between progress responses.
+        :param progress_interval_ms: Milliseconds between progress responses.
+        :param parallel_workers: If more than 1, entities are kept until `finish`, and built by storey on this count of processes.
+        :param reporter: Reporter of results. If None, a `ProgressReporter` printing responses is used.
+        :param stream_batch_size: If more than 0, the file is written while building, and every this count of elements
+                                  are flushed to the file and released from memory. See `IfcStepStreamWriter`.
+        :param profile: If not None, the job is profiled by `JobProfiler` with these options (e.g. {"trace": "chrome"}),
+                        and the report is added to the "writingFile" response.
+        :param writer: Writer to build into, e.g. opened by `IfcWriter.open`. If None, a new writer of the schema is created.
+        :param guid_namespace: Namespace of deterministic GlobalIds of the new writer. See `IfcGuidUtil`.
+        :param compression: "ifczip" or "gzip". If None, chosen by the extension of output file. See `IfcWriter.save`.
+        :param compression_level: Deflate level of compression.
+        :param validate: Validate each input before building it. If an entity is invalid, nothing of the input is built,
+                         and `InputValidationError` with all errors is raised. See `inputValidation`.
+        :param control: Cancellation, deadline and memory cap of job. It is checked between entities and batches,
+                        and `JobCancelled` is raised if the job must stop.
+        :param checkpoint: Checkpoint of job, for a job written by a single `write_entities`. A serial job resumes from
+                           its saved model and skips the processed entities, and a parallel job from its saved shards.
+                           The checkpoint is deleted by `finish`.
+        :param gc_mode: "tuned" or "monitor". If given, the garbage collector is tuned or measured by `GcTuning`
+                        from the writer set up until the file is saved, and the report is added to the "writingFile" response.
+        """
+        self.output_file = output_file
+        self.compression = compression
+        self.compression_level = compression_level
+        self.checkpoint = checkpoint
+
+        resumed_writer = None
+        if checkpoint is not None and writer is None and parallel_workers <= 1:
+            resumed_writer = checkpoint.open_writer(guid_namespace)
+            writer = resumed_writer
+        self.writer = writer if writer is not None else IfcWriter(schema, guid_namespace=guid_namespace)
+        self.entity_count = 0
+        self.validate = validate
+        self.control = control
+        self.gc_tuning = GcTuning(gc_mode) if gc_mode is not None else None
+        self.details: dict[str, any] | None = None
+        self.parallel_workers = parallel_workers
+        self.pending_entities: list[dict] = []
+
+        # Names of storeys created, or validated and pending. Elements of later inputs may refer to them.
+        # Storeys of a resumed model are in the input again, so they are validated as in the first run.
+        self.storey_names: set[str] = set(self.writer.storeys.keys()) if resumed_writer is None else set()
+
+        # Keys of elements validated, in deterministic mode. Their GlobalIds are derived from the keys, so they must be unique.
+        self.element_keys: set[str] | None = set() if self.writer.ifcGuidUtil.deterministic else None
+        self.reporter = reporter or ProgressReporter(
+            total=total,
+            interval_count=progress_interval_count,
+            interval_ms=progress_interval_ms
+        )
+        if resumed_writer is not None:
+            checkpoint.restore_progress(self.reporter)
+
+        self.stream: IfcStepStreamWriter | None = None
+        if stream_batch_size > 0:
+            self.stream = IfcStepStreamWriter(
+                self.writer,
+                output_file,
+                batch_size=stream_batch_size,
+                compression=compression,
+                compression_level=compression_level
+            )
+            self.stream.open()
+
+        self.profiler: JobProfiler | None = None
+        if profile is not None:
+            self.profiler = JobProfiler(self.writer, output_file, **profile)
+            self.profiler.start()
+
+        # Started last, so the writer set up above is frozen
+        if self.gc_tuning is not None:
+            self.gc_tuning.start()
+
+    def write_entities(self, entities: list[dict]) -> None:
+        """
+        Write entities into the model. The results are reported by the job's `ProgressReporter`.
+        Entities are written in the order of `BuildPlan`, not of input, so an element may come before its storey.
+        Failures are reported with the index of entity in input.
+        :param entities: List of entities. Each entity has 'ifcClass' and the values by its class.
+        :raise InputValidationError: If `validate` and an entity is invalid.
+        """
+        if self.validate:
+            with self._measure_phase("validate"):
+                errors = validate_entities(entities, self.storey_names, self.entity_count + len(self.pending_entities), self.element_keys)
+            if errors:
+                raise InputValidationError(errors)
+
+            if self.element_keys is not None:
+                self.element_keys.update(str(entity['key']) for entity in entities if entity.get('key') is not None and entity.get('ifcClass') != 'IfcBuildingStorey')
+
+        self.storey_names.update(entity.get('name') for entity in entities if entity.get('ifcClass') == 'IfcBuildingStorey')
+
+        if self.parallel_workers > 1:
+            self.pending_entities.extend(entities)
+            return
+
+        plan = plan_build(entities, batch_classes, skipped=self.checkpoint.done if self.checkpoint is not None else ())
+        first_index = self.entity_count
+
+        for position in plan.storeys:
+            self.write_entity(entities[position], first_index + position)
+        self._entities_done(plan.storeys)
+
+        with self._measure_phase("sharedResources"):
+            self._create_shared_resources(plan, entities)
+
+        for positions in plan.groups.values():
+            for chunk_start in range(0, len(positions), control_batch_size):
+                self.check_control()
+                chunk = positions[chunk_start:chunk_start + control_batch_size]
+                self._write_run([entities[position] for position in chunk], [first_index + position for position in chunk])
+                self._entities_done(chunk)
+
+        for position in plan.others:
+            self.write_entity(entities[position], first_index + position)
+        self._entities_done(plan.others)
+
+    def _entities_done(self, positions: list[int]) -> None:
+        """
+        Record the processed entities to the checkpoint, and save it if due.
+        """
+        if self.checkpoint is None:
+            return
+
+        self.checkpoint.mark_done(positions)
+        if self.checkpoint.is_due():
+            with self._measure_phase("checkpoint"):
+                self.checkpoint.save(self.writer, self.reporter)
+
+    def _create_shared_resources(self, plan: BuildPlan, entities: list[dict]) -> None:
+        """
+        Create the profiles, types and materials shared by the elements of plan, before any element.
+        """
+        util = self.writer.ifcSharedElementDataUtil
+        for ifc_class in plan.element_classes:
+            if ifc_class == 'IfcColumn':
+                util.get_column_profile(member_profile_name, member_profile_arg)
+                util.get_column_type(column_type_name)
+            elif ifc_class == 'IfcBeam':
+                util.get_beam_profile(member_profile_name, member_profile_arg)
+                util.get_beam_type(beam_type_name)
+            elif ifc_class == 'IfcWallStandardCase':
+                self._create_wall_resources([entities[position] for position in plan.class_positions(ifc_class)])
+
+    def _create_wall_resources(self, walls: list[dict]) -> None:
+        """
+        Create the wall types with their material layer sets, and the profiles of distinct (length, thickness).
+        """
+        import numpy as np
+
+        util = self.writer.ifcSharedElementDataUtil
+        try:
+            type_names = [f"WAL_T{wall['thickness']}" for wall in walls]
+            thicknesses = np.asarray([wall['thickness'] for wall in walls], dtype=float)
+            pts_start = np.asarray([wall['startPt'][:2] for wall in walls], dtype=float).reshape(-1, 2)
+            pts_end = np.asarray([wall['endPt'][:2] for wall in walls], dtype=float).reshape(-1, 2)
+        except (KeyError, TypeError, ValueError, IndexError):
+            # Malformed walls are not validated. They create their resources, or fail, one by one.
+            return
+
+        for type_name, thickness in dict(zip(type_names, thicknesses.tolist())).items():
+            util.get_wall_type(type_name)
+            util.get_wall_material_layer_set(type_name, thickness)
+
+        # Profiles are shared by the walls of the same quantized length and thickness
+        lengths = np.hypot(pts_end[:, 0] - pts_start[:, 0], pts_end[:, 1] - pts_start[:, 1])
+        valid = np.flatnonzero(np.isfinite(lengths) & np.isfinite(thicknesses) & (lengths > self.writer.precision))
+        keys = np.round(np.column_stack((lengths[valid], thicknesses[valid])) / self.writer.precision)
+        _, first_positions = np.unique(keys, axis=0, return_index=True)
+        for position in valid[np.sort(first_positions)].tolist():
+            util.get_wall_profile(wall_length=float(lengths[position]), wall_thickness=float(thicknesses[position]))
+
+    def _write_run(self, entities: list[dict], indices: list[int]) -> None:
+        """
+        Write entities of the same class. Elements are written by the batch methods of `IfcSharedElementDataUtil`,
+        so their geometry is computed in one vectorized pass.
+        :param indices: Indices of entities in the job, used for failure responses.
+        """
+        ifc_class = entities[0].get('ifcClass')
+        if ifc_class in batch_classes and len(entities) >= min_batch_size:
+            # Rows the batch can not build (e.g. not validated input) are written one by one,
+            # so each failure is reported with its index, and the others are still batched.
+            invalid = invalid_rows(ifc_class, entities, self.writer.storeys)
+            if invalid.any():
+                for position in invalid.nonzero()[0].tolist():
+                    self.write_entity(entities[position], indices[position])
+                valid_positions = (~invalid).nonzero()[0].tolist()
+                entities = [entities[position] for position in valid_positions]
+                indices = [indices[position] for position in valid_positions]
+
+        if ifc_class not in batch_classes or len(entities) < min_batch_size:
+            for entity, index in zip(entities, indices):
+                self.write_entity(entity, index)
+            return
+
+        step_id = self.writer.max_step_id()
+        try:
+            with self._measure(ifc_class, len(entities)):
+                elements = self._create_batch(ifc_class, entities)
+        except (KeyError, TypeError, ValueError, IndexError, OverflowError):
+            # The elements created before the failure are removed, and all are written one by one,
+            # so each failure is reported with its index.
+            self.writer.remove_created_after(step_id)
+            for entity, index in zip(entities, indices):
+                self.write_entity(entity, index)
+            return
+
+        self.entity_count += len(entities)
+        for entity, index, element in zip(entities, indices, elements):
+            if element is None:
+                self.reporter.entity_failed(index, ifc_class, "Zero Length Error: The start and end points are the same.")
+                continue
+
+            self._set_key(element, entity)
+            self.reporter.entity_succeeded(ifc_class)
+            if self.stream is not None:
+                self.stream.element_finished()
+
+    def _create_batch(self, ifc_class: str, entities: list[dict]) -> list:
+        columns = {
+            field: [entity[field][:2] for entity in entities] if field_type == "point" else [entity[field] for entity in entities]
+            for field, field_type in columnar_fields[ifc_class].items()
+        }
+        return self._create_from_columns(ifc_class, columns)
+
+    def _create_from_columns(self, ifc_class: str, columns: dict[str, any]) -> list:
+        """
+        Create elements of the class by the batch methods of `IfcSharedElementDataUtil`.
+        :param columns: Values by field of `columnar_fields`, as lists or arrays.
+        """
+        util = self.writer.ifcSharedElementDataUtil
+
+        if ifc_class == 'IfcColumn':
+            return util.create_columns(
+                profile_name=member_profile_name,
+                col_type_name=column_type_name,
+                target_storey_names=columns['targetStorey'],
+                coordinates=columns['coordinate'],
+                heights=columns['height'],
+                rotation_degrees=columns['rotation'],
+                profile_arg=member_profile_arg
+            )
+
+        if ifc_class == 'IfcBeam':
+            return util.create_beams(
+                profile_name=member_profile_name,
+                beam_type_name=beam_type_name,
+                target_storey_names=columns['targetStorey'],
+                pts_start=columns['startPt'],
+                pts_end=columns['endPt'],
+                rotation_degrees=columns['rotation'],
+                z_offsets=columns['height'],
+                profile_arg=member_profile_arg
+            )
+
+        thicknesses = columns['thickness']
+        return util.create_walls(
+            wall_type_names=[f"WAL_T{thickness}" for thickness in (thicknesses.tolist() if hasattr(thicknesses, "tolist") else thicknesses)],
+            target_storey_names=columns['targetStorey'],
+            pts_start=columns['startPt'],
+            pts_end=columns['endPt'],
+            z_offsets=columns['zOffset'],
+            wall_thicknesses=thicknesses,
+            wall_heights=columns['height']
+        )
+
+    def write_columns(self, columns: dict[str, dict[str, any]]) -> None:
+        """
+        Write columnar input (see `columnarInput`). Storeys are written first, then the elements by class in one batch each.
+        Entities are indexed in that order for failure responses.
+        :param columns: Columns by ifcClass, coerced by `columnarInput.coerce_columns`.
+        :raise InputValidationError: If `validate` and an entity is invalid.
+        """
+        import numpy as np
+
+        if self.validate:
+            with self._measure_phase("validate"):
+                errors = validate_columns(columns, self.storey_names, self.entity_count)
+            if errors:
+                raise InputValidationError(errors)
+
+        storeys = columns.get('IfcBuildingStorey')
+        if storeys:
+            self.storey_names.update(storeys['name'])
+            for name, height in zip(storeys['name'], storeys['height'].tolist()):
+                self.write_entity({'ifcClass': 'IfcBuildingStorey', 'name': name, 'height': height})
+
+        for ifc_class in batch_classes:
+            class_columns = columns.get(ifc_class)
+            if not class_columns:
+                continue
+
+            storey_names = class_columns['targetStorey']
+            count = len(storey_names)
+            first_index = self.entity_count
+            self.entity_count += count
+
+            # Elements of missing storeys fail one by one, and the others are written in a batch
+            existing = np.fromiter((name in self.writer.storeys for name in storey_names), dtype=bool, count=count)
+            for position in np.flatnonzero(~existing).tolist():
+                self.reporter.entity_failed(first_index + position, ifc_class, f"Not Exist Error: Storey '{storey_names[position]}' does not exist.")
+
+            existing_positions = np.flatnonzero(existing)
+            for chunk_start in range(0, len(existing_positions), control_batch_size):
+                self.check_control()
+                positions = existing_positions[chunk_start:chunk_start + control_batch_size]
+                selected = {
+                    field: [values[position] for position in positions.tolist()] if isinstance(values, list) else values[positions]
+                    for field, values in class_columns.items()
+                }
+
+                step_id = self.writer.max_step_id()
+                try:
+                    with self._measure(ifc_class, len(positions)):
+                        elements = self._create_from_columns(ifc_class, selected)
+                except Exception as e:
+                    self.writer.remove_created_after(step_id)
+                    for position in positions.tolist():
+                        self.reporter.entity_failed(first_index + position, ifc_class, str(e))
+                    continue
+
+                for position, element in zip(positions.tolist(), elements):
+                    if element is None:
+                        self.reporter.entity_failed(first_index + position, ifc_class, "Zero Length Error: The start and end points are the same.")
+                        continue
+
+                    self.reporter.entity_succeeded(ifc_class)
+                    if self.stream is not None:
+                        self.stream.element_finished()
+
+    def write_entity(self, entity: dict, index: int | None = None) -> None:
+        """
+        :param index: Index of entity in the job, used for failure responses. If None, entities are counted in order.
+        """
+        self.check_control()
+        if self.profiler is not None:
+            with self.profiler.element(entity.get('ifcClass')):
+                self._write_entity(entity, index)
+            return
+
+        self._write_entity(entity, index)
+
+    def _write_entity(self, entity: dict, index: int | None) -> None:
+        writer = self.writer
+        ifc_class = entity.get('ifcClass')
+        if index is None:
+            index = self.entity_count
+        self.entity_count += 1
+        step_id = None
+        try:
+            step_id = writer.max_step_id()
+            if ifc_class == 'IfcBuildingStorey':
+                writer.ifcCoreDataUtil.create_storey(
+                    name=entity['name'],
+                    elevation=float(entity['height'])
+                )
+                self.reporter.entity_succeeded(ifc_class)
+            elif ifc_class == 'IfcColumn':
+                coordinate = (float(entity['coordinate'][0]), float(entity['coordinate'][1]))
+                element = writer.ifcSharedElementDataUtil.create_column(
+                    profile_name=member_profile_name,
+                    col_type_name=column_type_name,
+                    target_storey_name=entity['targetStorey'],
+                    height=float(entity['height']),
+                    rotation_degree=float(entity['rotation']),
+                    coordinate=coordinate,
+                    profile_arg=member_profile_arg
+                )
+                self._set_key(element, entity)
+                self.reporter.entity_succeeded(ifc_class)
+            elif ifc_class == 'IfcBeam':
+                pt_start = (float(entity['startPt'][0]), float(entity['startPt'][1]))
+                pt_end = (float(entity['endPt'][0]), float(entity['endPt'][1]))
+                element = writer.ifcSharedElementDataUtil.create_beam(
+                    profile_name=member_profile_name,
+                    beam_type_name=beam_type_name,
+                    target_storey_name=entity['targetStorey'],
+                    pt_start=pt_start,
+                    pt_end=pt_end,
+                    rotation_degree=float(entity['rotation']),
+                    z_offset=float(entity['height']),
+                    profile_arg=member_profile_arg
+                )
+                self._set_key(element, entity)
+                self.reporter.entity_succeeded(ifc_class)
+            elif ifc_class == "IfcWallStandardCase":
+                pt_start = (float(entity['startPt'][0]), float(entity['startPt'][1]))
+                pt_end = (float(entity['endPt'][0]), float(entity['endPt'][1]))
+                element = writer.ifcSharedElementDataUtil.create_wall_single(
+                    wall_type_name=f"WAL_T{entity['thickness']}",
+                    target_storey_name=entity['targetStorey'],
+                    pt_start=pt_start,
+                    pt_end=pt_end,
+                    z_offset=float(entity['zOffset']),
+                    wall_thickness=float(entity['thickness']),
+                    wall_height=float(entity['height'])
+                )
+                self._set_key(element, entity)
+                self.reporter.entity_succeeded(ifc_class)
+            else:
+                self.reporter.entity_failed(index, ifc_class, "Not supported IfcClass.")
+        except Exception as e:
+            # An element may fail after some of its entities are created, e.g. on a non-finite number
+            if step_id is not None:
+                writer.remove_created_after(step_id)
+            self.reporter.entity_failed(index, ifc_class, str(e))
+            return
+
+        if self.stream is not None and ifc_class != 'IfcBuildingStorey':
+            self.stream.element_finished()
+
+    def _set_key(self, element, entity: dict) -> None:
+        # The user key of entity is kept as Tag of element, so the element can be found by `incrementalUpdate`.
+        # Deterministic GlobalIds of keyed elements are derived from the key, so they do not depend on the order of input.
+        key = entity.get('key')
+        if key is not None and element is not None:
+            element.Tag = str(key)
+            if self.writer.ifcGuidUtil.deterministic:
+                element.GlobalId = self.writer.ifcGuidUtil.from_key(str(key))
+
+    def finish(self, extra_details: dict[str, any] | None = None) -> str:
+        """
+        Save the IFC file.
+        :param extra_details: Added to the details of "writingFile" response.
+        :return: The path to the saved IFC file.
+        """
+        if self.pending_entities:
+            from .parallelBuild import build_parallel
+
+            entities = self.pending_entities
+            self.pending_entities = []
+            with self._measure_phase("parallelBuild"):
+                build_parallel(self, entities, self.parallel_workers)
+
+        self.check_control()
+        with self._measure_phase("save"):
+            if self.stream is not None:
+                self.stream.close()
+                output_stats = self.stream.output_stats
+            else:
+                output_stats = self.writer.save(self.output_file, compression=self.compression, compression_level=self.compression_level)
+
+        if self.gc_tuning is not None:
+            self.gc_tuning.stop()
+
+        self.reporter.report()
+        details = self.reporter.summary()
+        details["output"] = output_stats
+        if self.stream is not None:
+            details["stream"] = self.stream.get_stats()
+        if self.profiler is not None:
+            self.profiler.stop()
+            details["profile"] = self.profiler.report()
+        if self.gc_tuning is not None:
+            details["gc"] = self.gc_tuning.report()
+        if self.checkpoint is not None:
+            details["checkpoint"] = self.checkpoint.get_stats()
+            self.checkpoint.clear()
+        if extra_details:
+            details.update(extra_details)
+        self.details = details
+        print_response(action="writingFile", result=True, details=details)
+        return self.output_file
+
+    def check_control(self) -> None:
+        """
+        Stop the job if it is cancelled, or over its deadline or memory cap.
+        :raise JobCancelled: With the progress until now.
+        """
+        if self.control is None:
+            return
+
+        stop = self.control.stop_reason()
+        if stop is not None:
+            raise JobCancelled(stop[0], stop[1], self.reporter.summary())
+
+    def discard(self) -> None:
+        """
+        Discard the job. The file partially written by streaming is deleted.
+        """
+        self.pending_entities = []
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.gc_tuning is not None:
+            self.gc_tuning.stop()
+        if self.stream is not None:
+            self.stream.discard()
+
+    def _measure(self, ifc_class: str, count: int):
+        return self.profiler.element(ifc_class, count) if self.profiler is not None else nullcontext()
+
+    def _measure_phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import gc
+import time
+from typing import Literal
+
+from .processMemory import current_rss_bytes
+
+class GcTuning:
+    """
+    Tuning of the cyclic garbage collector while a job builds, enabled by the "gc" option of request header.
+    Entity wrappers and input entities are rarely in reference cycles, so the collections during a build scan
+    a growing heap and free little.
+    - "tuned": When the writer is set up, all objects until then (skeleton, registries, modules) are collected once and
+      moved to the permanent generation by `gc.freeze`, and the collector is paused until `stop`.
+      `stop` runs a single collection of the objects of the job, then unfreezes.
+      Cyclic garbage of the job is kept until then, so set "maxRssBytes" of the job for large inputs.
+    - "monitor": The collector runs as default, and is only measured. Use it as the reference of "tuned".
+    Both report the collections, their pauses, the elapsed time and the resident set size at start and stop.
+    """
+    def __init__(self, mode: Literal["tuned", "monitor"] = "tuned"):
+        """
+        :param mode: "tuned" or "monitor".
+        """
+        if mode not in ("tuned", "monitor"):
+            raise ValueError(f"Value Error: gc mode '{mode}' is not 'tuned' or 'monitor'.")
+
+        self.mode = mode
+        self.collections = [0, 0, 0]
+        self.collected = 0
+        self.pause_seconds = 0.
+        self.frozen_objects = 0
+        self.rss_start: int | None = None
+        self.rss_stop: int | None = None
+        self.started_at = 0.
+        self.elapsed_seconds = 0.
+        self.collection_started_at: float | None = None
+        self.was_enabled = True
+        self.running = False
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self.rss_start = current_rss_bytes()
+        self.started_at = time.perf_counter()
+        gc.callbacks.append(self._on_collection)
+
+        if self.mode == "tuned":
+            gc.collect()
+            gc.freeze()
+            self.frozen_objects = gc.get_freeze_count()
+            self.was_enabled = gc.isenabled()
+            gc.disable()
+
+        self.running = True
+
+    def stop(self) -> None:
+        """
+        Restore the collector. In "tuned" mode, the garbage of the job is collected here.
+        """
+        if not self.running:
+            return
+
+        if self.mode == "tuned":
+            # Collected before unfreezing, so the frozen objects are not scanned again
+            gc.collect()
+            gc.unfreeze()
+            if self.was_enabled:
+                gc.enable()
+
+        gc.callbacks.remove(self._on_collection)
+        self.elapsed_seconds = time.perf_counter() - self.started_at
+        self.rss_stop = current_rss_bytes()
+        self.running = False
+
+    def _on_collection(self, phase: str, info: dict[str, int]) -> None:
+        if phase == "start":
+            self.collection_started_at = time.perf_counter()
+            return
+
+        if self.collection_started_at is None:
+            return
+
+        self.pause_seconds += time.perf_counter() - self.collection_started_at
+        self.collections[info["generation"]] += 1
+        self.collected += info["collected"]
+        self.collection_started_at = None
+
+    def report(self) -> dict[str, any]:
+        return {
+            "mode": self.mode,
+            "collections": {f"gen{generation}": count for generation, count in enumerate(self.collections)},
+            "collectedObjects": self.collected,
+            "pauseSeconds": round(self.pause_seconds, 6),
+            "frozenObjects": self.frozen_objects,
+            "elapsedSeconds": round(self.elapsed_seconds, 6),
+            "rssStartBytes": self.rss_start,
+            "rssStopBytes": self.rss_stop,
+        }
\ No newline at end of file
@@ -0,0 +1,157 @@
+import json
+import os
+from typing import Callable
+
+from writer import IfcWriter
+
+def entity_key(entity: dict) -> str | None:
+    """
+    Stable key of entity. Elements are keyed by their "key" value, which is kept as Tag of the element.
+    Storeys are keyed by name.
+    """
+    if entity.get('ifcClass') == 'IfcBuildingStorey':
+        return f"IfcBuildingStorey:{entity.get('name')}"
+
+    key = entity.get('key')
+    return None if key is None else str(key)
+
+def index_entities(entities: list[dict]) -> dict[str, dict] | None:
+    """
+    :return: Entities by key. None if an entity has no key, or keys are duplicated.
+    """
+    entities_by_key = {}
+    for entity in entities:
+        key = entity_key(entity)
+        if key is None or key in entities_by_key:
+            return None
+        entities_by_key[key] = entity
+
+    return entities_by_key
+
+def diff_entities(previous_entities: list[dict], entities: list[dict]) -> dict[str, any] | None:
+    """
+    Compare the entities by key.
+    :return: {"Added": [entity], "Removed": [key], "Changed": [entity], "Unchanged": count}. None if the entities cannot be keyed.
+    """
+    previous_by_key = index_entities(previous_entities)
+    current_by_key = index_entities(entities)
+    if previous_by_key is None or current_by_key is None:
+        return None
+
+    added = []
+    changed = []
+    unchanged = 0
+    for key, entity in current_by_key.items():
+        previous = previous_by_key.get(key)
+        if previous is None:
+            added.append(entity)
+        elif previous != entity:
+            changed.append(entity)
+        else:
+            unchanged += 1
+
+    removed = [key for key in previous_by_key.keys() if key not in current_by_key]
+
+    return {"Added": added, "Removed": removed, "Changed": changed, "Unchanged": unchanged}
+
+def load_previous_entities(request: dict) -> list[dict] | None:
+    """
+    Previous input of request. "previousEntities", or a JSON file given by "previousInputPath" of header.
+    """
+    if request.get("previousEntities") is not None:
+        return request["previousEntities"]
+
+    input_path = (request.get("header") or {}).get("previousInputPath")
+    if input_path is None:
+        return None
+
+    with open(input_path, encoding="utf-8") as input_file:
+        previous = json.load(input_file)
+
+    return previous.get("entities", []) if isinstance(previous, dict) else previous
+
+def find_elements(writer: IfcWriter, keys: list[str]) -> dict[str, any] | None:
+    """
+    Find the elements tagged with the keys.
+    :return: Elements by key. None if an element is not found.
+    """
+    wanted = set(keys)
+    elements = {}
+    if wanted:
+        for element in writer.model.by_type("IfcElement"):
+            if element.Tag in wanted:
+                elements[element.Tag] = element
+
+    return elements if len(elements) == len(wanted) else None
+
+def update_ifc(
+    previous_entities: list[dict] | None,
+    entities: list[dict],
+    previous_file: str | None,
+    create_job: Callable[[int, IfcWriter | None], any],
+    guid_namespace: str | None = None
+) -> str:
+    """
+    Update the previous IFC file from the difference of inputs.
+    Removed and changed elements are removed from the previous model with their relationship memberships,
+    and added and changed elements are written into it. Unchanged elements are not touched.
+    The file is built from scratch instead, if
+    - the previous input is not given, or an entity has no key or keys are duplicated,
+    - a storey is removed or changed,
+    - the previous file, or an element of removed or changed key in it, does not exist.
+    :param previous_entities: Input of the previous file.
+    :param entities: New input.
+    :param previous_file: Path to the previous IFC file.
+    :param create_job: Function creating `ConversionJob` with (total, writer).
+    :param guid_namespace: Namespace of deterministic GlobalIds. See `IfcGuidUtil`.
+    :return: The path to the saved IFC file.
+    """
+    diff = diff_entities(previous_entities, entities) if previous_entities is not None else None
+    reason = None
+    if previous_entities is None:
+        reason = "The previous input is not given."
+    elif diff is None:
+        reason = "Entities have no key or duplicated keys."
+    elif previous_file is None or not os.path.exists(previous_file):
+        reason = "The previous IFC file does not exist."
+    elif any(entity.get('ifcClass') == 'IfcBuildingStorey' for entity in diff["Changed"]) or \
+            any(key.startswith("IfcBuildingStorey:") for key in diff["Removed"]):
+        reason = "A storey is removed or changed."
+
+    writer = None
+    elements = None
+    if reason is None:
+        writer = IfcWriter.open(previous_file, guid_namespace=guid_namespace)
+        elements = find_elements(writer, diff["Removed"] + [entity_key(entity) for entity in diff["Changed"]])
+        if elements is None:
+            reason = "An element of removed or changed key is not in the previous IFC file."
+
+    if reason is not None:
+        job = create_job(len(entities), None)
+        try:
+            job.write_entities(entities)
+            return job.finish({"incremental": {"mode": "full", "reason": reason}})
+        except Exception:
+            job.discard()
+            raise
+
+    removed_entity_count = writer.remove_elements(list(elements.values()))
+
+    written = diff["Added"] + diff["Changed"]
+
+    job = create_job(len(written), writer)
+    try:
+        job.write_entities(written)
+        return job.finish({
+            "incremental": {
+                "mode": "patch",
+                "added": len(diff["Added"]),
+                "removed": len(diff["Removed"]),
+                "changed": len(diff["Changed"]),
+                "unchanged": diff["Unchanged"],
+                "removedEntities": removed_entity_count,
+            }
+        })
+    except Exception:
+        job.discard()
+        raise
\ No newline at end of file
@@ -0,0 +1,255 @@
+from writer.ifcWriter import default_precision
+from .columnarInput import columnar_fields
+
+# Classes with a segment from "startPt" to "endPt", whose direction is normalized while building
+segment_classes = ("IfcBeam", "IfcWallStandardCase")
+
+# Segments of this length or shorter are rejected by `IfcSharedElementDataUtil` as zero length
+min_segment_length = default_precision
+
+# Count of errors listed in the report. All of them are counted.
+max_reported_errors = 1000
+
+class InputValidationError(ValueError):
+    """
+    The input of job has invalid entities. Raised before any entity is built.
+    """
+    def __init__(self, errors: list[dict[str, any]]):
+        """
+        :param errors: Errors of `validate_entities` or `validate_columns`.
+        """
+        self.errors = errors
+        first = errors[0]
+        super().__init__(
+            f"Validation Error: {len(errors)} errors in the input. "
+            f"First at index {first['index']} ({first['ifcClass']}): {first['message']}"
+        )
+
+    @property
+    def details(self) -> dict[str, any]:
+        """
+        Details of "jobFailed" response.
+        """
+        return {
+            "validation": {
+                "errorCount": len(self.errors),
+                "errors": self.errors[:max_reported_errors],
+            }
+        }
+
+def validate_entities(entities: list[dict], known_storeys=(), first_index: int = 0, known_keys=None) -> list[dict[str, any]]:
+    """
+    Check all entities before building, by class in one vectorized pass each.
+    - The class is supported, and the fields of `columnar_fields` are given.
+    - Numbers (and both coordinates of points) are finite numbers.
+    - Segments of beams and walls have a length.
+    - Target storeys exist in the input or `known_storeys`, and storey names are not duplicated.
+    - If `known_keys` is given, user keys of elements are not duplicated.
+    :param entities: List of entities. Each entity has 'ifcClass' and the values by its class.
+    :param known_storeys: Names of storeys created already, e.g. by the previous chunks of job.
+    :param first_index: Index of the first entity in the job, used for the indices of errors.
+    :param known_keys: Keys of elements created already. Given in deterministic mode, where the GlobalId of element
+                       is derived from its key (see `IfcGuidUtil.from_key`), so a duplicated key duplicates the GlobalId.
+    :return: Errors as {"index", "ifcClass", "message"}, in the order of index. Empty if all entities are valid.
+    """
+    import numpy as np
+
+    errors = []
+    indices_by_class: dict[str, list[int]] = {}
+    for index, entity in enumerate(entities):
+        indices_by_class.setdefault(entity.get('ifcClass'), []).append(index)
+
+    columns = {}
+    for ifc_class, indices in indices_by_class.items():
+        field_types = columnar_fields.get(ifc_class)
+        if field_types is None:
+            errors.extend(_error(first_index + index, ifc_class, "Not supported IfcClass.") for index in indices)
+            continue
+
+        class_entities = [entities[index] for index in indices]
+        class_indices = np.asarray(indices) + first_index
+        class_columns = {}
+        for field, field_type in field_types.items():
+            raw = [entity.get(field) for entity in class_entities]
+            missing = np.fromiter((value is None for value in raw), dtype=bool, count=len(raw))
+            for index in class_indices[missing].tolist():
+                errors.append(_error(index, ifc_class, f"Required Field Error: '{field}' is missing."))
+
+            if field_type == "str":
+                class_columns[field] = [None if value is None else str(value) for value in raw]
+                continue
+
+            values, invalid = _to_float_array(raw, field_type)
+            for index in class_indices[invalid & ~missing].tolist():
+                errors.append(_error(index, ifc_class, f"Type Error: '{field}' is not a number."))
+
+            # NumPy converts None to NaN, which is reported as missing already
+            invalid |= missing
+
+            # Invalid values are NaN, so they are reported once above, not as non-finite
+            finite = np.isfinite(values) if values.ndim == 1 else np.isfinite(values).all(axis=1)
+            for index in class_indices[~finite & ~invalid].tolist():
+                errors.append(_error(index, ifc_class, f"Value Error: '{field}' is not finite."))
+
+            class_columns[field] = values
+
+        columns[ifc_class] = (class_indices, class_columns)
+
+    errors.extend(_check_columns(columns, known_storeys, check_finite=False))
+    if known_keys is not None:
+        errors.extend(_check_keys(entities, known_keys, first_index))
+    errors.sort(key=lambda error: error["index"])
+    return errors
+
+def validate_columns(columns: dict[str, dict[str, any]], known_storeys=(), first_index: int = 0) -> list[dict[str, any]]:
+    """
+    Check columnar input before building, like `validate_entities`.
+    The fields are given and numeric already by `columnarInput.coerce_columns`.
+    Entities are indexed as `ConversionJob.write_columns` writes them, storeys first and then the elements by class.
+    """
+    import numpy as np
+
+    from .conversionJob import batch_classes
+
+    indexed_columns = {}
+    next_index = first_index
+    for ifc_class in ('IfcBuildingStorey',) + batch_classes:
+        class_columns = columns.get(ifc_class)
+        if not class_columns:
+            continue
+
+        count = len(next(iter(class_columns.values())))
+        indexed_columns[ifc_class] = (np.arange(next_index, next_index + count), class_columns)
+        next_index += count
+
+    errors = _check_columns(indexed_columns, known_storeys)
+    errors.sort(key=lambda error: error["index"])
+    return errors
+
+def invalid_rows(ifc_class: str, entities: list[dict], known_storeys) -> any:
+    """
+    Mask of the entities of one class which the batch methods of `IfcSharedElementDataUtil` can not build:
+    A field is missing or not a number, a number is not finite, or the target storey does not exist.
+    Degenerate segments are not in the mask, since the batch methods skip them without creating anything.
+    :param entities: Entities of the class.
+    :param known_storeys: Names of storeys in the model.
+    """
+    import numpy as np
+
+    count = len(entities)
+    invalid = np.zeros(count, dtype=bool)
+    for field, field_type in columnar_fields[ifc_class].items():
+        raw = [entity.get(field) for entity in entities]
+        if field_type == "str":
+            invalid |= np.fromiter((value is None for value in raw), dtype=bool, count=count)
+            continue
+
+        values, field_invalid = _to_float_array(raw, field_type)
+        finite = np.isfinite(values) if values.ndim == 1 else np.isfinite(values).all(axis=1)
+        invalid |= field_invalid | ~finite
+
+    if 'targetStorey' in columnar_fields[ifc_class]:
+        invalid |= np.fromiter((entity.get('targetStorey') not in known_storeys for entity in entities), dtype=bool, count=count)
+
+    return invalid
+
+def _check_columns(columns: dict[str, tuple[any, dict[str, any]]], known_storeys, check_finite: bool = True) -> list[dict[str, any]]:
+    """
+    :param columns: (indices of entities, values by field) by ifcClass. Numbers are arrays.
+    :param check_finite: Check the numbers are finite. Segments with non-finite points are not reported as degenerate.
+    """
+    import numpy as np
+
+    errors = []
+    storey_names = set(known_storeys)
+
+    storeys = columns.get('IfcBuildingStorey')
+    if storeys is not None:
+        indices, fields = storeys
+        for index, name in zip(indices.tolist(), fields['name']):
+            if name is None:
+                continue
+            if name in storey_names:
+                errors.append(_error(index, 'IfcBuildingStorey', f"Duplication Error : Storey '{name}' already exists."))
+            storey_names.add(name)
+
+    for ifc_class, (indices, fields) in columns.items():
+        for field, field_type in columnar_fields[ifc_class].items():
+            if field_type == "str" or not check_finite:
+                continue
+
+            values = np.asarray(fields[field], dtype=float)
+            finite = np.isfinite(values) if values.ndim == 1 else np.isfinite(values).all(axis=1)
+            for index in indices[~finite].tolist():
+                errors.append(_error(index, ifc_class, f"Value Error: '{field}' is not finite."))
+
+        if ifc_class in segment_classes:
+            start = np.asarray(fields['startPt'], dtype=float).reshape(-1, 2)
+            end = np.asarray(fields['endPt'], dtype=float).reshape(-1, 2)
+            with np.errstate(invalid="ignore"):
+                degenerate = np.hypot(end[:, 0] - start[:, 0], end[:, 1] - start[:, 1]) <= min_segment_length
+            for index in indices[degenerate].tolist():
+                errors.append(_error(index, ifc_class, "Zero Length Error: The start and end points are the same."))
+
+        target_storeys = fields.get('targetStorey')
+        if target_storeys is not None and ifc_class != 'IfcBuildingStorey':
+            missing = np.fromiter(
+                (name is not None and name not in storey_names for name in target_storeys),
+                dtype=bool,
+                count=len(target_storeys)
+            )
+            for index, name in zip(indices[missing].tolist(), np.asarray(target_storeys, dtype=object)[missing].tolist()):
+                errors.append(_error(index, ifc_class, f"Not Exist Error: Storey '{name}' does not exist."))
+
+    return errors
+
+def _check_keys(entities: list[dict], known_keys, first_index: int) -> list[dict[str, any]]:
+    errors = []
+    keys = set(known_keys)
+    for index, entity in enumerate(entities):
+        key = entity.get('key')
+        if key is None or entity.get('ifcClass') == 'IfcBuildingStorey':
+            continue
+
+        key = str(key)
+        if key in keys:
+            errors.append(_error(first_index + index, entity.get('ifcClass'), f"Duplication Error : Key '{key}' already exists."))
+        keys.add(key)
+
+    return errors
+
+def _to_float_array(raw: list, field_type: str) -> tuple[any, any]:
+    """
+    Convert the values of a field at once. Only if it fails, the values are converted one by one to find the invalid ones.
+    Points are the first two coordinates of each value.
+    :return: (values, mask of invalid values). Invalid values are NaN.
+    """
+    import numpy as np
+
+    count = len(raw)
+    try:
+        if field_type == "point":
+            if all(isinstance(value, (list, tuple)) for value in raw):
+                return np.asarray([value[:2] for value in raw], dtype=float).reshape(count, 2), np.zeros(count, dtype=bool)
+        else:
+            return np.asarray(raw, dtype=float).reshape(count), np.zeros(count, dtype=bool)
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    values = np.full((count, 2) if field_type == "point" else count, np.nan)
+    invalid = np.zeros(count, dtype=bool)
+    for position, value in enumerate(raw):
+        try:
+            if field_type == "point":
+                if not isinstance(value, (list, tuple)):
+                    raise TypeError
+                values[position] = (float(value[0]), float(value[1]))
+            else:
+                values[position] = float(value)
+        except (TypeError, ValueError, OverflowError, IndexError):
+            invalid[position] = True
+
+    return values, invalid
+
+def _error(index: int, ifc_class: str | None, message: str) -> dict[str, any]:
+    return {"index": index, "ifcClass": ifc_class, "message": message}
\ No newline at end of file
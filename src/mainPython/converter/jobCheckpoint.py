@@ -0,0 +1,261 @@
+import base64
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+
+from writer import IfcWriter
+from writer.stepOutputFile import partial_path
+
+default_checkpoint_dir = os.path.join(tempfile.gettempdir(), "ifcconverter-checkpoints")
+default_interval_seconds = 60.
+
+class IndexBitmap:
+    """
+    Set of entity indices, as one bit per index.
+    """
+    def __init__(self, data: bytearray | None = None):
+        self.data = data if data is not None else bytearray()
+        self.count = sum(bin(byte).count("1") for byte in self.data)
+
+    def add(self, index: int) -> None:
+        position = index >> 3
+        if position >= len(self.data):
+            self.data.extend(bytes(position + 1 - len(self.data)))
+
+        bit = 1 << (index & 7)
+        if not self.data[position] & bit:
+            self.data[position] |= bit
+            self.count += 1
+
+    def __contains__(self, index: int) -> bool:
+        position = index >> 3
+        return position < len(self.data) and bool(self.data[position] & (1 << (index & 7)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_text(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self.data))).decode("ascii")
+
+    @classmethod
+    def from_text(cls, text: str) -> "IndexBitmap":
+        return cls(bytearray(zlib.decompress(base64.b64decode(text))))
+
+class JobCheckpoint:
+    """
+    Checkpoint of a long job, so it continues from there if the job is requested again after a crash or restart.
+    A checkpoint belongs to the job id and the hash of request (see `outputCache.request_hash`),
+    so a different input or option does not resume it.
+    - Serial jobs: The partially built model and the indices of processed entities are saved every `interval_seconds`.
+      A resumed job opens the model (see `IfcWriter.open`) and skips the processed entities.
+    - Parallel jobs: The result of each storey shard is saved when it arrives. A resumed job builds only the missing shards.
+    The files are deleted when the job is finished.
+    """
+    def __init__(self, job_id: str, request_hash: str, checkpoint_dir: str = default_checkpoint_dir, interval_seconds: float = default_interval_seconds):
+        """
+        :param job_id: Id of job.
+        :param request_hash: Hash of normalized request.
+        :param checkpoint_dir: Directory of checkpoint files.
+        :param interval_seconds: Seconds between saves of serial jobs.
+        """
+        self.job_id = job_id
+        self.request_hash = request_hash
+        self.checkpoint_dir = checkpoint_dir
+        self.interval_seconds = interval_seconds
+
+        self.job_prefix = re.sub(r"[^0-9A-Za-z_-]", "_", job_id) + "."
+        self.base_path = os.path.join(checkpoint_dir, f"{self.job_prefix}{request_hash[:16]}")
+        self.done = IndexBitmap()
+        self.progress: dict[str, any] | None = None
+        self.model_file: str | None = None
+        self.resumed_entities = 0
+        self.resumed_shards = 0
+        self.save_count = 0
+        self.last_saved_at = time.monotonic()
+
+        self._load()
+        self._remove_stale()
+
+    @classmethod
+    def from_header(cls, header: dict, input_data, key: str | None = None) -> "JobCheckpoint | None":
+        """
+        Checkpoint of the request header options. None if "checkpoint" of header is not true.
+        - "checkpoint": true, or {"dir", "intervalSeconds"}. See `__init__`.
+        :param input_data: Entities of job.
+        :param key: Hash of request, if computed already (e.g. the key of `OutputCache`).
+        """
+        options = header.get("checkpoint")
+        if not options:
+            return None
+
+        from .outputCache import request_hash
+
+        options = options if isinstance(options, dict) else {}
+        return cls(
+            job_id=header.get("jobId", "default"),
+            request_hash=key if key is not None else request_hash(input_data, header),
+            checkpoint_dir=options.get("dir") or default_checkpoint_dir,
+            interval_seconds=float(options.get("intervalSeconds", default_interval_seconds))
+        )
+
+    @property
+    def meta_path(self) -> str:
+        return f"{self.base_path}.json"
+
+    def shard_path(self, storey_name: str) -> str:
+        return f"{self.base_path}.shard-{zlib.crc32(storey_name.encode('utf-8')):08x}.json"
+
+    def open_writer(self, guid_namespace: str | None = None) -> IfcWriter | None:
+        """
+        Writer of the saved model. None if no model is saved.
+        """
+        if self.model_file is None:
+            return None
+
+        model_path = os.path.join(self.checkpoint_dir, self.model_file)
+        if not os.path.exists(model_path):
+            return None
+
+        return IfcWriter.open(model_path, guid_namespace=guid_namespace)
+
+    def restore_progress(self, reporter) -> None:
+        """
+        Count the processed entities of the saved model in the reporter.
+        """
+        if self.progress is None:
+            return
+
+        reporter.processed += self.progress["processed"]
+        reporter.succeeded += self.progress["succeeded"]
+        reporter.failed += self.progress["failed"]
+        for entity_type, counts in self.progress["byClass"].items():
+            class_counts = reporter.by_class.setdefault(entity_type, {"succeeded": 0, "failed": 0})
+            class_counts["succeeded"] += counts["succeeded"]
+            class_counts["failed"] += counts["failed"]
+
+        self.resumed_entities = self.progress["processed"]
+
+    def mark_done(self, indices) -> None:
+        for index in indices:
+            self.done.add(index)
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self.last_saved_at >= self.interval_seconds
+
+    def save(self, writer: IfcWriter, reporter) -> None:
+        """
+        Save the model and the processed entities. The reserved relationships are emitted into the model first.
+        Each save writes a new model file, and the previous one is deleted after the record refers to the new one.
+        So the record and its model always match, even if the process ends while saving.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        writer.ifcRelationshipAccumulator.flush()
+
+        model_file = f"{os.path.basename(self.base_path)}.model-{time.time_ns()}.ifc"
+        model_path = os.path.join(self.checkpoint_dir, model_file)
+        partial_file = partial_path(model_path)
+        writer.model.write(partial_file)
+        os.replace(partial_file, model_path)
+
+        self._write_json(self.meta_path, {
+            "jobId": self.job_id,
+            "requestHash": self.request_hash,
+            "model": model_file,
+            "done": self.done.to_text(),
+            "progress": {
+                "processed": reporter.processed,
+                "succeeded": reporter.succeeded,
+                "failed": reporter.failed,
+                "byClass": reporter.by_class,
+            },
+        })
+
+        if self.model_file is not None and self.model_file != model_file:
+            previous_path = os.path.join(self.checkpoint_dir, self.model_file)
+            if os.path.exists(previous_path):
+                os.remove(previous_path)
+
+        self.model_file = model_file
+        self.save_count += 1
+        self.last_saved_at = time.monotonic()
+
+    def load_shard(self, storey_name: str) -> dict[str, any] | None:
+        """
+        Saved result of the storey shard (see `parallelBuild.build_shard`). None if it is not saved.
+        """
+        path = self.shard_path(storey_name)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, encoding="utf-8") as shard_file:
+            result = json.load(shard_file)
+
+        if result.get("StoreyName") != storey_name:
+            return None
+
+        self.resumed_shards += 1
+        return result
+
+    def save_shard(self, storey_name: str, result: dict[str, any]) -> None:
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self._write_json(self.shard_path(storey_name), {"StoreyName": storey_name, **result})
+        self.save_count += 1
+
+    def clear(self) -> None:
+        """
+        Delete the files of checkpoint.
+        """
+        if not os.path.isdir(self.checkpoint_dir):
+            return
+
+        prefix = os.path.basename(self.base_path) + "."
+        for file_name in os.listdir(self.checkpoint_dir):
+            if file_name.startswith(prefix):
+                os.remove(os.path.join(self.checkpoint_dir, file_name))
+
+    def get_stats(self) -> dict[str, any]:
+        return {
+            "resumedEntities": self.resumed_entities,
+            "resumedShards": self.resumed_shards,
+            "saves": self.save_count,
+        }
+
+    def _load(self) -> None:
+        if not os.path.exists(self.meta_path):
+            return
+
+        try:
+            with open(self.meta_path, encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return
+
+        if meta.get("jobId") != self.job_id or meta.get("requestHash") != self.request_hash:
+            return
+
+        self.done = IndexBitmap.from_text(meta["done"])
+        self.progress = meta["progress"]
+        self.model_file = meta.get("model")
+
+    def _remove_stale(self) -> None:
+        """
+        Delete the checkpoints of the job for other requests, which are not resumed anymore.
+        """
+        if not os.path.isdir(self.checkpoint_dir):
+            return
+
+        own_prefix = os.path.basename(self.base_path) + "."
+        for file_name in os.listdir(self.checkpoint_dir):
+            if file_name.startswith(self.job_prefix) and not file_name.startswith(own_prefix):
+                os.remove(os.path.join(self.checkpoint_dir, file_name))
+
+    @staticmethod
+    def _write_json(path: str, data: dict[str, any]) -> None:
+        # Written to a partial file first, so a crash while saving keeps the previous checkpoint
+        partial_file = partial_path(path)
+        with open(partial_file, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, separators=(",", ":"))
+        os.replace(partial_file, path)
\ No newline at end of file
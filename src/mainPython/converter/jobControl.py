@@ -0,0 +1,72 @@
+import threading
+import time
+
+from .processMemory import current_rss_bytes
+
+# Seconds between measurements of resident set size. The deadline and cancellation are checked on every call.
+rss_check_interval_seconds = 0.1
+
+class JobCancelled(Exception):
+    """
+    The job is stopped by its `JobControl`. Nothing of the job is saved.
+    """
+    def __init__(self, reason: str, message: str, progress: dict[str, any] | None = None):
+        """
+        :param reason: "cancelled", "deadline" or "memory".
+        :param message: Message of "jobFailed" response.
+        :param progress: Summary of `ProgressReporter` until the job is stopped.
+        """
+        super().__init__(message)
+        self.reason = reason
+        self.progress = progress
+
+    @property
+    def details(self) -> dict[str, any]:
+        """
+        Details of "jobFailed" response.
+        """
+        return {"cancelled": {"reason": self.reason, "progress": self.progress}}
+
+class JobControl:
+    """
+    Conditions to stop a running job: cancellation from another thread, a deadline, and a cap of resident set size.
+    The job checks them cooperatively by `stop_reason` between its entities and batches.
+    """
+    def __init__(self, deadline_seconds: float | None = None, max_rss_bytes: int | None = None):
+        """
+        :param deadline_seconds: Seconds from now which the job can run for.
+        :param max_rss_bytes: Maximum resident set size of this process while the job runs.
+        """
+        self.deadline_seconds = deadline_seconds
+        self.deadline = None if deadline_seconds is None else time.monotonic() + deadline_seconds
+        self.max_rss_bytes = max_rss_bytes
+        self.cancelled = threading.Event()
+        self.next_rss_check = 0.
+
+    def cancel(self) -> None:
+        """
+        Request the job to stop. Safe to call from any thread.
+        """
+        self.cancelled.set()
+
+    def stop_reason(self) -> tuple[str, str] | None:
+        """
+        :return: (reason, message) if the job must stop, otherwise None.
+        """
+        if self.cancelled.is_set():
+            return "cancelled", "Cancelled."
+
+        if self.deadline is None and self.max_rss_bytes is None:
+            return None
+
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            return "deadline", f"Deadline Exceeded: The job ran over {self.deadline_seconds} seconds."
+
+        if self.max_rss_bytes is not None and now >= self.next_rss_check:
+            self.next_rss_check = now + rss_check_interval_seconds
+            rss = current_rss_bytes()
+            if rss is not None and rss > self.max_rss_bytes:
+                return "memory", f"Memory Limit Exceeded: Resident set size {rss} bytes is over {self.max_rss_bytes} bytes."
+
+        return None
\ No newline at end of file
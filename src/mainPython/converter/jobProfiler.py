@@ -0,0 +1,250 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Literal
+
+class JobProfiler:
+    """
+    Instrumentation of a conversion job, enabled by the "profile" option of request header.
+    - Time and count of input entities by ifcClass
+    - Count of created IFC entities by IfcClass, for each ifcClass of input
+    - Time in `IfcResourceEntityUtil` methods, `model.create_entity`, GUID generation and the phases (e.g. save)
+    - Peak of traced memory (tracemalloc)
+    The job can also be profiled by cProfile, or traced as Chrome trace events, into a file next to the output file.
+    The hooks are set on the writer's instances, and removed by `stop`.
+    """
+    # Chrome trace events are recorded up to this count, so tracing large jobs does not grow without limit.
+    max_trace_events = 200000
+
+    def __init__(
+        self,
+        ifc_writer,
+        output_file: str,
+        trace: Literal["cprofile", "chrome"] | None = None,
+        memory: bool = True
+    ):
+        """
+        :param ifc_writer: Writer of the job.
+        :param output_file: Output IFC file. Trace file is written as "<output_file>.prof" or "<output_file>.trace.json".
+        :param trace: Kind of trace file. None writes no file.
+        :param memory: Trace memory allocations by tracemalloc. It slows the job down considerably.
+        """
+        self.writer = ifc_writer
+        self.output_file = output_file
+        self.trace = trace
+        self.memory = memory
+
+        self.by_class: dict[str, dict[str, float]] = {}
+        self.created_by_class: dict[str, dict[str, int]] = {}
+        self.current_class = "(job)"
+        self.phases: dict[str, float] = {}
+
+        self.resource_methods: dict[str, list] = {}
+        self.resource_depth = 0
+        self.resource_seconds = 0.
+        self.create_entity_calls = 0
+        self.create_entity_seconds = 0.
+        self.guid_calls = 0
+        self.guid_seconds = 0.
+
+        self.trace_events: list[dict] = []
+        self.trace_file: str | None = None
+        self.c_profile: cProfile.Profile | None = None
+        self.memory_peak: int | None = None
+        self.started_at = 0.
+        self.running = False
+        self.wrapped_methods: list[str] = []
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._wrap_resource_util()
+        self._wrap_create_entity()
+        self._wrap_guid()
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        if self.trace == "cprofile":
+            self.c_profile = cProfile.Profile()
+            self.c_profile.enable()
+
+        self.running = True
+
+    def stop(self) -> None:
+        """
+        Remove the hooks, and write the trace file.
+        """
+        if not self.running:
+            return
+
+        self.running = False
+        if self.c_profile is not None:
+            self.c_profile.disable()
+
+        if self.memory and tracemalloc.is_tracing():
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        util = self.writer.ifcResourceEntityUtil
+        for name in self.wrapped_methods:
+            delattr(util, name)
+        self.wrapped_methods = []
+
+        if "create_entity" in vars(self.writer.model):
+            del self.writer.model.create_entity
+
+        if "new" in vars(self.writer.ifcGuidUtil):
+            del self.writer.ifcGuidUtil.new
+
+        self._write_trace_file()
+
+    @contextmanager
+    def element(self, ifc_class: str, count: int = 1):
+        """
+        Measure writing `count` input entities of the class.
+        """
+        previous_class = self.current_class
+        self.current_class = ifc_class
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.current_class = previous_class
+
+            record = self.by_class.get(ifc_class)
+            if record is None:
+                record = {"count": 0, "seconds": 0.}
+                self.by_class[ifc_class] = record
+            record["count"] += count
+            record["seconds"] += elapsed
+
+            self._add_trace_event(ifc_class, "entity", started, elapsed, {"count": count})
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measure a phase of the job, e.g. "save".
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases[name] = self.phases.get(name, 0.) + elapsed
+            self._add_trace_event(name, "phase", started, elapsed)
+
+    def report(self) -> dict[str, any]:
+        slowest_methods = sorted(self.resource_methods.items(), key=lambda item: item[1][1], reverse=True)[:20]
+        return {
+            "byClass": {
+                ifc_class: {"count": record["count"], "seconds": round(record["seconds"], 6)}
+                for ifc_class, record in self.by_class.items()
+            },
+            "createdByClass": self.created_by_class,
+            "resourceUtilSeconds": round(self.resource_seconds, 6),
+            "resourceUtilMethods": {
+                name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in slowest_methods
+            },
+            "createEntityCalls": self.create_entity_calls,
+            "createEntitySeconds": round(self.create_entity_seconds, 6),
+            "guidCalls": self.guid_calls,
+            "guidSeconds": round(self.guid_seconds, 6),
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "elapsedSeconds": round(time.perf_counter() - self.started_at, 6),
+            "tracemallocPeakBytes": self.memory_peak,
+            "traceFile": self.trace_file,
+        }
+
+    def _wrap_resource_util(self) -> None:
+        util = self.writer.ifcResourceEntityUtil
+        for name in dir(type(util)):
+            if not (name.startswith("create_") or name.startswith("assign_") or name == "intern_entity"):
+                continue
+
+            setattr(util, name, self._timed_resource_method(name, getattr(util, name)))
+            self.wrapped_methods.append(name)
+
+    def _timed_resource_method(self, name: str, method):
+        record = self.resource_methods.setdefault(name, [0, 0.])
+
+        def timed(*args, **kwargs):
+            self.resource_depth += 1
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.resource_depth -= 1
+                record[0] += 1
+                record[1] += elapsed
+                # Nested calls are counted once in the total
+                if self.resource_depth == 0:
+                    self.resource_seconds += elapsed
+
+        return timed
+
+    def _wrap_create_entity(self) -> None:
+        model = self.writer.model
+        create_entity = model.create_entity
+
+        def timed_create_entity(*args, **kwargs):
+            ifc_type = args[0] if args else kwargs.get("type")
+            started = time.perf_counter()
+            try:
+                return create_entity(*args, **kwargs)
+            finally:
+                self.create_entity_seconds += time.perf_counter() - started
+                self.create_entity_calls += 1
+
+                created = self.created_by_class.get(self.current_class)
+                if created is None:
+                    created = {}
+                    self.created_by_class[self.current_class] = created
+                created[ifc_type] = created.get(ifc_type, 0) + 1
+
+        model.create_entity = timed_create_entity
+
+    def _wrap_guid(self) -> None:
+        guid_util = self.writer.ifcGuidUtil
+        guid_new = guid_util.new
+
+        def timed_guid_new(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return guid_new(*args, **kwargs)
+            finally:
+                self.guid_seconds += time.perf_counter() - started
+                self.guid_calls += 1
+
+        guid_util.new = timed_guid_new
+
+    def _add_trace_event(self, name: str, category: str, started: float, elapsed: float, args: dict | None = None) -> None:
+        if self.trace != "chrome" or len(self.trace_events) >= self.max_trace_events:
+            return
+
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self.started_at) * 1e6, 1),
+            "dur": round(elapsed * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": 0,
+        }
+        if args is not None:
+            event["args"] = args
+        self.trace_events.append(event)
+
+    def _write_trace_file(self) -> None:
+        if self.trace == "cprofile" and self.c_profile is not None:
+            self.trace_file = f"{self.output_file}.prof"
+            self.c_profile.dump_stats(self.trace_file)
+        elif self.trace == "chrome":
+            self.trace_file = f"{self.output_file}.trace.json"
+            with open(self.trace_file, "w", encoding="utf-8") as trace_file:
+                json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, trace_file)
+            self.trace_events = []
\ No newline at end of file
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+# Options of request header which change the output file
+output_options = ("schema", "guidNamespace", "parallelWorkers", "streamBatchSize", "compression", "compressionLevel")
+
+# Packages whose sources make the writer code version
+versioned_packages = ("writer", "converter")
+
+default_cache_dir = os.path.join(tempfile.gettempdir(), "ifcconverter-cache")
+default_max_bytes = 2 * 1024 ** 3
+
+_code_version: str | None = None
+
+def code_version() -> str:
+    """
+    Hash of the writer and converter sources and the IfcOpenShell version. Computed once per process.
+    """
+    global _code_version
+    if _code_version is not None:
+        return _code_version
+
+    import ifcopenshell
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256(str(getattr(ifcopenshell, "version", "")).encode("utf-8"))
+    for package in versioned_packages:
+        for dir_path, dir_names, file_names in os.walk(os.path.join(root, package)):
+            dir_names[:] = sorted(name for name in dir_names if name != "__pycache__")
+            for file_name in sorted(file_names):
+                if not file_name.endswith(".py"):
+                    continue
+
+                path = os.path.join(dir_path, file_name)
+                digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode("utf-8"))
+                with open(path, "rb") as source_file:
+                    digest.update(source_file.read())
+
+    _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+def request_hash(input_data: list[dict] | dict[str, dict[str, any]], header: dict) -> str:
+    """
+    Hash of the normalized request. It covers the input, the options of header which change the output, and `code_version`.
+    :param input_data: Entities, or columns by ifcClass (see `columnarInput`).
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {
+            "version": code_version(),
+            "options": {name: header.get(name) for name in output_options},
+            # Compression is also chosen by the extension of output file
+            "extension": os.path.splitext(header.get("ifcFilePath") or "")[1].lower(),
+        },
+        sort_keys=True
+    ).encode("utf-8"))
+
+    if isinstance(input_data, dict):
+        for ifc_class in sorted(input_data.keys()):
+            for field in sorted(input_data[ifc_class].keys()):
+                values = input_data[ifc_class][field]
+                digest.update(f"{ifc_class}.{field}".encode("utf-8"))
+                if hasattr(values, "tobytes"):
+                    digest.update(f"{values.dtype.str}{values.shape}".encode("utf-8"))
+                    digest.update(values.tobytes())
+                else:
+                    digest.update(json.dumps(values, separators=(",", ":")).encode("utf-8"))
+    else:
+        digest.update(json.dumps(input_data, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+    return digest.hexdigest()
+
+class OutputCache:
+    """
+    Local cache of finished IFC files, addressed by the hash of normalized request.
+    The hash covers the input (entities or columns), the options of header which change the output, and `code_version`.
+    Entries are evicted in least recently used order when the cache is larger than `max_bytes`.
+    A hit gives the same file as the cached one, including its GlobalIds.
+    """
+    def __init__(self, cache_dir: str = default_cache_dir, max_bytes: int = default_max_bytes, hardlink: bool = False):
+        """
+        :param cache_dir: Directory of cached files.
+        :param max_bytes: Maximum total size of cached files.
+        :param hardlink: Hardlink the cached file to the output on a hit, instead of copying.
+                         The output file then must not be modified in place.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hardlink = hardlink
+
+    @classmethod
+    def from_header(cls, header: dict) -> "OutputCache | None":
+        """
+        Cache of the request header options. None if "cache" of header is not true.
+        - "cacheDir", "cacheMaxBytes", "cacheHardlink": See `__init__`.
+        """
+        if not header.get("cache"):
+            return None
+
+        return cls(
+            cache_dir=header.get("cacheDir") or default_cache_dir,
+            max_bytes=int(header.get("cacheMaxBytes", default_max_bytes)),
+            hardlink=bool(header.get("cacheHardlink", False))
+        )
+
+    def request_key(self, input_data: list[dict] | dict[str, dict[str, any]], header: dict) -> str:
+        """
+        :param input_data: Entities, or columns by ifcClass (see `columnarInput`).
+        """
+        return request_hash(input_data, header)
+
+    def fetch(self, key: str, output_file: str) -> dict[str, any] | None:
+        """
+        Put the cached file of key to the output file.
+        :return: Details of the "writingFile" response of cached job. None on a miss.
+        """
+        entry_path, meta_path = self._entry_paths(key)
+        if not os.path.exists(entry_path) or not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, encoding="utf-8") as meta_file:
+            details = json.load(meta_file)
+
+        if os.path.exists(output_file):
+            os.remove(output_file)
+
+        linked = False
+        if self.hardlink:
+            try:
+                os.link(entry_path, output_file)
+                linked = True
+            except OSError:
+                pass
+
+        if not linked:
+            shutil.copyfile(entry_path, output_file)
+
+        # Mark as recently used
+        os.utime(entry_path)
+
+        details["cache"] = {"hit": True, "key": key}
+        return details
+
+    def store(self, key: str, file_path: str, details: dict[str, any] | None = None) -> None:
+        """
+        Copy the finished file into the cache, and evict the old entries.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path, meta_path = self._entry_paths(key)
+
+        # Written to temporary files first, so a concurrent reader never sees a partial entry
+        temp_suffix = f".{os.getpid()}.tmp"
+        shutil.copyfile(file_path, entry_path + temp_suffix)
+        with open(meta_path + temp_suffix, "w", encoding="utf-8") as meta_file:
+            json.dump(details or {}, meta_file)
+
+        os.replace(meta_path + temp_suffix, meta_path)
+        os.replace(entry_path + temp_suffix, entry_path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".ifc"):
+                continue
+
+            stat = os.stat(os.path.join(self.cache_dir, file_name))
+            entries.append((stat.st_mtime, stat.st_size, file_name[:-len(".ifc")]))
+            total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, key in entries:
+            if total_bytes <= self.max_bytes:
+                break
+
+            for path in self._entry_paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            total_bytes -= size
+
+    def _entry_paths(self, key: str) -> tuple[str, str]:
+        return os.path.join(self.cache_dir, f"{key}.ifc"), os.path.join(self.cache_dir, f"{key}.json")
\ No newline at end of file
@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from writer import IfcWriter, IfcModelMerger
+
+# Process pool kept for the life of the sidecar, so the workers import IfcOpenShell once.
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+
+class ShardReporter:
+    """
+    Collects the results of a shard in a worker process. Nothing is printed, since stdout belongs to the parent.
+    """
+    def __init__(self):
+        self.succeeded_by_class: dict[str, int] = {}
+        self.failures: list[tuple[int, str, str]] = []
+
+    def entity_succeeded(self, entity_type: str) -> None:
+        self.succeeded_by_class[entity_type] = self.succeeded_by_class.get(entity_type, 0) + 1
+
+    def entity_failed(self, index: int, entity_type: str, message: str) -> None:
+        self.failures.append((index, entity_type, message))
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the process pool with the count of workers. The pool is created again only if the count changes.
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_executor()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+
+    return _executor
+
+def shutdown_executor() -> None:
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+
+    _executor = None
+    _executor_workers = 0
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+def partition_by_storey(entities: list[dict]) -> tuple[list[int], dict[str, list[int]], list[int]]:
+    """
+    Partition the indices of entities.
+    :return: (indices of storeys, indices of elements by target storey, indices of the others)
+    """
+    storey_indices = []
+    element_indices: dict[str, list[int]] = {}
+    other_indices = []
+    for index, entity in enumerate(entities):
+        if entity.get("ifcClass") == "IfcBuildingStorey":
+            storey_indices.append(index)
+            continue
+
+        target_storey = entity.get("targetStorey")
+        if target_storey is None:
+            other_indices.append(index)
+            continue
+
+        element_indices.setdefault(target_storey, []).append(index)
+
+    return storey_indices, element_indices, other_indices
+
+def build_shard(schema: str, skeleton_key: tuple, skeleton: dict, entities: list[dict], guid_namespace: str | None = None) -> dict[str, any]:
+    """
+    Build a shard in a worker process, from the skeleton of the parent writer.
+    :param entities: The storey of shard and its elements.
+    :param guid_namespace: Namespace of deterministic GlobalIds of the shard. Each shard has its own one.
+    :return: {"Text": serialized model, "Succeeded": count by class, "Failed": [(index in entities, class, message)]}
+    """
+    from .conversionJob import ConversionJob
+
+    IfcWriter.skeletons.setdefault(skeleton_key, skeleton)
+
+    reporter = ShardReporter()
+    # Validated by the parent job already
+    job = ConversionJob(output_file="", schema=schema, reporter=reporter, guid_namespace=guid_namespace, validate=False)
+    job.write_entities(entities)
+    job.writer.ifcRelationshipAccumulator.flush()
+
+    return {
+        "Text": job.writer.model.to_string(),
+        "Succeeded": reporter.succeeded_by_class,
+        "Failed": reporter.failures,
+    }
+
+def build_parallel(job, entities: list[dict], workers: int) -> None:
+    """
+    Build the entities of the job in storey shards on a process pool, and merge the shards into the job's writer.
+    Storeys are created by the job first, so each shard's storey is mapped to them while merging.
+    Shards are merged in the order of storeys, so the output does not depend on which shard finishes first.
+    If the job has a checkpoint, each shard result is saved when it arrives, and the saved shards are not built again.
+    :param job: ConversionJob to build into.
+    :param entities: All entities of the job.
+    :param workers: Count of worker processes.
+    """
+    storey_indices, element_indices, other_indices = partition_by_storey(entities)
+
+    for index in storey_indices:
+        job.write_entity(entities[index], index)
+
+    storeys_by_name = {entities[index].get("name"): index for index in storey_indices}
+    shards: list[list[int]] = []
+    for storey_name, indices in element_indices.items():
+        storey_index = storeys_by_name.get(storey_name)
+        shards.append(([storey_index] if storey_index is not None else []) + indices)
+
+    writer = job.writer
+    guid_namespaces = [
+        None if writer.guid_namespace is None else f"{writer.guid_namespace}/storey/{storey_name}"
+        for storey_name in element_indices.keys()
+    ]
+
+    storey_names = [str(storey_name) for storey_name in element_indices.keys()]
+    checkpoint = job.checkpoint
+    saved_results = [checkpoint.load_shard(storey_name) if checkpoint is not None else None for storey_name in storey_names]
+    built = [number for number, result in enumerate(saved_results) if result is None]
+
+    skeleton = IfcWriter.skeletons[writer.skeleton_key]
+    merger = IfcModelMerger(writer)
+    results = get_executor(workers).map(
+        build_shard,
+        [writer.schema] * len(built),
+        [writer.skeleton_key] * len(built),
+        [skeleton] * len(built),
+        [[entities[index] for index in shards[number]] for number in built],
+        [guid_namespaces[number] for number in built]
+    )
+
+    for storey_name, shard, result in zip(storey_names, shards, saved_results):
+        if result is None:
+            result = next(results)
+            if checkpoint is not None:
+                checkpoint.save_shard(storey_name, result)
+
+        # Shards running in the workers are not stopped, and their results are dropped
+        job.check_control()
+        merger.merge_string(result["Text"])
+
+        # The storey of shard is counted by the job already.
+        has_storey = entities[shard[0]].get("ifcClass") == "IfcBuildingStorey"
+        for entity_type, count in result["Succeeded"].items():
+            if has_storey and entity_type == "IfcBuildingStorey":
+                count -= 1
+            job.reporter.entities_succeeded(entity_type, count)
+
+        for shard_index, entity_type, message in result["Failed"]:
+            if has_storey and shard_index == 0:
+                continue
+            job.reporter.entity_failed(shard[shard_index], entity_type, message)
+
+    for index in other_indices:
+        job.write_entity(entities[index], index)
\ No newline at end of file
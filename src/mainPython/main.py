@@ -1,15 +1,37 @@
 import sys
 import os
+import gc
 import json
+import queue
+import threading
+from typing import TYPE_CHECKING
 
 current_file_path = os.path.abspath(__file__)
 
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_file_path)))
 sys.path.append(project_root)
 
-from writer import IfcWriter
 from printer import print_response
 
+if TYPE_CHECKING:
+    from converter import ConversionJob
+    from converter.jobControl import JobControl
+
+# Jobs receiving entities chunk by chunk, by job id
+streaming_jobs: dict[str, "ConversionJob"] = {}
+
+# Set when the writer (and IfcOpenShell) is imported by `warm_up`
+writer_ready = threading.Event()
+
+# Controls of running jobs by job id, and ids of jobs cancelled before their control is created.
+# Shared with the stdin reader thread, which cancels the jobs while the message loop is building.
+job_controls: dict[str, "JobControl"] = {}
+pending_cancels: set[str] = set()
+job_controls_lock = threading.Lock()
+
+# Longer lines are not parsed by the stdin reader thread, since a "cancel" message is short
+max_control_message_length = 4096
+
 def handle_message(message) -> dict:
     """
     Processes incoming messages and performs actions based on the request.
@@ -22,6 +44,21 @@ def handle_message(message) -> dict:
     Possible actions:
     - "greet": Returns a greeting message. Use for IPC test.
     - "create_ifc": Generates an IFC file based on the provided JSON data.
+      The data is "entities" (list of entities), "columns" (arrays of fields by ifcClass),
+      or a CSV / NPZ file of columns given by "inputPath" of header.
+      If "cache" of header is true, repeated requests are answered from the output cache (see `converter.outputCache`).
+      If "checkpoint" of header is true, a job of "entities" requested again after a crash resumes from its checkpoint
+      (see `converter.jobCheckpoint`).
+    - "update_ifc": Updates the IFC file of "previousIfcFilePath" of header from the difference between "previousEntities"
+      (or a JSON file given by "previousInputPath" of header) and "entities". Elements are matched by their "key".
+    - "begin_job", "entities", "end_job": Generates an IFC file from entities sent in several chunks.
+      Each chunk of "entities" is written as it arrives, and the file is saved by "end_job".
+    - "abort_job": Discards a job begun by "begin_job".
+    - "cancel": Stops the job of "jobId" of header. A running job is stopped by the stdin reader thread at its next check,
+      so it does not wait for this message to be handled. See `converter.jobControl`.
+    - "shutdown": Ends the message loop.
+    Jobs are identified by "jobId" of header, and each job ends with "jobComplete" or "jobFailed" response.
+    Inputs are validated before building, and "jobFailed" of invalid input has the report of all errors in "validation".
     - Unknown actions or invalid JSON format will return an error response.
     """
     try:
@@ -29,16 +66,128 @@ def handle_message(message) -> dict:
         action = request.get('header').get('action')
 
         if action == "pythonTest":
-            return {"status":"success","message":f"Hello, {request.get('name', 'Guest')}!"}
+            # Answered without waiting for the writer, which may still be loading in the background.
+            message = f"Hello, {request.get('name', 'Guest')}!"
+            print_response(action="system", result=True, message=message, details={"writerReady": writer_ready.is_set()})
+            return {"status":"success","message":message}
 
         elif action == "create_ifc":
+            header = request.get("header")
+            job_id = header.get("jobId", "default")
             entities = request.get("entities")
-            output_file = request.get("header").get("ifcFilePath")
+            output_file = header.get("ifcFilePath")
+
+            try:
+                from converter.columnarInput import load_columnar_input
+                from converter.outputCache import OutputCache
+
+                columns = load_columnar_input(request)
+
+                # Repeated requests are answered from the output cache
+                cache = OutputCache.from_header(header)
+                cache_key = cache.request_key(columns if columns is not None else entities, header) if cache is not None else None
+                cached_details = cache.fetch(cache_key, output_file) if cache is not None else None
+
+                if cached_details is not None:
+                    print_response(action="writingFile", result=True, details=cached_details)
+                    file_path = output_file
+                elif columns is not None:
+                    file_path = create_ifc_from_columns(columns, output_file, header, cache=cache, cache_key=cache_key)
+                else:
+                    file_path = create_ifc_from_json(entities, output_file, header, cache=cache, cache_key=cache_key)
+                complete_job(job_id, file_path)
+            except Exception as e:
+                fail_job(job_id, str(e), getattr(e, "details", None))
+
+        elif action == "update_ifc":
+            header = request.get("header")
+            job_id = header.get("jobId", "default")
+
+            try:
+                file_path = update_ifc_from_json(request, header)
+                complete_job(job_id, file_path)
+            except Exception as e:
+                fail_job(job_id, str(e), getattr(e, "details", None))
+
+        elif action == "begin_job":
+            header = request.get("header")
+            job_id = header.get("jobId", "default")
+            if job_id in streaming_jobs:
+                print_response(action="system", result=False, message=f"Job '{job_id}' already began.")
+                return {"status": "error", "message": f"Job '{job_id}' already began."}
+
+            try:
+                streaming_jobs[job_id] = create_job(header, header.get("ifcFilePath"), total=header.get("totalEntities"))
+            except Exception as e:
+                fail_job(job_id, str(e), getattr(e, "details", None))
+
+        elif action == "entities":
+            job_id = request.get("header").get("jobId", "default")
+            job = streaming_jobs.get(job_id)
+            if job is None:
+                print_response(action="system", result=False, message=f"Job '{job_id}' does not exist.")
+                return {"status": "error", "message": f"Job '{job_id}' does not exist."}
+
+            try:
+                from converter.columnarInput import load_columnar_input
+
+                columns = load_columnar_input(request)
+                if columns is not None:
+                    job.write_columns(columns)
+                else:
+                    job.write_entities(request.get("entities", []))
+            except Exception as e:
+                streaming_jobs.pop(job_id, None)
+                job.discard()
+                fail_job(job_id, str(e), getattr(e, "details", None))
+
+        elif action == "end_job":
+            job_id = request.get("header").get("jobId", "default")
+            job = streaming_jobs.pop(job_id, None)
+            if job is None:
+                print_response(action="system", result=False, message=f"Job '{job_id}' does not exist.")
+                return {"status": "error", "message": f"Job '{job_id}' does not exist."}
 
             try:
-                file_path = create_ifc_from_json(entities, output_file)
+                file_path = job.finish()
+                del job
+                complete_job(job_id, file_path)
             except Exception as e:
-                print_response(action="system", result=False, message=str(e))
+                job.discard()
+                del job
+                fail_job(job_id, str(e))
+
+        elif action == "abort_job":
+            job_id = request.get("header").get("jobId", "default")
+            job = streaming_jobs.pop(job_id, None)
+            if job is not None:
+                job.discard()
+                del job
+                fail_job(job_id, "Aborted.")
+
+        elif action == "cancel":
+            job_id = request.get("header").get("jobId", "default")
+            with job_controls_lock:
+                pending_cancels.discard(job_id)
+
+            # A job streaming its chunks is not running now, so it is stopped here
+            job = streaming_jobs.pop(job_id, None)
+            if job is not None:
+                from converter.jobControl import JobCancelled
+
+                error = JobCancelled("cancelled", "Cancelled.", job.reporter.summary())
+                job.discard()
+                del job
+                fail_job(job_id, str(error), error.details)
+
+        elif action == "shutdown":
+            # Open jobs are discarded, so their partially written files are not left behind
+            for job_id, job in list(streaming_jobs.items()):
+                del streaming_jobs[job_id]
+                job.discard()
+                del job
+                release_job_resources(job_id)
+            return {"status": "success", "action": "shutdown"}
 
         elif action == "create_ifc_test":
             output_file = request.get("output_file", "output.ifc")
@@ -54,86 +203,228 @@ def handle_message(message) -> dict:
     except json.JSONDecodeError:
         return {"response_type": "invalid_message", "status": "error", "message": "Invalid JSON format"}
 
-def create_ifc_from_json(entities, output_file):
+def create_ifc_from_json(entities, output_file, header: dict | None = None, cache=None, cache_key: str | None = None):
     """
     Generates an IFC file based on the provided JSON data.
+    If `cache` (`converter.outputCache.OutputCache`) is given, the file is stored to it by `cache_key`.
     """
-    writer = IfcWriter("IFC2x3")
-    for entity in entities:
-        ifc_class = entity['ifcClass']
-        try:
-            if ifc_class == 'IfcBuildingStorey':
-                writer.ifcCoreDataUtil.create_storey(
-                    name=entity['name'],
-                    elevation=float(entity['height'])
-                )
-                print_response(action="writingEntity", entity_type=ifc_class, result=True)
-            elif ifc_class == 'IfcColumn':
-                coordinate = (float(entity['coordinate'][0]), float(entity['coordinate'][1]))
-                writer.ifcSharedElementDataUtil.create_column(
-                    profile_name="H300x300",
-                    col_type_name="COL-H300x300",
-                    target_storey_name=entity['targetStorey'],
-                    height=float(entity['height']),
-                    rotation_degree=float(entity['rotation']),
-                    coordinate=coordinate,
-                    profile_arg={"w": 0.3, "h": 0.3, "tw": 0.01, "tf": 0.015, "r": 0.01}
-                )
-                print_response(action="writingEntity", entity_type=ifc_class, result=True)
-            elif ifc_class == 'IfcBeam':
-                pt_start = (float(entity['startPt'][0]), float(entity['startPt'][1]))
-                pt_end = (float(entity['endPt'][0]), float(entity['endPt'][1]))
-                writer.ifcSharedElementDataUtil.create_beam(
-                    profile_name="H300x300",
-                    beam_type_name="BEAM-H300x300",
-                    target_storey_name=entity['targetStorey'],
-                    pt_start=pt_start,
-                    pt_end=pt_end,
-                    rotation_degree=float(entity['rotation']),
-                    z_offset=float(entity['height']),
-                    profile_arg={"w": 0.3, "h": 0.3, "tw": 0.01, "tf": 0.015, "r": 0.01}
-                )
-                print_response(action="writingEntity", entity_type=ifc_class, result=True)
-            elif ifc_class == "IfcWallStandardCase":
-                pt_start = (float(entity['startPt'][0]), float(entity['startPt'][1]))
-                pt_end = (float(entity['endPt'][0]), float(entity['endPt'][1]))
-                writer.ifcSharedElementDataUtil.create_wall_single(
-                    wall_type_name=f"WAL_T{entity['thickness']}",
-                    target_storey_name=entity['targetStorey'],
-                    pt_start=pt_start,
-                    pt_end=pt_end,
-                    z_offset=float(entity['zOffset']),
-                    wall_thickness=float(entity['thickness']),
-                    wall_height=float(entity['height'])
-                )
-                print_response(action="writingEntity", entity_type=ifc_class, result=True)
-            else:
-                print_response(action="writingEntity", result=False, entity_type=ifc_class, message="Not supported IfcClass.")
-                sys.stdout.flush()
-        except Exception as e:
-            print_response(action="writingEntity", result=False, entity_type=ifc_class, message=str(e))
-
-        sys.stdout.flush()
-
-    # Codes will be written here to process `json_data` dynamically
-    writer.save(output_file)
-    
-    print_response(action="writingFile", result=True)
-    sys.stdout.flush()
-    return output_file
+    from converter.jobCheckpoint import JobCheckpoint
+
+    header = header or {}
+    checkpoint = JobCheckpoint.from_header(header, entities, key=cache_key)
+    job = create_job(header, output_file, total=len(entities), checkpoint=checkpoint)
+    try:
+        job.write_entities(entities)
+        file_path = job.finish()
+    except Exception:
+        job.discard()
+        raise
+
+    if cache is not None:
+        cache.store(cache_key, file_path, job.details)
+    return file_path
+
+def create_ifc_from_columns(columns, output_file, header: dict | None = None, cache=None, cache_key: str | None = None):
+    """
+    Generates an IFC file from columnar input. See `converter.columnarInput`.
+    If `cache` (`converter.outputCache.OutputCache`) is given, the file is stored to it by `cache_key`.
+    """
+    from converter.columnarInput import count_entities
+
+    job = create_job(header or {}, output_file, total=count_entities(columns))
+    try:
+        job.write_columns(columns)
+        file_path = job.finish()
+    except Exception:
+        job.discard()
+        raise
+
+    if cache is not None:
+        cache.store(cache_key, file_path, job.details)
+    return file_path
+
+def update_ifc_from_json(request: dict, header: dict):
+    """
+    Updates an IFC file from the difference of inputs. See `converter.incrementalUpdate`.
+    """
+    from converter.incrementalUpdate import update_ifc, load_previous_entities
+
+    output_file = header.get("ifcFilePath")
+    return update_ifc(
+        previous_entities=load_previous_entities(request),
+        entities=request.get("entities", []),
+        previous_file=header.get("previousIfcFilePath", output_file),
+        create_job=lambda total, writer: create_job(header, output_file, total=total, writer=writer),
+        guid_namespace=header.get("guidNamespace")
+    )
+
+def create_job(header: dict, output_file: str, total: int | None = None, writer=None, checkpoint=None) -> "ConversionJob":
+    """
+    Create a conversion job with the options of request header.
+    - "progressIntervalCount", "progressIntervalMs": Interval of progress responses.
+    - "parallelWorkers": Count of processes building the storeys in parallel. 0 builds in this process, -1 uses all cores but one.
+    - "streamBatchSize": If more than 0, the file is written while building, flushing every this count of elements.
+    - "profile": true, or options of `JobProfiler` ({"trace": "cprofile" | "chrome", "memory": bool}).
+      The profile is reported in the "writingFile" response.
+    - "compression", "compressionLevel": "ifczip" or "gzip" output, compressed while writing. By default, chosen by
+      the extension of "ifcFilePath" (".ifczip", ".gz"). Raw and compressed sizes are reported in the "writingFile" response.
+    - "guidNamespace": If given, GlobalIds are derived from it and the keys of entities, so the same input gives the same file.
+    - "validate": If false, inputs are not validated before building, and invalid entities fail one by one. True by default.
+    - "deadlineSeconds", "maxRssBytes": The job is stopped if it runs longer, or the process uses more memory.
+      A stopped job (also by "cancel") fails with the reason and progress in "cancelled", and leaves no output file.
+    - "gc": "tuned" pauses the garbage collector while building (see `converter.gcTuning.GcTuning`), "monitor" only
+      measures it. The collections, pauses and resident set size are reported in "gc" of the "writingFile" response.
+    The job builds into `writer` if given. Then it is not built in parallel.
+    The job resumes from `checkpoint` (`converter.jobCheckpoint.JobCheckpoint`) if given, unless it builds into `writer`
+    or streams, since its model is not whole in memory then.
+    """
+    from converter import ConversionJob
+    from converter.jobControl import JobControl
+
+    parallel_workers = int(header.get("parallelWorkers", 0)) if writer is None else 0
+    if parallel_workers < 0:
+        from converter.parallelBuild import default_workers
+        parallel_workers = default_workers()
+
+    stream_batch_size = int(header.get("streamBatchSize", 0))
+    if writer is not None or stream_batch_size > 0:
+        checkpoint = None
+
+    profile = header.get("profile")
+    if profile is True:
+        profile = {}
+    elif isinstance(profile, dict):
+        profile = {"trace": profile.get("trace"), "memory": bool(profile.get("memory", True))}
+    else:
+        profile = None
+
+    return ConversionJob(
+        output_file,
+        total=total,
+        progress_interval_count=int(header.get("progressIntervalCount", 500)),
+        progress_interval_ms=float(header.get("progressIntervalMs", 200.)),
+        parallel_workers=parallel_workers,
+        stream_batch_size=stream_batch_size,
+        profile=profile,
+        writer=writer,
+        guid_namespace=header.get("guidNamespace"),
+        compression=header.get("compression"),
+        compression_level=int(header["compressionLevel"]) if header.get("compressionLevel") is not None else None,
+        validate=bool(header.get("validate", True)),
+        control=register_job_control(header.get("jobId", "default"), JobControl(
+            deadline_seconds=float(header["deadlineSeconds"]) if header.get("deadlineSeconds") is not None else None,
+            max_rss_bytes=int(header["maxRssBytes"]) if header.get("maxRssBytes") is not None else None
+        )),
+        checkpoint=checkpoint,
+        gc_mode=header.get("gc")
+    )
+
+def register_job_control(job_id: str, control: "JobControl") -> "JobControl":
+    """
+    Register the control of running job, so "cancel" read by the stdin reader thread reaches it.
+    If the job is cancelled already, the control is cancelled at once.
+    """
+    with job_controls_lock:
+        job_controls[job_id] = control
+        if job_id in pending_cancels:
+            control.cancel()
+
+    return control
+
+def cancel_job(job_id: str) -> None:
+    """
+    Cancel the running job. Called by the stdin reader thread.
+    The cancel is kept until the message loop handles the "cancel" message, in case the job has not begun yet.
+    """
+    with job_controls_lock:
+        control = job_controls.get(job_id)
+        if control is not None:
+            control.cancel()
+        else:
+            pending_cancels.add(job_id)
+
+def complete_job(job_id: str, file_path: str) -> None:
+    """
+    Report the job is completed, and release the resources of job.
+    """
+    release_job_resources(job_id)
+    print_response(action="jobComplete", result=True, details={"jobId": job_id, "filePath": file_path})
+
+def fail_job(job_id: str, message: str, details: dict[str, any] | None = None) -> None:
+    """
+    Report the job is failed, and release the resources of job.
+    :param details: Added to the details of response, e.g. the report of `InputValidationError`.
+    """
+    release_job_resources(job_id)
+    print_response(action="jobFailed", result=False, message=message, details={"jobId": job_id, **(details or {})})
+
+def release_job_resources(job_id: str) -> None:
+    """
+    Collect the model of finished job, so the next job in this process starts from a clean heap.
+    """
+    with job_controls_lock:
+        job_controls.pop(job_id, None)
+
+    gc.collect()
+
+def warm_up() -> None:
+    """
+    Import the writer and IfcOpenShell, so the first job does not wait for them.
+    A job arriving before this is done waits on the import lock, and does not import them twice.
+    """
+    try:
+        import converter
+    except Exception as e:
+        print_response(action="system", result=False, message=f"Failed to load the writer: {e}")
+        return
+
+    writer_ready.set()
+
+def read_messages(messages: queue.Queue) -> None:
+    """
+    Read stdin on its own thread, and queue the messages for the message loop.
+    "cancel" messages are also applied here at once, so they reach the job being built by the message loop.
+    """
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+
+        if len(line) <= max_control_message_length and '"cancel"' in line:
+            try:
+                header = json.loads(line).get("header") or {}
+            except (json.JSONDecodeError, AttributeError):
+                header = {}
+
+            if header.get("action") == "cancel":
+                cancel_job(header.get("jobId", "default"))
+
+        messages.put(line)
+
+    messages.put(None)
 
 # Message handling loop for continuous processing
 def message_loop():
     """
     Continuously processes incoming messages from stdin.
+    The process stays alive between jobs, so the interpreter and IfcOpenShell are loaded once for all jobs.
+    The writer is loaded in the background, so the messages not creating IFC (e.g. "pythonTest") are answered immediately.
+    Stdin is read by `read_messages` on another thread, so a running job can be cancelled.
     """
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+    messages: queue.Queue = queue.Queue()
+    threading.Thread(target=read_messages, args=(messages, ), name="stdin-reader", daemon=True).start()
+
     while True:
-        line = sys.stdin.readline()
-        if not line:
+        line = messages.get()
+        if line is None:
             break
 
         # Process the incoming message
         response = handle_message(line.strip())
+        if response is not None and response.get("action") == "shutdown":
+            break
 
 def create_ifc_test(output_file):
     """
@@ -149,27 +440,20 @@ def create_ifc_test(output_file):
     `json_data`, it creates a fixed set of storeys and writes them to an IFC file.
 
     Example:
-        writer.create_storeys({'1F': 0.0, '2F': 3.0, '3F': 6.0})
+        writer.ifcCoreDataUtil.create_storeys({'1F': 0.0, '2F': 3.0, '3F': 6.0})
 
     Use this function to verify that the `IfcWriter` class and `create_storeys` logic are functioning
     correctly before implementing the dynamic parsing in `create_ifc_from_json`.
     """
-    writer = IfcWriter(schema="IFC2x3")
+    from writer import IfcWriter
 
-    writer.ifcCoreDataUtil.create_storey(
-        name="1F",
-        elevation=3.
-    )
-
-    writer.ifcCoreDataUtil.create_storey(
-        name="2F",
-        elevation=6.
-    )
+    writer = IfcWriter(schema="IFC2x3")
 
-    writer.ifcCoreDataUtil.create_storey(
-        name="3F",
-        elevation=9.
-    )
+    writer.ifcCoreDataUtil.create_storeys({
+        "1F": 3.,
+        "2F": 6.,
+        "3F": 9.
+    })
 
     # beam1 = writer.ifcSharedElementDataUtil.create_beam(
     #     profile_name="BEAM_I_300x300",
@@ -206,7 +490,7 @@ def create_ifc_test(output_file):
     # print(writer.element_types["beam_types"])
     # writer.ifcResourceEntityUtil.assign_material(
     #     material_name="STEEL_RED",
-    #     target_objects=[writer.element_types["beam_types"]["BEAM_I_300x300"]["Entity"]]
+    #     target_objects=[writer.element_types["beam_types"]["BEAM_I_300x300"].entity]
     # )
 
     writer.ifcSharedElementDataUtil.create_column(
@@ -1 +1,2 @@
-from .jsonPrinter import print_response
\ No newline at end of file
+from .jsonPrinter import print_response
+from .progressReporter import ProgressReporter
\ No newline at end of file
@@ -2,11 +2,16 @@ import json
 from typing import Literal
 
 def print_response(
-        action:Literal["writingFile", "writingEntity", "system"],
+        action:Literal["writingFile", "writingEntity", "system", "progress", "jobComplete", "jobFailed"],
         result: bool,
         entity_type: Literal["IfcBuildingStorey", "IfcColumn", "IfcBeam"]|str|None=None,
-        message: str|None = None
+        message: str|None = None,
+        details: dict[str, any]|None = None
     ) -> None:
+    """
+    Print a response as a single line of JSON (NDJSON), so the receiver can parse each line once.
+    :param details: Additional values merged into the response.
+    """
     data = {
         "action": action,
         "result": result,
@@ -18,4 +23,7 @@ def print_response(
     if entity_type is not None:
         data["entityType"] = entity_type
 
-    print(json.dumps(data, ensure_ascii=False, indent=4), flush=True, end="\n")
\ No newline at end of file
+    if details is not None:
+        data.update(details)
+
+    print(json.dumps(data, ensure_ascii=False, separators=(",", ":")), flush=True, end="\n")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import time
+
+from .jsonPrinter import print_response
+
+class ProgressReporter:
+    """
+    Reports the progress of writing entities.
+    - Written entities are counted, and reported as a "progress" response every `interval_count` entities
+      or `interval_ms` milliseconds, whichever comes first.
+    - Failed entities are reported one by one with their index.
+    """
+    def __init__(self, total: int | None = None, interval_count: int = 500, interval_ms: float = 200.):
+        """
+        :param total: Total count of entities, if known.
+        :param interval_count: Count of entities between progress responses.
+        :param interval_ms: Milliseconds between progress responses.
+        """
+        self.total = total
+        self.interval_count = interval_count
+        self.interval_seconds = interval_ms / 1000.
+
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.by_class: dict[str, dict[str, int]] = {}
+
+        self.started_at = time.perf_counter()
+        self.last_reported_at = self.started_at
+        self.unreported = 0
+
+    def _count(self, entity_type: str, key: str, count: int = 1) -> dict[str, int]:
+        class_counts = self.by_class.get(entity_type)
+        if class_counts is None:
+            class_counts = {"succeeded": 0, "failed": 0}
+            self.by_class[entity_type] = class_counts
+
+        class_counts[key] += count
+        self.processed += count
+        self.unreported += count
+        return class_counts
+
+    def entity_succeeded(self, entity_type: str) -> None:
+        self.succeeded += 1
+        self._count(entity_type, "succeeded")
+        self._report_if_due()
+
+    def entities_succeeded(self, entity_type: str, count: int) -> None:
+        """
+        Count several entities of the class at once, e.g. the entities built by another process.
+        """
+        if count <= 0:
+            return
+
+        self.succeeded += count
+        self._count(entity_type, "succeeded", count)
+        self._report_if_due()
+
+    def entity_failed(self, index: int, entity_type: str, message: str) -> None:
+        self.failed += 1
+        self._count(entity_type, "failed")
+        print_response(
+            action="writingEntity",
+            result=False,
+            entity_type=entity_type,
+            message=message,
+            details={"index": index}
+        )
+        self._report_if_due()
+
+    def _report_if_due(self) -> None:
+        if self.unreported >= self.interval_count:
+            self.report()
+            return
+
+        if time.perf_counter() - self.last_reported_at >= self.interval_seconds:
+            self.report()
+
+    def summary(self) -> dict[str, any]:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "total": self.total,
+            "byClass": self.by_class,
+            "elapsedSeconds": round(elapsed, 3),
+            "rate": round(self.processed / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def report(self) -> None:
+        """
+        Print the "progress" response now.
+        """
+        print_response(action="progress", result=True, details=self.summary())
+        self.last_reported_at = time.perf_counter()
+        self.unreported = 0
\ No newline at end of file
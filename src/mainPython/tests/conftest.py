@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+import pytest
+
+main_python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if main_python_dir not in sys.path:
+    sys.path.insert(0, main_python_dir)
+
+@pytest.fixture
+def send_message(capsys):
+    """
+    Send a request to `main.handle_message`, and return the responses printed while handling it.
+    """
+    import main
+
+    def send(header: dict, **body) -> list[dict]:
+        capsys.readouterr()
+        main.handle_message(json.dumps({"header": header, **body}))
+        return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+
+    yield send
+    main.handle_message(json.dumps({"header": {"action": "shutdown"}}))
+
+@pytest.fixture
+def small_building():
+    from benchmark.syntheticBuilding import generate_entities
+
+    return generate_entities(60, storey_count=2)
@@ -0,0 +1,61 @@
+import collections
+import random
+
+import ifcopenshell
+import pytest
+
+def _convert(send_message, tmp_path, entities: list[dict], **header) -> ifcopenshell.file:
+    output_file = str(tmp_path / "building.ifc")
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file, **header}, entities=entities)
+    assert responses[-1]["action"] == "jobComplete"
+    return ifcopenshell.open(output_file)
+
+def _assert_invariants(model: ifcopenshell.file, interned: bool = True) -> None:
+    # One IfcRelDefinesByType per type, and one containment per storey
+    relating_types = [rel.RelatingType.id() for rel in model.by_type("IfcRelDefinesByType")]
+    assert len(relating_types) == len(set(relating_types)) == len(model.by_type("IfcTypeObject"))
+    structures = [rel.RelatingStructure.id() for rel in model.by_type("IfcRelContainedInSpatialStructure")]
+    assert len(structures) == len(set(structures)) == len(model.by_type("IfcBuildingStorey"))
+
+    # Every element is related once
+    contained = collections.Counter(element.id() for rel in model.by_type("IfcRelContainedInSpatialStructure") for element in rel.RelatedElements)
+    typed = collections.Counter(element.id() for rel in model.by_type("IfcRelDefinesByType") for element in rel.RelatedObjects)
+    element_ids = {element.id() for element in model.by_type("IfcBuildingElement")}
+    assert set(contained) == set(typed) == element_ids
+    assert set(contained.values()) == set(typed.values()) == {1}
+
+    # Points and directions are interned. Streaming drops them from the cache when they are flushed
+    if not interned:
+        return
+
+    points = collections.Counter(tuple(point.Coordinates) for point in model.by_type("IfcCartesianPoint"))
+    directions = collections.Counter(tuple(direction.DirectionRatios) for direction in model.by_type("IfcDirection"))
+    assert max(points.values()) == 1
+    assert max(directions.values()) == 1
+
+@pytest.mark.parametrize("header", [{}, {"streamBatchSize": 7}], ids=["save", "stream"])
+def test_relationships_and_interning_invariants(send_message, small_building, tmp_path, header):
+    model = _convert(send_message, tmp_path, small_building, **header)
+    _assert_invariants(model, interned="streamBatchSize" not in header)
+
+def test_output_does_not_depend_on_input_order(send_message, small_building, tmp_path):
+    shuffled = list(small_building)
+    random.Random(7).shuffle(shuffled)
+    assert shuffled[0]["ifcClass"] != "IfcBuildingStorey" or shuffled != small_building
+
+    ordered = _convert(send_message, tmp_path / "ordered", small_building, guidNamespace="order-test")
+    reordered = _convert(send_message, tmp_path / "reordered", shuffled, guidNamespace="order-test")
+
+    _assert_invariants(reordered)
+    for ifc_class in ("IfcColumn", "IfcBeam", "IfcWallStandardCase", "IfcBuildingStorey"):
+        assert len(reordered.by_type(ifc_class)) == len(ordered.by_type(ifc_class))
+
+def test_element_before_its_storey_is_built(send_message, tmp_path):
+    entities = [
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.},
+    ]
+    model = _convert(send_message, tmp_path, entities)
+
+    assert len(model.by_type("IfcColumn")) == 1
+    _assert_invariants(model)
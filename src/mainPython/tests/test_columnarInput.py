@@ -0,0 +1,56 @@
+import ifcopenshell
+import numpy as np
+
+from converter.columnarInput import from_csv, from_npz, from_struct_of_arrays
+
+columns = {
+    "IfcBuildingStorey": {"name": ["1F", "2F"], "height": [0., 3.]},
+    "IfcColumn": {"coordinate": [[0., 0.], [5., 0.]], "height": [3., 3.], "rotation": [0., 90.], "targetStorey": ["1F", "2F"]},
+    "IfcBeam": {"startPt": [[0., 0.]], "endPt": [[5., 0.]], "height": [3.], "rotation": [0.], "targetStorey": ["1F"]},
+}
+
+def _write_csv(path) -> None:
+    names = ["ifcClass", "name", "height", "coordinate_x", "coordinate_y", "rotation", "targetStorey",
+             "startPt_x", "startPt_y", "endPt_x", "endPt_y"]
+    rows = [
+        ["IfcBuildingStorey", "1F", "0", "", "", "", "", "", "", "", ""],
+        ["IfcBuildingStorey", "2F", "3", "", "", "", "", "", "", "", ""],
+        ["IfcColumn", "", "3", "0", "0", "0", "1F", "", "", "", ""],
+        ["IfcColumn", "", "3", "5", "0", "90", "2F", "", "", "", ""],
+        ["IfcBeam", "", "3", "", "", "0", "1F", "0", "0", "5", "0"],
+    ]
+    path.write_text("\n".join(",".join(row) for row in [names] + rows) + "\n", encoding="utf-8")
+
+def _assert_same_columns(loaded: dict, expected: dict) -> None:
+    assert set(loaded) == set(expected)
+    for ifc_class, fields in expected.items():
+        for field, values in fields.items():
+            if isinstance(values, list):
+                assert loaded[ifc_class][field] == values
+            else:
+                np.testing.assert_array_equal(loaded[ifc_class][field], values)
+
+def test_csv_and_npz_load_as_struct_of_arrays(tmp_path):
+    expected = from_struct_of_arrays(columns)
+
+    csv_path = tmp_path / "building.csv"
+    _write_csv(csv_path)
+    _assert_same_columns(from_csv(str(csv_path)), expected)
+
+    npz_path = tmp_path / "building.npz"
+    np.savez(npz_path, **{
+        f"{ifc_class}.{field}": np.asarray(values) for ifc_class, fields in columns.items() for field, values in fields.items()
+    })
+    _assert_same_columns(from_npz(str(npz_path)), expected)
+
+def test_create_ifc_from_input_path(send_message, tmp_path):
+    csv_path = tmp_path / "building.csv"
+    _write_csv(csv_path)
+    output_file = str(tmp_path / "building.ifc")
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file, "inputPath": str(csv_path)})
+
+    assert responses[-1]["action"] == "jobComplete"
+    model = ifcopenshell.open(output_file)
+    assert len(model.by_type("IfcBuildingStorey")) == 2
+    assert len(model.by_type("IfcColumn")) == 2
+    assert len(model.by_type("IfcBeam")) == 1
@@ -0,0 +1,65 @@
+import ifcopenshell
+
+def _last(responses: list[dict]) -> dict:
+    return responses[-1]
+
+def test_create_ifc_writes_every_element(send_message, small_building, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file}, entities=small_building)
+
+    assert _last(responses)["action"] == "jobComplete"
+    model = ifcopenshell.open(output_file)
+    element_count = sum(1 for entity in small_building if entity["ifcClass"] != "IfcBuildingStorey")
+    assert len(model.by_type("IfcBuildingElement")) == element_count
+
+def test_streaming_job_writes_every_element(send_message, small_building, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    send_message({"action": "begin_job", "jobId": "job", "ifcFilePath": output_file, "streamBatchSize": 10})
+    half = len(small_building) // 2
+    send_message({"action": "entities", "jobId": "job"}, entities=small_building[:half])
+    send_message({"action": "entities", "jobId": "job"}, entities=small_building[half:])
+    responses = send_message({"action": "end_job", "jobId": "job"})
+
+    assert _last(responses)["action"] == "jobComplete"
+    model = ifcopenshell.open(output_file)
+    element_count = sum(1 for entity in small_building if entity["ifcClass"] != "IfcBuildingStorey")
+    assert len(model.by_type("IfcBuildingElement")) == element_count
+
+def test_columnar_input_writes_every_element(send_message, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    columns = {
+        "IfcBuildingStorey": {"name": ["1F"], "height": [0.]},
+        "IfcColumn": {"coordinate": [[0., 0.], [5., 0.]], "height": [3., 3.], "rotation": [0., 90.], "targetStorey": ["1F", "1F"]},
+        "IfcBeam": {"startPt": [[0., 0.]], "endPt": [[5., 0.]], "height": [3.], "rotation": [0.], "targetStorey": ["1F"]},
+    }
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file}, columns=columns)
+
+    assert _last(responses)["action"] == "jobComplete"
+    model = ifcopenshell.open(output_file)
+    assert len(model.by_type("IfcColumn")) == 2
+    assert len(model.by_type("IfcBeam")) == 1
+
+def test_invalid_element_fails_alone(send_message, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    entities = [
+        {"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [1e308, 1e308], "height": 1e308, "rotation": 0.},
+    ]
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file, "validate": False}, entities=entities)
+
+    assert _last(responses)["action"] == "jobComplete"
+    assert len(ifcopenshell.open(output_file).by_type("IfcColumn")) >= 1
+
+def test_shutdown_discards_open_jobs(send_message, small_building, tmp_path):
+    import main
+
+    output_file = str(tmp_path / "building.ifc")
+    send_message({"action": "begin_job", "jobId": "job", "ifcFilePath": output_file, "streamBatchSize": 10})
+    send_message({"action": "entities", "jobId": "job"}, entities=small_building)
+    assert any(path.name.endswith(".partial.ifc") for path in tmp_path.iterdir())
+
+    send_message({"action": "shutdown"})
+
+    assert main.streaming_jobs == {}
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+from ifcopenshell import entity_instance
+
+def _job(tmp_path, entities: list[dict]):
+    from converter import ConversionJob
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        job = ConversionJob(str(tmp_path / "building.ifc"))
+        job.write_entities(entities)
+    return job
+
+def _walk_registries(writer) -> set[int]:
+    from writer import RegistryRecord
+
+    registered_ids = set()
+    stack = [getattr(writer, name) for name in writer.registry_attributes]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, entity_instance):
+            registered_ids.add(value.id())
+        elif isinstance(value, (dict, RegistryRecord)):
+            stack.extend(value.values())
+        elif isinstance(value, (tuple, list)):
+            stack.extend(value)
+
+    return registered_ids
+
+def test_registry_index_covers_registries(tmp_path, small_building):
+    writer = _job(tmp_path, small_building).writer
+
+    assert writer.get_registered_ids() == _walk_registries(writer)
+    assert all(writer.is_registered(step_id) for step_id in _walk_registries(writer))
+
+def test_remove_created_after_restores_model(tmp_path):
+    storey = {"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.}
+    column = {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., 0.], "height": 3., "rotation": 0.}
+    job = _job(tmp_path, [storey, column])
+    writer = job.writer
+    accumulator = writer.ifcRelationshipAccumulator
+
+    step_id = writer.max_step_id()
+    entity_count = len(list(writer.model))
+    related_counts = {key: len(record["Related"]) for key, record in accumulator.pending.items()}
+
+    from converter.conversionJob import member_profile_name, column_type_name
+
+    writer.ifcSharedElementDataUtil.create_columns(
+        profile_name=member_profile_name, col_type_name=column_type_name, target_storey_names="1F",
+        coordinates=[[5., 0.], [10., 0.]], heights=3.
+    )
+    assert len(list(writer.model)) > entity_count
+
+    writer.remove_created_after(step_id)
+
+    assert len(list(writer.model)) == entity_count
+    assert {key: len(record["Related"]) for key, record in accumulator.pending.items()} == related_counts
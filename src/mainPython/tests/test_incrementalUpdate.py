@@ -0,0 +1,45 @@
+import ifcopenshell
+
+def _keyed(entities: list[dict]) -> list[dict]:
+    keyed = []
+    for index, entity in enumerate(entities):
+        entity = dict(entity)
+        if entity["ifcClass"] != "IfcBuildingStorey":
+            entity["key"] = f"element-{index}"
+        keyed.append(entity)
+    return keyed
+
+def _placement_z(element) -> float:
+    return element.ObjectPlacement.RelativePlacement.Location.Coordinates[2]
+
+def test_changed_element_is_patched(send_message, small_building, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    previous = _keyed(small_building)
+    header = {"jobId": "job", "ifcFilePath": output_file, "guidNamespace": "update-test"}
+    assert send_message({"action": "create_ifc", **header}, entities=previous)[-1]["action"] == "jobComplete"
+    previous_model = ifcopenshell.open(output_file)
+    previous_guids = {element.Tag: element.GlobalId for element in previous_model.by_type("IfcBuildingElement")}
+
+    beam_index = next(index for index, entity in enumerate(previous) if entity["ifcClass"] == "IfcBeam")
+    current = [dict(entity) for entity in previous]
+    current[beam_index]["height"] = current[beam_index]["height"] + 1.
+    changed_key = current[beam_index]["key"]
+
+    responses = send_message({"action": "update_ifc", **header}, entities=current, previousEntities=previous)
+
+    assert responses[-1]["action"] == "jobComplete"
+    incremental = next(response for response in responses if response["action"] == "writingFile")["incremental"]
+    assert incremental["mode"] == "patch"
+    assert (incremental["changed"], incremental["added"], incremental["removed"]) == (1, 0, 0)
+
+    model = ifcopenshell.open(output_file)
+    elements = {element.Tag: element for element in model.by_type("IfcBuildingElement")}
+    assert set(elements) == set(previous_guids)
+    assert {tag: element.GlobalId for tag, element in elements.items()} == previous_guids
+
+    previous_beam = next(element for element in previous_model.by_type("IfcBeam") if element.Tag == changed_key)
+    assert _placement_z(elements[changed_key]) == _placement_z(previous_beam) + 1.
+
+    # The patched element joins the relationships of the file instead of new ones
+    assert len(model.by_type("IfcRelDefinesByType")) == len(model.by_type("IfcTypeObject"))
+    assert len(model.by_type("IfcRelContainedInSpatialStructure")) == len(model.by_type("IfcBuildingStorey"))
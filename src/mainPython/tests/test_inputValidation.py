@@ -0,0 +1,31 @@
+import os
+
+from converter.inputValidation import validate_entities
+
+def test_every_invalid_entity_is_reported():
+    entities = [
+        {"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., float("nan")], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcBeam", "targetStorey": "1F", "startPt": [1., 1.], "endPt": [1., 1.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "9F", "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcSlab"},
+    ]
+    errors = validate_entities(entities)
+
+    assert [error["index"] for error in errors] == [2, 3, 4, 5]
+
+def test_invalid_input_builds_nothing(send_message, tmp_path):
+    output_file = str(tmp_path / "building.ifc")
+    entities = [
+        {"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "1F", "coordinate": [0., 0.], "height": "tall", "rotation": 0.},
+        {"ifcClass": "IfcColumn", "targetStorey": "2F", "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+    ]
+    responses = send_message({"action": "create_ifc", "jobId": "job", "ifcFilePath": output_file}, entities=entities)
+
+    assert responses[-1]["action"] == "jobFailed"
+    validation = responses[-1]["validation"]
+    assert validation["errorCount"] == 2
+    assert [error["index"] for error in validation["errors"]] == [1, 2]
+    assert not os.path.exists(output_file)
@@ -0,0 +1,54 @@
+import contextlib
+import io
+
+import ifcopenshell
+import pytest
+
+class StopAfterChecks:
+    """
+    Job control which cancels the job at the given count of checks, as if the process stopped there.
+    """
+    def __init__(self, checks: int):
+        self.checks = checks
+
+    def stop_reason(self):
+        self.checks -= 1
+        return ("cancelled", "Interrupted.") if self.checks < 0 else None
+
+def _checkpoint(tmp_path, entities: list[dict]):
+    from converter.jobCheckpoint import JobCheckpoint
+
+    header = {"jobId": "job", "checkpoint": {"dir": str(tmp_path / "checkpoints"), "intervalSeconds": 0}}
+    return JobCheckpoint.from_header(header, entities)
+
+def test_interrupted_job_resumes_from_checkpoint(tmp_path, small_building):
+    from converter import ConversionJob
+    from converter.jobControl import JobCancelled
+
+    output_file = str(tmp_path / "building.ifc")
+    storey_count = sum(1 for entity in small_building if entity["ifcClass"] == "IfcBuildingStorey")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Stopped after the storeys and the first batch of elements
+        job = ConversionJob(output_file, control=StopAfterChecks(storey_count + 1), checkpoint=_checkpoint(tmp_path, small_building))
+        with pytest.raises(JobCancelled):
+            job.write_entities(small_building)
+        job.discard()
+
+        checkpoint = _checkpoint(tmp_path, small_building)
+        assert 0 < len(checkpoint.done) < len(small_building)
+
+        job = ConversionJob(output_file, total=len(small_building), checkpoint=checkpoint)
+        job.write_entities(small_building)
+        job.finish()
+
+    assert job.details["checkpoint"]["resumedEntities"] > 0
+    assert job.details["succeeded"] == len(small_building)
+    assert list((tmp_path / "checkpoints").iterdir()) == []
+
+    model = ifcopenshell.open(output_file)
+    element_count = len(small_building) - storey_count
+    assert len(model.by_type("IfcBuildingElement")) == element_count
+    assert len(model.by_type("IfcBuildingStorey")) == storey_count
+    assert len(model.by_type("IfcRelDefinesByType")) == len(model.by_type("IfcTypeObject"))
+    assert len(model.by_type("IfcRelContainedInSpatialStructure")) == storey_count
@@ -0,0 +1,44 @@
+import collections
+import contextlib
+import io
+
+def _storey(name: str, height: float) -> dict:
+    return {"ifcClass": "IfcBuildingStorey", "name": name, "height": height}
+
+def _shard_entities(storey_name: str, height: float) -> list[dict]:
+    return [
+        _storey(storey_name, height),
+        {"ifcClass": "IfcColumn", "targetStorey": storey_name, "coordinate": [0., 0.], "height": 3., "rotation": 0.},
+        {"ifcClass": "IfcBeam", "targetStorey": storey_name, "startPt": [0., 0.], "endPt": [5., 0.], "height": 3., "rotation": 0.},
+        {
+            "ifcClass": "IfcWallStandardCase", "targetStorey": storey_name, "startPt": [0., 0.], "endPt": [4., 0.],
+            "zOffset": 0., "thickness": 0.2, "height": 3.
+        },
+    ]
+
+def test_merge_replaces_duplicate_global_ids(tmp_path):
+    from converter import ConversionJob
+    from converter.parallelBuild import build_shard
+    from writer import IfcWriter, IfcModelMerger
+
+    storeys = [("1F", 0.), ("2F", 3.)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        job = ConversionJob(str(tmp_path / "building.ifc"), guid_namespace="merge-test")
+        job.write_entities([_storey(name, height) for name, height in storeys])
+    writer = job.writer
+    skeleton = IfcWriter.skeletons[writer.skeleton_key]
+
+    # Shards of the same namespace give their elements the same GlobalIds
+    merger = IfcModelMerger(writer)
+    for name, height in storeys:
+        shard = build_shard(writer.schema, writer.skeleton_key, skeleton, _shard_entities(name, height), "same-namespace")
+        merger.merge_string(shard["Text"])
+    writer.ifcRelationshipAccumulator.flush()
+
+    guid_counts = collections.Counter(root.GlobalId for root in writer.model.by_type("IfcRoot"))
+    assert [guid for guid, count in guid_counts.items() if count > 1] == []
+
+    for ifc_class in ("IfcColumn", "IfcBeam", "IfcWallStandardCase"):
+        assert len(writer.model.by_type(ifc_class)) == 2
+    for type_class in ("IfcColumnType", "IfcBeamType", "IfcWallType"):
+        assert len(writer.model.by_type(type_class)) == 1
@@ -0,0 +1,43 @@
+def _create(send_message, tmp_path, entities: list[dict], **header) -> dict:
+    responses = send_message(
+        {
+            "action": "create_ifc", "jobId": "job", "ifcFilePath": str(tmp_path / "building.ifc"),
+            "cache": True, "cacheDir": str(tmp_path / "cache"), **header
+        },
+        entities=entities
+    )
+    assert responses[-1]["action"] == "jobComplete"
+    return next(response for response in responses if response["action"] == "writingFile")
+
+def _is_hit(response: dict) -> bool:
+    return (response.get("cache") or {}).get("hit", False)
+
+def test_repeated_request_is_answered_from_cache(send_message, small_building, tmp_path):
+    assert not _is_hit(_create(send_message, tmp_path, small_building))
+    first_bytes = (tmp_path / "building.ifc").read_bytes()
+    (tmp_path / "building.ifc").unlink()
+
+    assert _is_hit(_create(send_message, tmp_path, small_building))
+    assert (tmp_path / "building.ifc").read_bytes() == first_bytes
+
+def test_changed_input_or_option_misses_cache(send_message, small_building, tmp_path):
+    _create(send_message, tmp_path, small_building)
+
+    changed = [dict(entity) for entity in small_building]
+    changed[1]["height"] = changed[1]["height"] + 1.
+    assert not _is_hit(_create(send_message, tmp_path, changed))
+    assert not _is_hit(_create(send_message, tmp_path, small_building, guidNamespace="other"))
+
+    assert _is_hit(_create(send_message, tmp_path, changed))
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from converter.outputCache import OutputCache
+
+    source_file = tmp_path / "source.ifc"
+    source_file.write_bytes(b"x" * 100)
+    cache = OutputCache(cache_dir=str(tmp_path / "cache"), max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.store(key, str(source_file), {})
+
+    assert cache.fetch("a", str(tmp_path / "out.ifc")) is None
+    assert cache.fetch("c", str(tmp_path / "out.ifc")) is not None
@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+def _writer(tmp_path):
+    from converter import ConversionJob
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        job = ConversionJob(str(tmp_path / "building.ifc"))
+        job.write_entities([{"ifcClass": "IfcBuildingStorey", "name": "1F", "height": 0.}])
+    return job.writer
+
+def _body_item(element):
+    for representation in element.Representation.Representations:
+        if representation.RepresentationIdentifier == "Body":
+            return representation.Items[0]
+
+def test_walls_of_other_types_do_not_share_styled_geometry(tmp_path):
+    writer = _writer(tmp_path)
+    walls = writer.ifcSharedElementDataUtil.create_walls(
+        wall_type_names=["WAL_A", "WAL_B", "WAL_A"], target_storey_names="1F",
+        pts_start=[[0., 0.], [0., 5.], [0., 10.]], pts_end=[[4., 0.], [4., 5.], [4., 10.]],
+        wall_thicknesses=0.2, wall_heights=3.
+    )
+    writer.ifcRelationshipAccumulator.flush()
+
+    items = [_body_item(wall) for wall in walls]
+    assert items[0] == items[2]
+    assert items[0] != items[1]
+
+    styles = {}
+    for styled_item in writer.model.by_type("IfcStyledItem"):
+        styles.setdefault(styled_item.Item.id(), []).append(styled_item.Styles)
+    assert len(styles[items[0].id()]) == 1
+    assert len(styles[items[1].id()]) == 1
+    assert styles[items[0].id()] != styles[items[1].id()]
+
+def test_column_representation_map_is_attached_once(tmp_path):
+    from converter.conversionJob import member_profile_name, member_profile_arg, column_type_name
+
+    writer = _writer(tmp_path)
+    columns = writer.ifcSharedElementDataUtil.create_columns(
+        profile_name=member_profile_name, col_type_name=column_type_name, target_storey_names="1F",
+        coordinates=[[0., 0.], [5., 0.], [10., 0.]], heights=[3., 3., 4.], profile_arg=member_profile_arg
+    )
+
+    column_type = writer.element_types["column_types"][column_type_name].entity
+    map_ids = [representation_map.id() for representation_map in column_type.RepresentationMaps]
+    assert len(map_ids) == len(set(map_ids)) == 2
+    assert len(columns) == 3
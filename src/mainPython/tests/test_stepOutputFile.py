@@ -0,0 +1,33 @@
+import gzip
+import zipfile
+
+import pytest
+
+def _build(small_building, output_file: str):
+    import contextlib
+    import io
+
+    from converter import ConversionJob
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        job = ConversionJob(output_file, guid_namespace="step-output-test")
+        job.write_entities(small_building)
+        job.finish()
+    return job.writer
+
+@pytest.mark.parametrize("file_name", ["building.ifc.gz", "building.ifczip"])
+def test_compressed_save_matches_plain_save(small_building, tmp_path, file_name):
+    output_file = tmp_path / file_name
+    writer = _build(small_building, str(output_file))
+    plain_file = tmp_path / "plain.ifc"
+    writer.model.write(str(plain_file))
+
+    if file_name.endswith(".gz"):
+        with gzip.open(output_file, "rb") as compressed:
+            text = compressed.read()
+    else:
+        with zipfile.ZipFile(output_file) as archive:
+            text = archive.read("building.ifc")
+
+    assert text == plain_file.read_bytes()
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([file_name, "plain.ifc"])
@@ -1,2 +1,4 @@
-from .utils import IfcCoreDataUtil, IfcResourceEntityUtil, IfcSharedElementDataUtil, SimpleVectorUtil
-from .ifcWriter import IfcWriter
\ No newline at end of file
+from .utils import IfcCoreDataUtil, IfcResourceEntityUtil, IfcSharedElementDataUtil, SimpleVectorUtil, IfcRelationshipAccumulator, IfcModelMerger, IfcModelIndexer, IfcElementRemover, IfcGuidUtil
+from .ifcWriter import IfcWriter
+from .registryRecords import RegistryRecord, Registry, StoreyRecord, ElementTypeRecord, MaterialRecord, MaterialLayerSetRecord, WallGeometryRecord
+from .ifcStepStreamWriter import IfcStepStreamWriter
\ No newline at end of file
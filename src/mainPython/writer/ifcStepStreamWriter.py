@@ -0,0 +1,278 @@
+from itertools import islice
+from typing import TYPE_CHECKING, Literal
+
+from ifcopenshell import entity_instance
+
+from .registryRecords import RegistryRecord
+from .stepOutputFile import StepOutputFile, output_compression, default_compression_level, step_line
+
+if TYPE_CHECKING:
+    from .ifcWriter import IfcWriter
+
+# Interned entities can be shared by elements without being in the registries.
+interned_classes = ("IfcCartesianPoint", "IfcDirection")
+
+class IfcStepStreamWriter:
+    """
+    Writes the model to a STEP file while it is built, so the finished elements do not stay in memory.
+    - `open`: The header and the entities of the model at the moment (the skeleton) are written.
+    - `flush`: Finished elements and their subgraphs are written, and removed from the model.
+      The entities in the writer's registries (see `IfcWriter.registry_attributes`) stay in the model.
+    - `close`: The rest of the model and the relationships reserved to `IfcRelationshipAccumulator` are written.
+    Relationships are written from the step ids of reserved elements, since the elements are not in the model anymore.
+    A flush looks only at the entities created since the previous one, and the registry values added since then,
+    so its cost does not grow with the model.
+    """
+    def __init__(
+        self,
+        ifc_writer: "IfcWriter",
+        output_file: str,
+        batch_size: int = 1000,
+        compression: Literal["ifczip", "gzip"] | None = None,
+        compression_level: int | None = None
+    ):
+        """
+        :param ifc_writer: Writer building the model.
+        :param output_file: The file path where the IFC file will be saved.
+        :param batch_size: Count of finished elements between flushes.
+        :param compression: "ifczip" or "gzip", compressed while streaming. If None, chosen by the extension of file.
+        :param compression_level: Deflate level. See `stepOutputFile.default_compression_level`.
+        """
+        self.writer = ifc_writer
+        self.output_file = output_file
+        self.batch_size = batch_size
+        self.compression = output_compression(output_file, compression)
+        self.compression_level = default_compression_level if compression_level is None else compression_level
+
+        self.file: StepOutputFile | None = None
+        self.output_stats: dict[str, any] = {}
+        self.footer = ""
+        self.initial_ids: set[int] = set()
+        self.written_ids: set[int] = set()
+        self.max_written_id = 0
+        self.scanned_id = 0
+        self.retained_ids: set[int] = set()
+        self.registry_sizes: dict[tuple, int] = {}
+        self.unflushed = 0
+        self.written_count = 0
+        self.removed_count = 0
+
+    def open(self) -> None:
+        self.writer.stabilize_header()
+        text = self.writer.model.to_string()
+        data_end = text.rindex("ENDSEC;")
+
+        self.file = StepOutputFile(self.output_file, compression=self.compression, compression_level=self.compression_level)
+        self.file.write(text[:data_end])
+        self.footer = text[data_end:]
+
+        for entity in self.writer.model:
+            self.initial_ids.add(entity.id())
+
+        self.written_ids.update(self.initial_ids)
+        self.retained_ids.update(self.initial_ids)
+        self.written_count = len(self.initial_ids)
+        self.max_written_id = max(self.initial_ids, default=0)
+        self.scanned_id = self.max_written_id
+
+    def element_finished(self) -> None:
+        """
+        Count a finished element, and flush when the batch is full.
+        """
+        self.unflushed += 1
+        if self.unflushed >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the finished elements and remove them from the model.
+        """
+        self.unflushed = 0
+        model = self.writer.model
+        self._update_retained_ids()
+        retained_ids = self.retained_ids
+        pending_style_ids = self.writer.ifcRelationshipAccumulator.pending_styles
+
+        # Elements are created after the last flush, so only the new step ids are looked at
+        max_id = self.writer.max_step_id()
+        roots = []
+        for step_id in range(self.scanned_id + 1, max_id + 1):
+            try:
+                entity = model.by_id(step_id)
+            except RuntimeError:
+                # Removed, e.g. by a failed element
+                continue
+
+            if entity.is_a("IfcProduct") and not entity.is_a("IfcSpatialStructureElement") and step_id not in retained_ids:
+                roots.append(entity)
+        self.scanned_id = max_id
+
+        if not roots:
+            return
+
+        # Subgraph of the elements, not descending into the retained entities
+        subgraph: dict[int, entity_instance] = {}
+        stack: list = list(roots)
+        while stack:
+            value = stack.pop()
+            if isinstance(value, (tuple, list)):
+                stack.extend(value)
+                continue
+
+            if not isinstance(value, entity_instance):
+                continue
+
+            step_id = value.id()
+            if not step_id or step_id in subgraph or step_id in retained_ids or step_id in pending_style_ids:
+                continue
+
+            subgraph[step_id] = value
+            stack.extend(value)
+
+        # Interned entities referred by the others stay in the model
+        kept_ids = set()
+        for step_id, entity in subgraph.items():
+            if entity.is_a() in interned_classes:
+                if any(inverse.id() not in subgraph for inverse in model.get_inverse(entity)):
+                    kept_ids.add(step_id)
+
+        lines = []
+        for step_id in sorted(subgraph.keys()):
+            if step_id in self.written_ids:
+                continue
+
+            lines.append(step_line(subgraph[step_id]))
+            self.max_written_id = max(self.max_written_id, step_id)
+            if step_id in kept_ids:
+                self.written_ids.add(step_id)
+
+        self.file.writelines(lines)
+        self.written_count += len(lines)
+
+        resource_util = self.writer.ifcResourceEntityUtil
+        model.batch()
+        for step_id in sorted(subgraph.keys(), reverse=True):
+            if step_id in kept_ids:
+                continue
+
+            entity = subgraph[step_id]
+            if entity.is_a() in interned_classes:
+                resource_util.forget_interned(entity)
+
+            self.written_ids.discard(step_id)
+            model.remove(entity)
+            self.removed_count += 1
+
+        model.unbatch()
+
+    def close(self) -> None:
+        """
+        Write the rest of the model and the reserved relationships, and close the file.
+        """
+        self.flush()
+
+        lines = []
+        max_id = self.max_written_id
+        for entity in self.writer.model:
+            step_id = entity.id()
+            max_id = max(max_id, step_id)
+            if step_id not in self.written_ids:
+                lines.append(step_line(entity))
+
+        next_id = max_id + 1
+        accumulator = self.writer.ifcRelationshipAccumulator
+        owner_history = f"#{self.writer.owner_history.id()}"
+        for (rel_class, relating_id), record in accumulator.pending.items():
+            related = "(" + ",".join(f"#{related_id}" for related_id in record["Related"].keys()) + ")"
+            lines.append(
+                f"#{next_id}={rel_class.upper()}({self._step_string(self.writer.ifcGuidUtil.new(rel_class))},{owner_history},"
+                f"{self._step_string(record['Name'])},$,{related},#{relating_id});\n"
+            )
+            next_id += 1
+
+        for item_id, styles in accumulator.pending_styles.items():
+            style_refs = "(" + ",".join(f"#{style.id()}" for style in styles) + ")"
+            lines.append(f"#{next_id}=IFCSTYLEDITEM(#{item_id},{style_refs},$);\n")
+            accumulator.styled_item_ids.add(item_id)
+            next_id += 1
+
+        accumulator.pending.clear()
+        accumulator.pending_styles.clear()
+
+        self.file.writelines(lines)
+        self.written_count += len(lines)
+        self.file.write(self.footer)
+        self.file.close()
+        self.output_stats = self.file.get_stats()
+        self.file = None
+
+    def discard(self) -> None:
+        """
+        Close and delete the partially written file. The output file is not created.
+        """
+        if self.file is None:
+            return
+
+        self.file.discard()
+        self.file = None
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "writtenEntities": self.written_count,
+            "removedEntities": self.removed_count,
+            **self.output_stats,
+        }
+
+    def _update_retained_ids(self) -> None:
+        """
+        Add the entities registered since the last flush to the retained ids. Registries only grow while streaming,
+        and dicts keep the order of insertion, so only the values after the previous size of each dict are walked.
+        """
+        for name in self.writer.registry_attributes:
+            self._add_registered((name,), getattr(self.writer, name))
+
+    def _add_registered(self, path: tuple, value) -> None:
+        if not isinstance(value, dict):
+            self._add_ids(value)
+            return
+
+        seen = self.registry_sizes.get(path, 0)
+        self.registry_sizes[path] = len(value)
+
+        # Registries of registries (e.g. element types by kind) have grown inside
+        if seen and isinstance(next(iter(value.values())), dict):
+            for key, registry in value.items():
+                self._add_registered(path + (key,), registry)
+            return
+
+        for item in islice(value.values(), seen, None):
+            self._add_ids(item)
+
+    def _add_ids(self, value) -> None:
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, entity_instance):
+                self.retained_ids.add(value.id())
+            elif isinstance(value, (dict, RegistryRecord)):
+                stack.extend(value.values())
+            elif isinstance(value, (tuple, list)):
+                stack.extend(value)
+
+    @staticmethod
+    def _step_string(value: str | None) -> str:
+        """
+        Encode the string as a STEP string literal. Characters out of ASCII are written as \\X2\\ hex.
+        """
+        if value is None:
+            return "$"
+
+        encoded = []
+        for character in value.replace("\\", "\\\\").replace("'", "''"):
+            if ord(character) < 128:
+                encoded.append(character)
+            else:
+                utf16 = character.encode("utf-16-be").hex().upper()
+                encoded.append(f"\\X2\\{utf16}\\X0\\")
+
+        return "'" + "".join(encoded) + "'"
\ No newline at end of file
@@ -1,24 +1,14 @@
 from typing import Literal
-import math
+import os
+import time
 
+# ifcopenshell.api and ifcopenshell.util modules are imported where they are used.
+# Elements are created by the writer utils without them, and the skeleton is built once per process.
 import ifcopenshell
-import ifcopenshell.api
-import ifcopenshell.api.root
-import ifcopenshell.api.unit
-import ifcopenshell.api.context
-import ifcopenshell.api.project
-import ifcopenshell.api.spatial
-import ifcopenshell.api.geometry
-import ifcopenshell.api.aggregate
-import ifcopenshell.api.material
-import ifcopenshell.api.style
-import ifcopenshell.api.type
-import ifcopenshell.api.owner
-import ifcopenshell.guid
-import ifcopenshell.util.selector
-import ifcopenshell.util.representation
 from ifcopenshell import entity_instance
 
+from .registryRecords import Registry, StoreyRecord, ElementTypeRecord, MaterialRecord, MaterialLayerSetRecord, WallGeometryRecord
+
 default_units = {
     "LENGTHUNIT": None,
     "AREAUNIT": None,
@@ -116,6 +106,8 @@ supported_material_categories = [
     'earth'
 ]
 
+default_precision = 1E-6
+
 defaultUserInfo = {
     "identification":"DefaultUserId",
     "family_name":"DefaultFamilyName",
@@ -127,25 +119,6 @@ defaultOrganizationInfo = {
     "name": "DefaultOrganizationName"
 }
 
-def vector_rotate(vector: tuple[float, float], degree: float) -> tuple[float, float]:
-    radian = degree * (math.pi/180)
-    x = vector[0] * math.cos(radian) - vector[1] * math.sin(radian)
-    y = vector[0] * math.sin(radian) + vector[1] * math.cos(radian)
-    return x, y
-
-def vector_normalize(vector: tuple[float, float]) -> tuple[float, float]:
-    size = math.sqrt(vector[0]**2 + vector[1]**2)
-    return vector[0]/size, vector[1]/size
-
-def vector_add(v1: tuple[float, float], v2: tuple[float, float]):
-    return v1[0] + v2[0], v1[1] + v2[1]
-
-def vector_subtract(v1: tuple[float, float], v2: tuple[float, float]):
-    return v1[0] - v2[0], v1[1] - v2[1]
-
-def vector_multiply_scalar(vector: tuple[float, float], scalar: float) -> tuple[float, float]:
-    return vector[0] * scalar, vector[1] * scalar
-
 class UserData:
     def __init__(self, identification: str="DefaultUserId", family_name: str="DefaultFamilyName", given_name: str="DefaultGivenName"):
         self.identification = identification
@@ -158,25 +131,140 @@ class OrganizationData:
         self.name = name
 
 class IfcWriter:
-    def __init__(self, schema: Literal["IFC4","IFC2x3"]="IFC4", userinfo: dict[str, str]=defaultUserInfo, orginaizationInfo: dict[str, str]=defaultOrganizationInfo, project_name: str="Default Project", site_name: str="Default Site", building_name: str="Default Building"):
+    # Serialized skeletons by (schema, user, organization, project, site, building).
+    # The skeleton holds the entities every file starts with: owner, units, project, site, building, shared axes and contexts.
+    skeletons: dict[tuple, dict[str, any]] = {}
+
+    # Attributes which refer to the entities of skeleton
+    skeleton_attributes = [
+        "project", "owner_history", "site", "building",
+        "origin2d", "origin3d", "axis_z", "axis_z_neg",
+        "axis_x_2d", "axis_y_2d", "axis_x_2d_neg", "axis_y_2d_neg",
+        "axis_x_3d", "axis_x_3d_neg", "axis_y_3d",
+        "identity_transformation_3d", "placement_origin_3d",
+        "context", "sub_context_body", "sub_context_axis", "sub_context_box", "sub_context_footprint",
+    ]
+
+    # Registries which hold the entities shared by elements. They stay in the model when elements are removed or flushed.
+    registry_attributes = [
+        "storeys",
+        "storey_base_placement",
+        "rel_storey_to_building",
+        "material_layer_sets",
+        "materials",
+        "element_types",
+        "styles",
+        "profiles",
+        "column_representation_maps",
+        "wall_profiles",
+        "wall_geometries",
+        "geometric_representation_subContext",
+    ]
+
+    def __init__(self, schema: Literal["IFC4","IFC2x3"]="IFC4", userinfo: dict[str, str]=defaultUserInfo, orginaizationInfo: dict[str, str]=defaultOrganizationInfo, project_name: str="Default Project", site_name: str="Default Site", building_name: str="Default Building", guid_namespace: str | None=None):
         """
         Initialize an IFC file with a project, site, and building.
 
         :param project_name: Name of the project. Defaults to "Default Project".
         :param site_name: Name of the site. Defaults to "Default Site".
         :param building_name: Name of the building. Defaults to "Default Building".
+        :param guid_namespace: If given, GlobalIds are derived from this namespace and the time stamps are fixed,
+                               so the same input gives the same file. See `IfcGuidUtil`.
 
         - Creates an IFC2x3 file.
         - Defines project units (length, area, volume).
         - Sets up the basic hierarchy: Project -> Site -> Building.
+        - The hierarchy is built once per schema, user, organization and names, and cloned for the next writers.
         """
-        model = ifcopenshell.api.project.create_file(version=schema)
         self.schema = schema
+        self.precision = default_precision
+        self.guid_namespace = guid_namespace
+
+        #Owner setting
+        if 'identification' not in userinfo.keys() or 'family_name' not in userinfo.keys() or 'given_name' not in userinfo.keys() :
+            raise ValueError(f"User info should contain 'identification', 'family_name', 'given_name' values")
 
+        if 'identification' not in orginaizationInfo.keys() or 'name' not in orginaizationInfo.keys():
+            raise ValueError(f"Organization info should contain 'identification', 'name', values")
+
+        registered_person = UserData(userinfo['identification'], userinfo['family_name'], userinfo['given_name'])
+        self.users: dict[str, UserData] = {
+            registered_person.identification: registered_person
+        }
+        self.units = default_units
+
+        self.skeleton_key = (
+            schema,
+            tuple(sorted(userinfo.items())),
+            tuple(sorted(orginaizationInfo.items())),
+            project_name,
+            site_name,
+            building_name
+        )
+
+        self._create_utils()
+        skeleton = IfcWriter.skeletons.get(self.skeleton_key)
+        if skeleton is None:
+            self._build_skeleton(userinfo, orginaizationInfo, project_name, site_name, building_name)
+            IfcWriter.skeletons[self.skeleton_key] = {
+                "Text": self.model.to_string(),
+                "Ids": {name: getattr(self, name).id() for name in IfcWriter.skeleton_attributes},
+                "MaxId": max(entity.id() for entity in self.model)
+            }
+            if self.ifcGuidUtil.deterministic:
+                self._renew_skeleton_guids()
+        else:
+            self._clone_skeleton(skeleton)
+
+        self._create_registries()
+
+    @classmethod
+    def open(cls, input_file: str, guid_namespace: str | None = None) -> "IfcWriter":
+        """
+        Open an IFC file written by this writer, to add or remove elements.
+        The skeleton attributes, registries and emitted relationships are indexed from the model (see `IfcModelIndexer`).
+        The writer has no skeleton, so it cannot be reset or built in parallel.
+        :param input_file: Path to IFC file.
+        :param guid_namespace: See `__init__`. The GlobalIds in the file are not repeated by the new entities.
+        """
+        from .utils.ifcModelIndexer import IfcModelIndexer
+
+        writer = cls.__new__(cls)
+        writer.model = ifcopenshell.open(input_file)
+        writer.schema = writer.model.schema
+        writer.precision = default_precision
+        writer.users = {}
+        writer.units = default_units
+        writer.skeleton_key = None
+        writer.guid_namespace = guid_namespace
+
+        writer._create_utils()
+        writer._create_registries()
+        IfcModelIndexer(writer).index()
+
+        if writer.ifcGuidUtil.deterministic:
+            writer.ifcGuidUtil.reserve(root.GlobalId for root in writer.model.by_type("IfcRoot"))
+
+        return writer
+
+    def reset(self) -> None:
+        """
+        Restore the writer to the skeleton. All storeys, elements and registries are discarded.
+        """
+        self._create_utils()
+        self._clone_skeleton(IfcWriter.skeletons[self.skeleton_key])
+        self._create_registries()
+
+    def _create_utils(self) -> None:
         # Import utils
         from .utils.ifcResourceEntityUtils import IfcResourceEntityUtil
         from .utils.ifcCoreDataUtils import IfcCoreDataUtil
         from .utils.ifcSharedElementDataUtil import IfcSharedElementDataUtil
+        from .utils.ifcRelationshipAccumulator import IfcRelationshipAccumulator
+        from .utils.ifcGuidUtil import IfcGuidUtil
+
+        ifcGuidUtil = IfcGuidUtil(self)
+        self.ifcGuidUtil = ifcGuidUtil
 
         ifcResourceEntityUtil = IfcResourceEntityUtil(self)
         self.ifcResourceEntityUtil = ifcResourceEntityUtil
@@ -187,26 +275,88 @@ class IfcWriter:
         ifcSharedElementDataUtil = IfcSharedElementDataUtil(self)
         self.ifcSharedElementDataUtil = ifcSharedElementDataUtil
 
-        application = ifcopenshell.api.owner.add_application(model)
+        ifcRelationshipAccumulator = IfcRelationshipAccumulator(self)
+        self.ifcRelationshipAccumulator = ifcRelationshipAccumulator
+
+    def _create_registries(self) -> None:
+        # Step id : Key path of the registry entry holding the entity. Maintained by the registries on insert.
+        index: dict[int, tuple] = {}
+        self.registry_index = index
+
+        self.storeys: dict[str, StoreyRecord] = Registry(index, ("storeys", ))
+        self.storey_base_placement: entity_instance | None = None
+        self.rel_storey_to_building: entity_instance | None = None
+        self.material_layer_sets: dict[str, MaterialLayerSetRecord] = Registry(index, ("material_layer_sets", ))
+        self.materials: dict[str, MaterialRecord] = Registry(index, ("materials", ))
+        self.element_types: dict[str, dict[str, ElementTypeRecord]] = Registry(index, ("element_types", ), {
+            kind: Registry(index, ("element_types", kind))
+            for kind in ("wall_types", "column_types", "beam_types", "ea_single_types", "ea_double_types")
+        })
+        self.styles = Registry(index, ("styles", ))
+        self.profiles: dict[str, entity_instance] = Registry(index, ("profiles", ))
+        self.column_representation_maps: dict[tuple[int, ...], entity_instance] = Registry(index, ("column_representation_maps", ))
+        self.wall_profiles: dict[tuple[int, ...], entity_instance] = Registry(index, ("wall_profiles", ))
+        self.wall_geometries: dict[tuple[int, ...], WallGeometryRecord] = Registry(index, ("wall_geometries", ))
+        self.geometric_representation_subContext: dict[str, entity_instance] = Registry(index, ("geometric_representation_subContext", ))
+
+    def _clone_skeleton(self, skeleton: dict[str, any]) -> None:
+        """
+        Load the model from the serialized skeleton. Rooted entities get new GlobalIds, so each file stays unique.
+        """
+        model = ifcopenshell.file.from_string(skeleton["Text"])
+        self.model = model
 
-        #Owner setting
-        if 'identification' not in userinfo.keys() or 'family_name' not in userinfo.keys() or 'given_name' not in userinfo.keys() :
-            raise ValueError(f"User info should contain 'identification', 'family_name', 'given_name' values")
+        for name, step_id in skeleton["Ids"].items():
+            setattr(self, name, model.by_id(step_id))
 
-        if 'identification' not in orginaizationInfo.keys() or 'name' not in orginaizationInfo.keys():
-            raise ValueError(f"Organization info should contain 'identification', 'name', values")
+        self._renew_skeleton_guids()
+        self.ifcResourceEntityUtil.seed_interning()
+
+    def _renew_skeleton_guids(self) -> None:
+        for root in self.model.by_type("IfcRoot"):
+            root.GlobalId = self.ifcGuidUtil.new("Skeleton")
+
+        self.owner_history.CreationDate = 0 if self.ifcGuidUtil.deterministic else int(time.time())
+
+    def stabilize_header(self) -> None:
+        """
+        Fix the time stamps of file header and all owner histories in deterministic mode, so the same input gives the same file.
+        """
+        if self.ifcGuidUtil.deterministic:
+            self.model.header.file_name.time_stamp = "1970-01-01T00:00:00"
+            for owner_history in self.model.by_type("IfcOwnerHistory"):
+                owner_history.CreationDate = 0
+                if owner_history.LastModifiedDate is not None:
+                    owner_history.LastModifiedDate = 0
+
+    def _build_skeleton(
+        self,
+        userinfo: dict[str, str],
+        orginaizationInfo: dict[str, str],
+        project_name: str,
+        site_name: str,
+        building_name: str
+    ) -> None:
+        import ifcopenshell.api.aggregate
+        import ifcopenshell.api.owner
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+
+        model = ifcopenshell.api.project.create_file(version=self.schema)
+        ifcResourceEntityUtil = self.ifcResourceEntityUtil
+
+        application = ifcopenshell.api.owner.add_application(model)
 
         person = ifcopenshell.api.owner.add_person(model, identification=userinfo['identification'], family_name=userinfo['family_name'], given_name=userinfo['given_name'])
-        registered_person = UserData(userinfo['identification'], userinfo['family_name'], userinfo['given_name'])
         organization = ifcopenshell.api.owner.add_organisation(model, identification=orginaizationInfo['identification'], name=orginaizationInfo['name'])
         user = ifcopenshell.api.owner.add_person_and_organisation(model, person=person, organisation=organization)
         project = ifcopenshell.api.root.create_entity(model, ifc_class="IfcProject", name=project_name)
 
-        ownerhistory = ifcopenshell.util.selector.filter_elements(model, "IfcOwnerHistory")
-        self.owner_history = list(ownerhistory)[0]
+        self.owner_history = model.by_type("IfcOwnerHistory")[0]
 
         # Define Units
-        units = default_units
+        units = self.units
         unit_instances = []
         for key in units.keys():
             if key not in supported_units:
@@ -224,7 +374,8 @@ class IfcWriter:
                     unit = ifcopenshell.api.unit.add_si_unit(model, unit_type=key)
                     unit_instances.append(unit)
 
-        ifcopenshell.api.unit.assign_unit(model, units=unit_instances)
+        # Assigned as a list, not by `ifcopenshell.api.unit.assign_unit`, so the units are in the same order in every run
+        project.UnitsInContext = model.create_entity(type="IfcUnitAssignment", Units=unit_instances)
 
         # Define site and building
         site = ifcopenshell.api.root.create_entity(model, ifc_class="IfcSite", name=site_name)
@@ -232,31 +383,11 @@ class IfcWriter:
         ifcopenshell.api.aggregate.assign_object(model, relating_object=project, products=[site])
         ifcopenshell.api.aggregate.assign_object(model, relating_object=site, products=[building])
 
-
         # Save properties
         self.model = model
         self.project = project
-        self.units = units
         self.site = site
         self.building = building
-        self.users: dict[str, UserData] = {
-            registered_person.identification: registered_person
-        }
-
-        self.storeys:dict[str, dict[str, any]] = {}
-        self.elements = {}
-        self.material_layer_sets: dict[str, dict[str, entity_instance]] = {}
-        self.materials: dict[str, dict[str: entity_instance]] = {}
-        self.element_types: dict[str, dict[str, dict[str, any]]] = {
-            "wall_types" : {},
-            "column_types" : {},
-            "beam_types" : {},
-            "ea_single_types": {},
-            "ea_double_types": {},
-        }
-        self.styles = {}
-        self.profiles: dict[str, entity_instance] = {}
-        self.geometric_representation_subContext: dict[str, entity_instance] = {}
 
         origin2d = ifcResourceEntityUtil.create_cartesian_point_2d((0., 0.))
         self.origin2d = origin2d
@@ -291,11 +422,17 @@ class IfcWriter:
         axis_y_3d = ifcResourceEntityUtil.create_direction_3d((0., 1., 0.))
         self.axis_y_3d = axis_y_3d
 
+        identity_transformation_3d = ifcResourceEntityUtil.create_cartesian_transformation_operator3d()
+        self.identity_transformation_3d = identity_transformation_3d
+
+        placement_origin_3d = ifcResourceEntityUtil.create_axis2placement_3d(location=origin3d)
+        self.placement_origin_3d = placement_origin_3d
+
         # Define context, sub contexts
         context = ifcResourceEntityUtil.create_geometric_representation_context(
             coordinate_space_dimension=3,
             context_type="Model",
-            precision=1E-6
+            precision=self.precision
         )
 
         sub_context_axis = ifcResourceEntityUtil.create_geometric_representation_sub_context(
@@ -353,13 +490,16 @@ class IfcWriter:
         material_set: entity_instance = material_set_creation['MaterialSet']
         total_thickness: float = material_set_creation['TotalThickness']
 
+        import ifcopenshell.api.material
+        import ifcopenshell.api.root
+
         # Create the IfcWallType entity
-        wall_type = {"entity" : ifcopenshell.api.root.create_entity(self.model, ifc_class="IfcWallType", name=name), "thickness" : total_thickness}
+        wall_type = ElementTypeRecord(ifcopenshell.api.root.create_entity(self.model, ifc_class="IfcWallType", name=name), thickness=total_thickness)
         if wall_type_description:
-            wall_type["entity"].Description = wall_type_description
+            wall_type.entity.Description = wall_type_description
 
         # Assign material to the wall type, if provided
-        ifcopenshell.api.material.assign_material(self.model, products=[wall_type["entity"]], material=material_set)
+        ifcopenshell.api.material.assign_material(self.model, products=[wall_type.entity], material=material_set)
 
         # Return the created wall type entity
         self.element_types['wall_types'][name] = wall_type
@@ -374,24 +514,36 @@ class IfcWriter:
         height: float,
         wall_type_name: str
     ) -> entity_instance:
-        if self.storeys[target_storey] is None:
+        if target_storey not in self.storeys:
             raise ValueError(f'The storey {target_storey} does not exist.')
 
-        storey = self.storeys[target_storey]
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.root
+        import ifcopenshell.api.spatial
+        import ifcopenshell.api.type
+
+        storey = self.storeys[target_storey].entity
         wall = ifcopenshell.api.root.create_entity(self.model, ifc_class="IfcWall")
 
         # Assign wall type
         if wall_type_name not in self.element_types['wall_types']:
             raise ValueError(f'Wall type "{wall_type_name}" is not defined.')
-        target_wall_type: entity_instance = self.element_types['wall_types'][wall_type_name]
-        ifcopenshell.api.type.assign_type(self.model, related_objects=[wall], relating_type=target_wall_type['entity'])
+        target_wall_type = self.element_types['wall_types'][wall_type_name]
+        ifcopenshell.api.type.assign_type(self.model, related_objects=[wall], relating_type=target_wall_type.entity)
 
-        # Convert vector
-        thickness = target_wall_type['thickness']
-        direction = vector_normalize((p2[0] - p1[0], p2[1] - p1[1]))
-        rotated_direction = vector_rotate(direction, degree=-90)
-        converted_p1 = vector_add(p1, vector_multiply_scalar(rotated_direction, 0.5 * thickness))
-        converted_p2 = vector_add(p2, vector_multiply_scalar(rotated_direction, 0.5 * thickness))
+        # Convert vector. A single wall is offset with scalars, batches of walls by `IfcSharedElementDataUtil.vectorize_segments`.
+        from .utils.simpleVectorUtils import SimpleVectorUtil
+
+        vector_util = SimpleVectorUtil()
+        thickness = target_wall_type.thickness
+        delta = vector_util.vector_subtract(p2, p1)
+        if vector_util.vector_size(delta) <= self.precision:
+            raise ValueError("Zero Length Error: The start and end points are the same.")
+
+        rotated_direction = vector_util.vector_rotate(vector_util.vector_normalize(delta), degree=-90)
+        offset = vector_util.vector_multiply_scalar(rotated_direction, 0.5 * thickness)
+        converted_p1 = vector_util.vector_add(p1, offset)
+        converted_p2 = vector_util.vector_add(p2, offset)
 
         # Create representation
         ifcopenshell.api.geometry.edit_object_placement(self.model, product=wall)
@@ -415,17 +567,107 @@ class IfcWriter:
 
         return wall
 
+    def get_registered_ids(self) -> set[int]:
+        """
+        Step ids of the entities in the registries. Use `is_registered` for a single entity.
+        """
+        registered_ids = set(self.registry_index.keys())
+        for entity in (self.storey_base_placement, self.rel_storey_to_building):
+            if entity is not None:
+                registered_ids.add(entity.id())
+
+        return registered_ids
+
+    def is_registered(self, step_id: int) -> bool:
+        """
+        Whether the entity of the step id is in the registries, looked up in `registry_index`.
+        """
+        if step_id in self.registry_index:
+            return True
+
+        return any(entity is not None and entity.id() == step_id for entity in (self.storey_base_placement, self.rel_storey_to_building))
+
+    def remove_elements(self, elements: list[entity_instance]) -> int:
+        """
+        Remove elements with their relationship memberships and the entities used only by them. See `IfcElementRemover`.
+        :return: Count of removed entities.
+        """
+        from .utils.ifcElementRemover import IfcElementRemover
+
+        return IfcElementRemover(self).remove(elements)
+
+    def max_step_id(self) -> int:
+        """
+        Largest step id in the model. Entities created later have larger ids.
+        """
+        get_max_id = getattr(self.model, "get_max_id", None)
+        if get_max_id is not None:
+            return get_max_id()
+
+        # IfcOpenShell before 0.8 has it only on the wrapped file
+        return self.model.wrapped_data.getMaxId()
+
+    def remove_created_after(self, step_id: int) -> int:
+        """
+        Remove the entities created after the step id, e.g. by a failed element, so it can be built again without duplicates.
+        See `IfcElementRemover.remove_created_after`.
+        :return: Count of removed entities.
+        """
+        from .utils.ifcElementRemover import IfcElementRemover
+
+        return IfcElementRemover(self).remove_created_after(step_id)
+
     def query_test(self):
+        import ifcopenshell.util.selector
+
         query = "IfcBuildingStorey"
         filtered_elements = list(ifcopenshell.util.selector.filter_elements(self.model, query=query))
         result_dict = {item.Name: item for item in filtered_elements}
 
         return result_dict
 
-    def save(self, output_file):
+    def save(self, output_file, compression: Literal["ifczip", "gzip"] | None = None, compression_level: int | None = None) -> dict[str, any]:
         """
-        Save as IFC File
+        Save as IFC File. Relationships reserved while building are emitted before writing.
+        Compressed files are serialized into the compressor chunk by chunk of entities,
+        so the serialized model is never held in memory at once, and only compressed bytes go to the output location.
+        The file is written to a partial file first and renamed, so a failure does not leave a half-written file.
         :param output_file: File path to save IFC file
+        :param compression: "ifczip" or "gzip". If None, chosen by the extension of file (".ifczip", ".gz"), or not compressed.
+        :param compression_level: Deflate level. See `stepOutputFile.default_compression_level`.
+        :return: {"compression", "rawBytes", "fileBytes"}
         """
-        self.model.write(output_file)
+        from .stepOutputFile import StepOutputFile, output_compression, default_compression_level, partial_path
+
+        self.ifcRelationshipAccumulator.flush()
+        self.stabilize_header()
+
+        compression = output_compression(output_file, compression)
+        if compression is None:
+            partial_file = partial_path(output_file)
+            try:
+                self.model.write(partial_file)
+                os.replace(partial_file, output_file)
+            except BaseException:
+                if os.path.exists(partial_file):
+                    os.remove(partial_file)
+                raise
+
+            file_bytes = os.path.getsize(output_file)
+            return {"compression": None, "rawBytes": file_bytes, "fileBytes": file_bytes}
+
+        output = StepOutputFile(
+            output_file,
+            compression=compression,
+            compression_level=default_compression_level if compression_level is None else compression_level
+        )
+        try:
+            output.write_model(self.model)
+        except BaseException:
+            output.discard()
+            raise
+
+        output.close()
+
+        return output.get_stats()
         # print(f"IFC file saved: {output_file}"),
@@ -0,0 +1,116 @@
+from ifcopenshell import entity_instance
+
+class RegistryRecord:
+    """
+    Record in a registry of `IfcWriter`. Records have slots instead of a dict, so each holds only its references.
+    """
+    __slots__ = ()
+
+    def values(self) -> list:
+        return [getattr(self, name) for name in self.__slots__]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Registry(dict):
+    """
+    Registry of `IfcWriter`. The step ids of the entities set into it are indexed to their key path in `index`,
+    which all registries of a writer share, so a registered entity is found without walking the registries.
+    Registries only grow, so the index is maintained on insert.
+    """
+    def __init__(self, index: dict[int, tuple], path: tuple, items: dict | None = None):
+        """
+        :param index: Step id : Key path of the registry entry holding the entity. See `IfcWriter.registry_index`.
+        :param path: Key path of this registry, e.g. ("element_types", "wall_types").
+        :param items: Initial entries.
+        """
+        super().__init__()
+        self.index = index
+        self.path = path
+        for key, value in (items or {}).items():
+            self[key] = value
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        path = self.path + (key, )
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, entity_instance):
+                self.index[value.id()] = path
+            elif isinstance(value, Registry):
+                # Indexed by its own inserts
+                continue
+            elif isinstance(value, (dict, RegistryRecord)):
+                stack.extend(value.values())
+            elif isinstance(value, (tuple, list)):
+                stack.extend(value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+class StoreyRecord(RegistryRecord):
+    __slots__ = ("entity", "object_placement", "elevation")
+
+    def __init__(self, entity: entity_instance, object_placement: entity_instance, elevation: float):
+        """
+        :param entity: Entity of IfcBuildingStorey
+        :param object_placement: Placement of storey, which the placements of its elements are relative to.
+        :param elevation: Elevation of storey.
+        """
+        self.entity = entity
+        self.object_placement = object_placement
+        self.elevation = elevation
+
+class ElementTypeRecord(RegistryRecord):
+    __slots__ = ("entity", "thickness")
+
+    def __init__(self, entity: entity_instance, thickness: float | None = None):
+        """
+        :param entity: Entity of IfcTypeObject
+        :param thickness: Total thickness of material layers, for wall types defined with layers.
+        """
+        self.entity = entity
+        self.thickness = thickness
+
+class MaterialRecord(RegistryRecord):
+    __slots__ = ("material", "definition")
+
+    def __init__(self, material: entity_instance, definition: entity_instance | None = None):
+        """
+        :param material: Entity of IfcMaterial
+        :param definition: IfcMaterialDefinitionRepresentation of the material, if it has a style.
+        """
+        self.material = material
+        self.definition = definition
+
+class MaterialLayerSetRecord(RegistryRecord):
+    __slots__ = ("material_set", "usage", "style_assignment")
+
+    def __init__(self, material_set: entity_instance, usage: entity_instance, style_assignment: entity_instance):
+        """
+        :param material_set: Entity of IfcMaterialLayerSet
+        :param usage: IfcMaterialLayerSetUsage of the set.
+        :param style_assignment: IfcPresentationStyleAssignment of the surface styles of layers.
+        """
+        self.material_set = material_set
+        self.usage = usage
+        self.style_assignment = style_assignment
+
+class WallGeometryRecord(RegistryRecord):
+    __slots__ = ("extrusion", "axis")
+
+    def __init__(self, extrusion: entity_instance, axis: entity_instance):
+        """
+        :param extrusion: IfcExtrudedAreaSolid of wall body.
+        :param axis: IfcPolyline of wall axis.
+        """
+        self.extrusion = extrusion
+        self.axis = axis
\ No newline at end of file
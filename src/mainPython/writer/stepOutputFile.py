@@ -0,0 +1,160 @@
+import gzip
+import os
+import zipfile
+from typing import Literal
+
+# Compression by extension of output file
+compression_extensions = {
+    ".ifczip": "ifczip",
+    ".gz": "gzip",
+}
+
+# Entities serialized between writes of `StepOutputFile.write_model`
+write_chunk_entities = 10000
+
+# False if `entity_instance.to_string` has no `valid_spf` keyword (ifcopenshell 0.9), where it writes valid SPF by default
+valid_spf_keyword = True
+
+# STEP text is repetitive, so the fastest deflate level compresses it nearly as well as the default level, several times faster.
+default_compression_level = 1
+
+def output_compression(output_file: str, compression: str | None = None) -> Literal["ifczip", "gzip"] | None:
+    """
+    Compression of output file. If not given, it is chosen by the extension of file.
+    """
+    if compression is not None:
+        if compression not in ("ifczip", "gzip"):
+            raise ValueError(f"Not supported compression '{compression}'.")
+        return compression
+
+    for extension, extension_compression in compression_extensions.items():
+        if output_file.lower().endswith(extension):
+            return extension_compression
+
+    return None
+
+def partial_path(output_file: str) -> str:
+    """
+    Path the output file is written to, until it is complete.
+    It is renamed to the output file at once, so a failed or cancelled job does not leave a half-written file.
+    """
+    base, extension = os.path.splitext(output_file)
+    return f"{base}.{os.getpid()}.partial{extension}"
+
+def step_line(entity) -> str:
+    """
+    STEP line of an entity of model, e.g. "#1=IFCWALL(...);\\n".
+    """
+    global valid_spf_keyword
+    if valid_spf_keyword:
+        try:
+            return entity.to_string(valid_spf=True) + ";\n"
+        except TypeError:
+            valid_spf_keyword = False
+
+    return entity.to_string() + ";\n"
+
+def step_header(model) -> str:
+    """
+    Text of STEP file until the entities of DATA section.
+    """
+    header = model.header
+    lines = ["ISO-10303-21;\n", "HEADER;\n"]
+    for header_entity in (header.file_description, header.file_name, header.file_schema):
+        lines.append(header_entity.to_string() + ";\n")
+    lines.append("ENDSEC;\n")
+    lines.append("DATA;\n")
+    return "".join(lines)
+
+step_footer = "ENDSEC;\nEND-ISO-10303-21;\n"
+
+class StepOutputFile:
+    """
+    Text output of STEP file, compressed while it is written.
+    - None: Plain STEP file.
+    - "ifczip": Zip archive with a STEP file named by the output file.
+    - "gzip": Gzip of STEP file.
+    The count of raw (uncompressed) bytes is kept, so the compression can be reported.
+    The file is written to `partial_path` and renamed to the output file by `close`.
+    """
+    def __init__(
+        self,
+        output_file: str,
+        compression: Literal["ifczip", "gzip"] | None = None,
+        compression_level: int = default_compression_level
+    ):
+        self.output_file = output_file
+        self.partial_file = partial_path(output_file)
+        self.compression = compression
+        self.raw_bytes = 0
+
+        self.archive: zipfile.ZipFile | None = None
+        self.raw_file = None
+        if compression == "ifczip":
+            self.archive = zipfile.ZipFile(self.partial_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compression_level)
+            member_name = os.path.splitext(os.path.basename(output_file))[0] + ".ifc"
+            self.stream = self.archive.open(member_name, "w", force_zip64=True)
+        elif compression == "gzip":
+            # Named by the output file in the gzip header, not by the partial file
+            self.raw_file = open(self.partial_file, "wb")
+            self.stream = gzip.GzipFile(filename=os.path.basename(output_file), mode="wb", compresslevel=compression_level, fileobj=self.raw_file)
+        else:
+            self.stream = open(self.partial_file, "wb")
+
+    def write(self, text: str) -> None:
+        data = text.encode("ascii")
+        self.raw_bytes += len(data)
+        self.stream.write(data)
+
+    def writelines(self, lines: list[str]) -> None:
+        self.write("".join(lines))
+
+    def write_model(self, model) -> None:
+        """
+        Write a model as a STEP file, chunk by chunk of entities, so its text is not held in memory at once.
+        """
+        self.write(step_header(model))
+
+        # Iteration of model is not in the order of step ids on IfcOpenShell 0.9, so they are sorted as `file.write` does
+        entity_names = getattr(model, "entity_names", None) or model.wrapped_data.entity_names
+        lines = []
+        for step_id in sorted(entity_names()):
+            lines.append(step_line(model.by_id(step_id)))
+            if len(lines) >= write_chunk_entities:
+                self.writelines(lines)
+                lines.clear()
+
+        self.writelines(lines)
+        self.write(step_footer)
+
+    def close(self) -> None:
+        """
+        Finish the file, and rename it to the output file.
+        """
+        self._close_streams()
+        os.replace(self.partial_file, self.output_file)
+
+    def discard(self) -> None:
+        """
+        Close and delete the partial file. The output file is not touched.
+        """
+        self._close_streams()
+        if os.path.exists(self.partial_file):
+            os.remove(self.partial_file)
+
+    def _close_streams(self) -> None:
+        self.stream.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.raw_file is not None:
+            self.raw_file.close()
+
+    def get_stats(self) -> dict[str, any]:
+        """
+        Sizes of file. Use after closing.
+        """
+        return {
+            "compression": self.compression,
+            "rawBytes": self.raw_bytes,
+            "fileBytes": os.path.getsize(self.output_file),
+        }
\ No newline at end of file
@@ -1,4 +1,9 @@
 from .ifcCoreDataUtils import IfcCoreDataUtil
 from .ifcSharedElementDataUtil import IfcSharedElementDataUtil
 from .ifcResourceEntityUtils import IfcResourceEntityUtil
-from .simpleVectorUtils import SimpleVectorUtil
\ No newline at end of file
+from .simpleVectorUtils import SimpleVectorUtil
+from .ifcRelationshipAccumulator import IfcRelationshipAccumulator
+from .ifcModelMerger import IfcModelMerger
+from .ifcModelIndexer import IfcModelIndexer
+from .ifcElementRemover import IfcElementRemover
+from .ifcGuidUtil import IfcGuidUtil
\ No newline at end of file
@@ -1,10 +1,13 @@
+from typing import TYPE_CHECKING
 from ifcopenshell import entity_instance
-import ifcopenshell.guid
-import ifcopenshell.util.selector
-from dist.mainPython.writer.ifcWriter import IfcWriter
+
+from ..registryRecords import StoreyRecord
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
 
 class IfcCoreDataUtil:
-    def __init__(self, ifc_writer: IfcWriter):
+    def __init__(self, ifc_writer: "IfcWriter"):
         self.writer = ifc_writer
 
     def create_storey(
@@ -18,47 +21,98 @@ class IfcCoreDataUtil:
         if name in self.writer.storeys.keys():
             raise ValueError(f"Duplication Error : Storey '{name}' already exists.")
 
-        # Create default plane
-        placement_rel_to = self.writer.ifcResourceEntityUtil.create_local_placement(
-            relative_placement=self.writer.ifcResourceEntityUtil.create_axis2placement_2d(location=self.writer.origin2d),
-            placement_rel_to=self.writer.ifcResourceEntityUtil.create_local_placement(relative_placement=self.writer.ifcResourceEntityUtil.create_axis2placement_2d(location=self.writer.origin2d))
+        storey = self._create_storey_entity(
+            name=name,
+            elevation=elevation,
+            description=description,
+            object_type=object_type,
+            long_name=long_name
         )
 
+        # Relating story to building
+        self.aggregate_storeys([storey])
+
+        return storey
+
+    def create_storeys(
+        self,
+        storeys: dict[str, float]
+    ) -> list[entity_instance]:
+        """
+        Create several storeys at once, and relate them to the building with a single aggregation.
+        Example:
+            create_storeys({'1F': 0.0, '2F': 3.0, '3F': 6.0})
+        :param storeys: Elevations of storeys by name.
+        :return: Created IfcBuildingStorey entities, in the given order.
+        """
+        for name in storeys.keys():
+            if name in self.writer.storeys.keys():
+                raise ValueError(f"Duplication Error : Storey '{name}' already exists.")
+
+        created_storeys = [
+            self._create_storey_entity(name=name, elevation=elevation)
+            for name, elevation in storeys.items()
+        ]
+
+        self.aggregate_storeys(created_storeys)
+
+        return created_storeys
+
+    def aggregate_storeys(
+        self,
+        storeys: list[entity_instance]
+    ) -> entity_instance:
+        """
+        Relate storeys to the building. The aggregation is kept on the writer, so it is not looked up from the model.
+        :param storeys: Set of IfcBuildingStorey
+        """
+        rel_aggregates = self.writer.rel_storey_to_building
+        if rel_aggregates is None:
+            rel_aggregates = self.create_rel_aggregates(
+                name="RelStoreyToBuilding",
+                relating_object=self.writer.building,
+                related_objects=storeys
+            )
+            self.writer.rel_storey_to_building = rel_aggregates
+        else:
+            rel_aggregates.RelatedObjects = tuple(rel_aggregates.RelatedObjects) + tuple(storeys)
+
+        return rel_aggregates
+
+    def _create_storey_entity(
+        self,
+        name: str,
+        elevation: float,
+        description: str|None=None,
+        object_type: str|None=None,
+        long_name: str|None=None,
+    ) -> entity_instance:
+        # Create default plane, shared by all storeys
+        placement_rel_to = self.writer.storey_base_placement
+        if placement_rel_to is None:
+            placement_rel_to = self.writer.ifcResourceEntityUtil.create_local_placement(
+                relative_placement=self.writer.ifcResourceEntityUtil.create_axis2placement_2d(location=self.writer.origin2d),
+                placement_rel_to=self.writer.ifcResourceEntityUtil.create_local_placement(relative_placement=self.writer.ifcResourceEntityUtil.create_axis2placement_2d(location=self.writer.origin2d))
+            )
+            self.writer.storey_base_placement = placement_rel_to
+
         relative_placement = self.writer.ifcResourceEntityUtil.create_axis2placement_3d(location=self.writer.ifcResourceEntityUtil.create_cartesian_point_3d((0., 0., elevation)))
 
         # Create storey
         object_placement = self.writer.ifcResourceEntityUtil.create_local_placement(relative_placement=relative_placement, placement_rel_to=placement_rel_to)
         storey = self.writer.model.create_entity(
             type="IfcBuildingStorey",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBuildingStorey"),
             OwnerHistory=self.writer.owner_history,
             Name=name,
             Description=description,
             ObjectType=object_type,
-            ObjectPlacement=self.writer.ifcResourceEntityUtil.create_local_placement(relative_placement=relative_placement, placement_rel_to=placement_rel_to),
+            ObjectPlacement=object_placement,
             LongName=long_name,
             Elevation=elevation
         )
 
-        # Relating story to building
-        filtered_elements = list(ifcopenshell.util.selector.filter_elements(self.writer.model, query="IfcRelAggregates, Name=RelStoreyToBuilding"))
-        if len(filtered_elements) == 0:
-            self.create_rel_aggregates(
-                name="RelStoreyToBuilding",
-                relating_object=self.writer.building,
-                related_objects=[storey]
-            )
-        else:
-            rel_aggregates = filtered_elements[0]
-            existing_storeys = list(rel_aggregates.RelatedObjects)
-            existing_storeys.append(storey)
-            rel_aggregates.RelatedObjects = tuple(existing_storeys)
-
-        self.writer.storeys[name] = {
-            "Entity": storey,
-            "ObjectPlacement": object_placement,
-            "Elevation": elevation
-        }
+        self.writer.storeys[name] = StoreyRecord(storey, object_placement, elevation)
 
         return storey
 
@@ -79,6 +133,8 @@ class IfcCoreDataUtil:
 
         return self.writer.model.create_entity(
             type="IfcRelAggregates",
+            GlobalId=self.writer.ifcGuidUtil.new("IfcRelAggregates"),
+            OwnerHistory=self.writer.owner_history,
             Name=name,
             RelatingObject=relating_object,
             RelatedObjects=related_objects
@@ -111,7 +167,7 @@ class IfcCoreDataUtil:
 
         return self.writer.model.create_entity(
             type="IfcRelContainedInSpatialStructure",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcRelContainedInSpatialStructure"),
             OwnerHistory=owner_history,
             Name=name,
             Description=description,
@@ -0,0 +1,184 @@
+from typing import TYPE_CHECKING
+from ifcopenshell import entity_instance
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
+# Attributes of relationships which list the related entities
+related_attributes = ("RelatedElements", "RelatedObjects")
+
+class IfcElementRemover:
+    """
+    Removes elements from the writer's model, with the entities used only by them.
+    - Relationships: The elements are removed from the related entities, and emptied relationships are removed.
+    - Subgraph: Placements, representations and items reached from the elements are removed,
+      unless they are also used by entities out of the subgraph, or held by the registries and skeleton of the writer.
+    - Styled items of the removed representation items are removed.
+    The work is proportional to the subgraphs of removed elements, not to the model or its registries.
+    """
+    def __init__(self, ifc_writer: "IfcWriter"):
+        self.writer = ifc_writer
+
+    def remove(self, elements: list[entity_instance]) -> int:
+        """
+        :param elements: Entities of IfcElement in the writer's model.
+        :return: Count of removed entities.
+        """
+        if not elements:
+            return 0
+
+        element_ids = {element.id() for element in elements}
+        self.remove_memberships(elements, element_ids)
+
+        model = self.writer.model
+        is_registered = self.writer.is_registered
+        skeleton_ids = self._skeleton_ids()
+
+        # Subgraph of the elements, not descending into the protected entities
+        subgraph: dict[int, entity_instance] = {}
+        stack: list = list(elements)
+        while stack:
+            value = stack.pop()
+            if isinstance(value, (tuple, list)):
+                stack.extend(value)
+                continue
+
+            if not isinstance(value, entity_instance):
+                continue
+
+            step_id = value.id()
+            if not step_id or step_id in subgraph or step_id in skeleton_ids or is_registered(step_id):
+                continue
+
+            subgraph[step_id] = value
+            stack.extend(value)
+
+        inverses: dict[int, list[entity_instance]] = {
+            step_id: list(model.get_inverse(entity)) for step_id, entity in subgraph.items()
+        }
+
+        # Styled items of the items in subgraph
+        for step_id, entity in list(subgraph.items()):
+            if not entity.is_a("IfcRepresentationItem"):
+                continue
+
+            for inverse in inverses[step_id]:
+                if inverse.is_a("IfcStyledItem") and inverse.id() not in subgraph:
+                    subgraph[inverse.id()] = inverse
+                    inverses[inverse.id()] = list(model.get_inverse(inverse))
+
+        # Entities used out of the subgraph are kept, and so are the entities they use.
+        changed = True
+        while changed:
+            changed = False
+            for step_id in list(subgraph.keys()):
+                if step_id in element_ids:
+                    continue
+
+                if any(inverse.id() not in subgraph for inverse in inverses[step_id]):
+                    del subgraph[step_id]
+                    changed = True
+
+        resource_util = self.writer.ifcResourceEntityUtil
+        accumulator = self.writer.ifcRelationshipAccumulator
+        model.batch()
+        for step_id in sorted(subgraph.keys(), reverse=True):
+            entity = subgraph[step_id]
+            if entity.is_a("IfcStyledItem") and entity.Item is not None:
+                accumulator.styled_item_ids.discard(entity.Item.id())
+
+            resource_util.forget_interned(entity)
+            accumulator.pending_styles.pop(step_id, None)
+            model.remove(entity)
+
+        model.unbatch()
+        return len(subgraph)
+
+    def remove_created_after(self, step_id: int) -> int:
+        """
+        Remove the entities created after the step id. Elements are removed by `remove`, then the other new entities
+        nothing refers to (e.g. a placement created before the element failed). New entities in the registries are kept.
+        :param step_id: Largest step id before the entities were created. See `IfcWriter.max_step_id`.
+        :return: Count of removed entities.
+        """
+        new_entities = self._entities_after(step_id)
+        removed_count = self.remove([entity for entity in new_entities if entity.is_a("IfcElement")])
+
+        is_registered = self.writer.is_registered
+        resource_util = self.writer.ifcResourceEntityUtil
+        accumulator = self.writer.ifcRelationshipAccumulator
+        model = self.writer.model
+
+        # Descending, so the entities used only by a removed one are free when they are reached
+        for entity in reversed(self._entities_after(step_id)):
+            if is_registered(entity.id()) or model.get_inverse(entity):
+                continue
+
+            resource_util.forget_interned(entity)
+            accumulator.pending_styles.pop(entity.id(), None)
+            model.remove(entity)
+            removed_count += 1
+
+        return removed_count
+
+    def _skeleton_ids(self) -> set[int]:
+        skeleton_ids = set()
+        for name in self.writer.skeleton_attributes:
+            skeleton_entity = getattr(self.writer, name, None)
+            if skeleton_entity is not None:
+                skeleton_ids.add(skeleton_entity.id())
+
+        return skeleton_ids
+
+    def _entities_after(self, step_id: int) -> list[entity_instance]:
+        model = self.writer.model
+        entities = []
+        for new_id in range(step_id + 1, self.writer.max_step_id() + 1):
+            try:
+                entities.append(model.by_id(new_id))
+            except RuntimeError:
+                # Ids of removed entities are not reused
+                continue
+
+        return entities
+
+    def remove_memberships(self, elements: list[entity_instance], element_ids: set[int]) -> None:
+        """
+        Remove the elements from the relationships, including the relationships reserved to the accumulator.
+        """
+        model = self.writer.model
+        accumulator = self.writer.ifcRelationshipAccumulator
+
+        # Intersected by set lookups, over the smaller of the related ids and the element ids
+        for key, record in list(accumulator.pending.items()):
+            related = record["Related"]
+            for element_id in related.keys() & element_ids:
+                del related[element_id]
+            if not related:
+                del accumulator.pending[key]
+
+        relationships: dict[int, entity_instance] = {}
+        for element in elements:
+            for inverse in model.get_inverse(element):
+                if inverse.is_a("IfcRelationship"):
+                    relationships[inverse.id()] = inverse
+
+        for rel in relationships.values():
+            for attribute_name in related_attributes:
+                related = getattr(rel, attribute_name, None)
+                if related is None:
+                    continue
+
+                remaining = [entity for entity in related if entity.id() not in element_ids]
+                if remaining:
+                    setattr(rel, attribute_name, remaining)
+                    continue
+
+                # Emitted relationships are keyed by their class and relating entity, the last attribute
+                emitted_key = (rel.is_a(), rel[len(rel) - 1].id())
+                emitted = accumulator.emitted.get(emitted_key)
+                if emitted is not None and emitted.id() == rel.id():
+                    del accumulator.emitted[emitted_key]
+
+                model.remove(rel)
+                break
\ No newline at end of file
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import uuid
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
+# Characters of the IFC base64 encoding of GlobalId
+guid_characters = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$"
+
+def compress(raw: bytes) -> str:
+    """
+    Encode 16 bytes of UUID as a 22 characters GlobalId, same as `ifcopenshell.guid.compress`.
+    """
+    value = int.from_bytes(raw, "big")
+    return "".join(guid_characters[(value >> shift) & 63] for shift in range(126, -1, -6))
+
+def compress_batch(raw: bytes, count: int, version: int | None = None) -> list[str]:
+    """
+    Encode `count` UUIDs at once.
+    :param raw: 16 bytes for each UUID.
+    :param version: If given, the version and variant bits of UUIDs are set.
+    """
+    import numpy as np
+
+    data = np.frombuffer(raw, dtype=np.uint8).reshape(count, 16)
+    if version is not None:
+        data = data.copy()
+        data[:, 6] = (data[:, 6] & 0x0F) | (version << 4)
+        data[:, 8] = (data[:, 8] & 0x3F) | 0x80
+
+    # 128 bits with 4 leading zero bits are 22 characters of 6 bits
+    bits = np.concatenate([np.zeros((count, 4), dtype=np.uint8), np.unpackbits(data, axis=1)], axis=1)
+    indices = bits.reshape(count, 22, 6) @ np.array([32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+    characters = np.frombuffer(guid_characters.encode("ascii"), dtype=np.uint8)
+    text = characters[indices].tobytes().decode("ascii")
+    return [text[start:start + 22] for start in range(0, 22 * count, 22)]
+
+class IfcGuidUtil:
+    """
+    GlobalIds of the writer's entities.
+    - Random, by default: UUID4s are generated from `os.urandom` and encoded in batches, and handed out one by one.
+    - Deterministic, if the writer has `guid_namespace`: UUIDs are derived from the namespace and a name.
+      Entities with a user key are named by the key (`from_key`), and the others by their scope and sequence in it (`new`).
+      The same input gives the same GlobalIds in every run.
+    """
+    # Count of random GlobalIds generated at once
+    pool_size = 1024
+
+    def __init__(self, ifc_writer: "IfcWriter"):
+        self.writer = ifc_writer
+
+        namespace = getattr(ifc_writer, "guid_namespace", None)
+        self.namespace: bytes | None = None if namespace is None else uuid.uuid5(uuid.NAMESPACE_URL, namespace).bytes
+
+        self.pool: list[str] = []
+        self.sequences: dict[str, int] = {}
+
+        # GlobalIds in the model already, which deterministic ones must not repeat. Set by `reserve`.
+        self.reserved: set[str] | None = None
+
+    @property
+    def deterministic(self) -> bool:
+        return self.namespace is not None
+
+    def new(self, scope: str = "") -> str:
+        """
+        :param scope: Scope of sequence in deterministic mode, e.g. IfcClass of the entity.
+        """
+        if self.namespace is None:
+            if not self.pool:
+                self.pool = self.new_batch(self.pool_size)
+            return self.pool.pop()
+
+        return self._next_in_scope(scope)
+
+    def new_batch(self, count: int, scope: str = "") -> list[str]:
+        if count <= 0:
+            return []
+
+        if self.namespace is None:
+            return compress_batch(os.urandom(16 * count), count, version=4)
+
+        return [self._next_in_scope(scope) for _ in range(count)]
+
+    def from_key(self, key: str) -> str:
+        """
+        GlobalId of the user key. In random mode, a new random GlobalId.
+        """
+        if self.namespace is None:
+            return self.new()
+
+        return compress(self._digest(f"key:{key}"))
+
+    def reserve(self, guids) -> None:
+        """
+        Register the GlobalIds of an existing model, so the deterministic sequences skip them.
+        """
+        if self.reserved is None:
+            self.reserved = set()
+        self.reserved.update(guids)
+
+    def _next_in_scope(self, scope: str) -> str:
+        while True:
+            sequence = self.sequences.get(scope, 0)
+            self.sequences[scope] = sequence + 1
+
+            guid = compress(self._digest(f"{scope}#{sequence}"))
+            if self.reserved is None or guid not in self.reserved:
+                return guid
+
+    def _digest(self, name: str) -> bytes:
+        # UUID5 (SHA-1 of namespace and name)
+        digest = bytearray(hashlib.sha1(self.namespace + name.encode("utf-8")).digest()[:16])
+        digest[6] = (digest[6] & 0x0F) | 0x50
+        digest[8] = (digest[8] & 0x3F) | 0x80
+        return bytes(digest)
\ No newline at end of file
@@ -0,0 +1,205 @@
+from typing import TYPE_CHECKING
+from ifcopenshell import entity_instance
+
+from ..registryRecords import StoreyRecord, ElementTypeRecord, MaterialRecord, MaterialLayerSetRecord, WallGeometryRecord
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
+# Registry of element types by IfcClass of type
+type_registries = {
+    "IfcColumnType": "column_types",
+    "IfcBeamType": "beam_types",
+    "IfcWallType": "wall_types",
+}
+
+# Relationships which the accumulator appends to, and the attribute of relating entity
+accumulated_relationships = {
+    "IfcRelContainedInSpatialStructure": "RelatingStructure",
+    "IfcRelDefinesByType": "RelatingType",
+    "IfcRelAssociatesMaterial": "RelatingMaterial",
+}
+
+class IfcModelIndexer:
+    """
+    Indexes a model written by the writer, so the writer can continue building on it.
+    - Skeleton attributes: project, owner history, site, building, shared axes and contexts are found by their structure.
+    - Registries: storeys, types, profiles, representation maps, wall geometries and material sets are keyed as they were created.
+    - Relationships: emitted relationships and styled items are registered to the accumulator, so new elements are appended to them.
+    Shared entities which cannot be recognized are not registered. Then new elements create their own ones.
+    """
+    def __init__(self, ifc_writer: "IfcWriter"):
+        self.writer = ifc_writer
+
+    def index(self) -> None:
+        self.writer.ifcResourceEntityUtil.seed_interning()
+        self.index_skeleton()
+        self.index_storeys()
+        self.index_types()
+        self.index_profiles()
+        self.index_materials()
+        self.index_relationships()
+
+    def index_skeleton(self) -> None:
+        writer = self.writer
+        model = writer.model
+        resource_util = writer.ifcResourceEntityUtil
+
+        writer.project = model.by_type("IfcProject")[0]
+        writer.owner_history = model.by_type("IfcOwnerHistory")[0]
+        writer.site = model.by_type("IfcSite")[0]
+        writer.building = model.by_type("IfcBuilding")[0]
+
+        # Interned points and directions have unique coordinates
+        writer.origin2d = resource_util.create_cartesian_point_2d((0., 0.))
+        writer.origin3d = resource_util.create_cartesian_point_3d((0., 0., 0.))
+        writer.axis_z = resource_util.create_direction_3d((0., 0., 1.))
+        writer.axis_z_neg = resource_util.create_direction_3d((0., 0., -1.))
+        writer.axis_x_2d = resource_util.create_direction_2d((1., 0.))
+        writer.axis_y_2d = resource_util.create_direction_2d((0., 1.))
+        writer.axis_x_2d_neg = resource_util.create_direction_2d((-1., 0.))
+        writer.axis_y_2d_neg = resource_util.create_direction_2d((0., -1.))
+        writer.axis_x_3d = resource_util.create_direction_3d((1., 0., 0.))
+        writer.axis_x_3d_neg = resource_util.create_direction_3d((-1., 0., 0.))
+        writer.axis_y_3d = resource_util.create_direction_3d((0., 1., 0.))
+
+        operators = model.by_type("IfcCartesianTransformationOperator3D")
+        writer.identity_transformation_3d = (
+            operators[0] if operators else resource_util.create_cartesian_transformation_operator3d()
+        )
+
+        writer.placement_origin_3d = next(
+            (
+                placement for placement in model.by_type("IfcAxis2Placement3D")
+                if placement.Location.id() == writer.origin3d.id() and placement.Axis is None and placement.RefDirection is None
+            ),
+            None
+        ) or resource_util.create_axis2placement_3d(location=writer.origin3d)
+
+        writer.context = next(
+            context for context in model.by_type("IfcGeometricRepresentationContext")
+            if not context.is_a("IfcGeometricRepresentationSubContext") and context.ContextType == "Model"
+        )
+
+        sub_contexts = {
+            sub_context.ContextIdentifier: sub_context
+            for sub_context in model.by_type("IfcGeometricRepresentationSubContext")
+        }
+        writer.sub_context_body = sub_contexts["Body"]
+        writer.sub_context_axis = sub_contexts["Axis"]
+        writer.sub_context_box = sub_contexts["Box"]
+        writer.sub_context_footprint = sub_contexts["FootPrint"]
+
+    def index_storeys(self) -> None:
+        writer = self.writer
+        for storey in writer.model.by_type("IfcBuildingStorey"):
+            writer.storeys[storey.Name] = StoreyRecord(storey, storey.ObjectPlacement, storey.Elevation)
+
+            if writer.storey_base_placement is None and storey.ObjectPlacement is not None:
+                writer.storey_base_placement = storey.ObjectPlacement.PlacementRelTo
+
+        for rel in writer.model.by_type("IfcRelAggregates"):
+            if rel.RelatingObject.id() == writer.building.id():
+                writer.rel_storey_to_building = rel
+                break
+
+    def index_types(self) -> None:
+        writer = self.writer
+        resource_util = writer.ifcResourceEntityUtil
+        for type_class, registry_name in type_registries.items():
+            for element_type in writer.model.by_type(type_class):
+                writer.element_types[registry_name].setdefault(element_type.Name, ElementTypeRecord(element_type))
+
+        # Column geometry by (type, profile, base level, height). See `IfcSharedElementDataUtil.get_column_representation_map`.
+        for column_type in writer.model.by_type("IfcColumnType"):
+            for representation_map in column_type.RepresentationMaps or ():
+                items = representation_map.MappedRepresentation.Items
+                if len(items) != 1 or not items[0].is_a("IfcExtrudedAreaSolid"):
+                    continue
+
+                solid = items[0]
+                z_coordinate = -solid.Position.Location.Coordinates[2]
+                key = (column_type.id(), solid.SweptArea.id()) + resource_util.quantize((z_coordinate, solid.Depth))
+                writer.column_representation_maps.setdefault(key, representation_map)
+
+        # Wall geometry by (type, profile, length, height). See `IfcSharedElementDataUtil.get_wall_geometry`.
+        for wall_type, wall in self._typed_walls():
+            if wall.Representation is None:
+                continue
+
+            extrusion = None
+            axis = None
+            for representation in wall.Representation.Representations:
+                if representation.RepresentationIdentifier == "Body" and representation.RepresentationType == "SweptSolid":
+                    extrusion = representation.Items[0]
+                elif representation.RepresentationIdentifier == "Axis":
+                    axis = representation.Items[0]
+
+            if extrusion is None or axis is None or not extrusion.SweptArea.is_a("IfcRectangleProfileDef"):
+                continue
+
+            key = (wall_type.id(), extrusion.SweptArea.id()) + resource_util.quantize((extrusion.SweptArea.XDim, extrusion.Depth))
+            writer.wall_geometries.setdefault(key, WallGeometryRecord(extrusion, axis))
+
+    def _typed_walls(self):
+        """
+        (IfcWallType, IfcWallStandardCase) of the walls defined by a type.
+        """
+        for rel in self.writer.model.by_type("IfcRelDefinesByType"):
+            wall_type = rel.RelatingType
+            if wall_type is None or not wall_type.is_a("IfcWallType"):
+                continue
+
+            for wall in rel.RelatedObjects:
+                if wall.is_a("IfcWallStandardCase"):
+                    yield wall_type, wall
+
+    def index_profiles(self) -> None:
+        writer = self.writer
+        resource_util = writer.ifcResourceEntityUtil
+        for profile in writer.model.by_type("IfcProfileDef"):
+            if profile.ProfileName is None:
+                continue
+
+            writer.profiles.setdefault(profile.ProfileName, profile)
+
+            # Rectangle profiles of walls. See `IfcSharedElementDataUtil.get_wall_profile`.
+            if profile.is_a("IfcRectangleProfileDef") and profile.ProfileName.startswith("WAL_L"):
+                writer.wall_profiles.setdefault(resource_util.quantize((profile.XDim, profile.YDim)), profile)
+
+    def index_materials(self) -> None:
+        writer = self.writer
+        model = writer.model
+        for material in model.by_type("IfcMaterial"):
+            writer.materials.setdefault(material.Name, MaterialRecord(material))
+
+        usages = {usage.ForLayerSet.id(): usage for usage in model.by_type("IfcMaterialLayerSetUsage")}
+
+        # Style assignments of material sets have the surface styles named by the set
+        style_assignments: dict[str, entity_instance] = {}
+        for style_assignment in model.by_type("IfcPresentationStyleAssignment"):
+            for style in style_assignment.Styles:
+                if style.is_a("IfcSurfaceStyle") and style.Name is not None:
+                    style_assignments.setdefault(style.Name, style_assignment)
+
+        for material_set in model.by_type("IfcMaterialLayerSet"):
+            name = material_set.LayerSetName
+            usage = usages.get(material_set.id())
+            style_assignment = style_assignments.get(name)
+            if name is None or usage is None or style_assignment is None:
+                continue
+
+            writer.material_layer_sets.setdefault(name, MaterialLayerSetRecord(material_set, usage, style_assignment))
+
+    def index_relationships(self) -> None:
+        model = self.writer.model
+        accumulator = self.writer.ifcRelationshipAccumulator
+        for rel_class, relating_attribute in accumulated_relationships.items():
+            for rel in model.by_type(rel_class):
+                relating = getattr(rel, relating_attribute)
+                if relating is not None:
+                    accumulator.emitted.setdefault((rel_class, relating.id()), rel)
+
+        for styled_item in model.by_type("IfcStyledItem"):
+            if styled_item.Item is not None:
+                accumulator.styled_item_ids.add(styled_item.Item.id())
\ No newline at end of file
@@ -0,0 +1,213 @@
+from typing import TYPE_CHECKING
+import ifcopenshell
+from ifcopenshell import entity_instance
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
+# Resource entities which can be referenced by several elements. Equal ones are merged into one entity.
+shareable_classes = (
+    "IfcGeometricRepresentationItem",
+    "IfcProfileDef",
+    "IfcRepresentationMap",
+    "IfcRepresentationContext",
+    "IfcMaterial",
+    "IfcMaterialLayer",
+    "IfcMaterialLayerSet",
+    "IfcMaterialLayerSetUsage",
+    "IfcColourRgb",
+    "IfcSurfaceStyleShading",
+    "IfcSurfaceStyle",
+    "IfcPresentationStyleAssignment",
+)
+
+class IfcModelMerger:
+    """
+    Merges the models built from the same skeleton (e.g. storey shards built in other processes) into the writer's model.
+    - Skeleton entities have the same step ids in every shard, so they are mapped by id.
+    - Storeys are mapped by name to the storeys of the writer, which must be created before merging.
+    - Types are mapped by IfcClass and name. Representation maps of the same type are combined.
+    - Equal resource entities (points, directions, profiles, materials, styles, ...) are merged into one.
+    - Relationships are reserved to the writer's `IfcRelationshipAccumulator`, so each relating entity has one relationship.
+    - GlobalIds in the writer's model already (e.g. of shards built in the same namespace) are replaced by new ones.
+    """
+    def __init__(self, ifc_writer: "IfcWriter"):
+        self.writer = ifc_writer
+        self.skeleton_max_id: int = ifc_writer.skeletons[ifc_writer.skeleton_key]["MaxId"]
+
+        # Structural key : Entity of the writer's model
+        self.index: dict[tuple, entity_instance] = {}
+        self.shareable_by_class: dict[str, bool] = {}
+
+        # Step id of the shard being merged : Entity of the writer's model
+        self.id_map: dict[int, entity_instance] = {}
+        self.map_representation_ids: set[int] = set()
+
+        # GlobalIds of the writer's model, which the merged entities must not repeat
+        self.global_ids: set[str] = set()
+
+        for entity in ifc_writer.model:
+            if entity.is_a("IfcRoot"):
+                self.global_ids.add(entity.GlobalId)
+
+            if self._is_shareable(entity):
+                self.index.setdefault(self._key(entity.is_a(), list(entity)), entity)
+            elif entity.is_a("IfcTypeObject"):
+                self.index.setdefault(("IfcTypeObject", entity.is_a(), entity.Name), entity)
+
+    def merge_string(self, text: str) -> None:
+        """
+        Merge the model serialized by `ifcopenshell.file.to_string`.
+        """
+        self.merge(ifcopenshell.file.from_string(text))
+
+    def merge(self, shard: ifcopenshell.file) -> None:
+        """
+        Merge the shard model into the writer's model.
+        The relationships of the shard should be flushed before, so they are in the shard model.
+        :param shard: Model built from the same skeleton with the writer.
+        """
+        self.id_map = {}
+        self.map_representation_ids = {
+            representation_map.MappedRepresentation.id() for representation_map in shard.by_type("IfcRepresentationMap")
+        }
+
+        for storey in shard.by_type("IfcBuildingStorey"):
+            target = self.writer.storeys.get(storey.Name)
+            if target is None:
+                continue
+
+            self.id_map[storey.id()] = target.entity
+            if storey.ObjectPlacement is not None:
+                self.id_map[storey.ObjectPlacement.id()] = target.object_placement
+
+        accumulator = self.writer.ifcRelationshipAccumulator
+        for rel in shard.by_type("IfcRelationship"):
+            if rel.is_a("IfcRelContainedInSpatialStructure"):
+                structure = self._map_entity(rel.RelatingStructure)
+                for element in rel.RelatedElements:
+                    accumulator.add_contained_in_spatial_structure(structure, self._map_entity(element))
+            elif rel.is_a("IfcRelDefinesByType"):
+                relating_type = self._map_entity(rel.RelatingType)
+                for related_object in rel.RelatedObjects:
+                    accumulator.add_defines_by_type(relating_type, self._map_entity(related_object), rel.Name)
+            elif rel.is_a("IfcRelAssociatesMaterial"):
+                material = self._map_entity(rel.RelatingMaterial)
+                for related_object in rel.RelatedObjects:
+                    accumulator.add_associates_material(material, self._map_entity(related_object))
+            elif rel.is_a("IfcRelAggregates") and rel.RelatingObject.id() <= self.skeleton_max_id:
+                # Storeys are aggregated to the building by the writer.
+                continue
+            else:
+                self._map_entity(rel)
+
+        for styled_item in shard.by_type("IfcStyledItem"):
+            if styled_item.Item is None:
+                self._map_entity(styled_item)
+                continue
+
+            accumulator.add_styled_item(self._map_entity(styled_item.Item), list(self._map(styled_item.Styles)))
+
+        # Elements which are not related to anything
+        for product in shard.by_type("IfcProduct"):
+            self._map_entity(product)
+
+        self.id_map = {}
+        self.map_representation_ids = set()
+
+    def _is_shareable(self, entity: entity_instance) -> bool:
+        ifc_class = entity.is_a()
+        shareable = self.shareable_by_class.get(ifc_class)
+        if shareable is None:
+            shareable = any(entity.is_a(shareable_class) for shareable_class in shareable_classes)
+            self.shareable_by_class[ifc_class] = shareable
+
+        return shareable
+
+    def _key(self, ifc_class: str, values: list) -> tuple:
+        return (ifc_class,) + tuple(self._key_value(value) for value in values)
+
+    def _key_value(self, value):
+        if isinstance(value, entity_instance):
+            step_id = value.id()
+            return ("#", step_id) if step_id else (value.is_a(), value.wrappedValue)
+
+        if isinstance(value, (tuple, list)):
+            return tuple(self._key_value(item) for item in value)
+
+        return value
+
+    def _map(self, value):
+        if isinstance(value, entity_instance):
+            return self._map_entity(value)
+
+        if isinstance(value, (tuple, list)):
+            return tuple(self._map(item) for item in value)
+
+        return value
+
+    def _map_entity(self, entity: entity_instance) -> entity_instance:
+        model = self.writer.model
+        step_id = entity.id()
+
+        # Typed values (e.g. IfcParameterValue) are not instances of the model
+        if not step_id:
+            return model.create_entity(entity.is_a(), entity.wrappedValue)
+
+        mapped = self.id_map.get(step_id)
+        if mapped is not None:
+            return mapped
+
+        if step_id <= self.skeleton_max_id:
+            mapped = model.by_id(step_id)
+            self.id_map[step_id] = mapped
+            return mapped
+
+        ifc_class = entity.is_a()
+        if entity.is_a("IfcTypeObject"):
+            type_key = ("IfcTypeObject", ifc_class, entity.Name)
+            existing = self.index.get(type_key)
+            if existing is not None:
+                self.id_map[step_id] = existing
+                self._combine_representation_maps(existing, entity)
+                return existing
+
+            mapped = model.create_entity(ifc_class, *[self._map(value) for value in entity])
+            self._keep_global_id_unique(mapped)
+            self.index[type_key] = mapped
+        elif self._is_shareable(entity) or step_id in self.map_representation_ids:
+            values = [self._map(value) for value in entity]
+            key = self._key(ifc_class, values)
+            mapped = self.index.get(key)
+            if mapped is None:
+                mapped = model.create_entity(ifc_class, *values)
+                self.index[key] = mapped
+        else:
+            mapped = model.create_entity(ifc_class, *[self._map(value) for value in entity])
+            if mapped.is_a("IfcRoot"):
+                self._keep_global_id_unique(mapped)
+
+        self.id_map[step_id] = mapped
+        return mapped
+
+    def _keep_global_id_unique(self, root: entity_instance) -> None:
+        guid_util = self.writer.ifcGuidUtil
+        while root.GlobalId in self.global_ids:
+            root.GlobalId = guid_util.new(root.is_a())
+
+        self.global_ids.add(root.GlobalId)
+
+    def _combine_representation_maps(self, target_type: entity_instance, shard_type: entity_instance) -> None:
+        shard_maps = getattr(shard_type, "RepresentationMaps", None)
+        if not shard_maps:
+            return
+
+        representation_maps = list(target_type.RepresentationMaps or ())
+        map_ids = {representation_map.id() for representation_map in representation_maps}
+        for shard_map in shard_maps:
+            representation_map = self._map_entity(shard_map)
+            if representation_map.id() not in map_ids:
+                representation_maps.append(representation_map)
+                map_ids.add(representation_map.id())
+
+        target_type.RepresentationMaps = representation_maps
\ No newline at end of file
@@ -0,0 +1,145 @@
+from typing import TYPE_CHECKING
+from ifcopenshell import entity_instance
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
+class IfcRelationshipAccumulator:
+    """
+    Collects the relationships of elements while building, and emits them at once before saving.
+    - IfcRelContainedInSpatialStructure : One per spatial structure (e.g. IfcBuildingStorey)
+    - IfcRelDefinesByType : One per type
+    - IfcRelAssociatesMaterial : One per material (or material set, usage)
+    - IfcStyledItem : One per representation item
+    Related objects and styled items are kept as step ids, so the element wrappers are not held until saving.
+    """
+    def __init__(self, ifc_writer: "IfcWriter"):
+        self.writer = ifc_writer
+
+        # (IfcClass of relationship, id of relating entity) : {"Relating", "Related", "Name"}
+        self.pending: dict[tuple[str, int], dict[str, any]] = {}
+
+        # (IfcClass of relationship, id of relating entity) : Emitted relationship entity
+        self.emitted: dict[tuple[str, int], entity_instance] = {}
+
+        # id of representation item : Styles. The item is looked up by id when emitted, like the related objects.
+        self.pending_styles: dict[int, list[entity_instance]] = {}
+        self.styled_item_ids: set[int] = set()
+
+    def _add(
+        self,
+        rel_class: str,
+        relating: entity_instance,
+        related: entity_instance,
+        name: str | None = None
+    ) -> None:
+        key = (rel_class, relating.id())
+        record = self.pending.get(key)
+        if record is None:
+            record = {"Relating": relating, "Related": {}, "Name": name}
+            self.pending[key] = record
+
+        record["Related"][related.id()] = None
+
+    def add_contained_in_spatial_structure(
+        self,
+        relating_structure: entity_instance,
+        element: entity_instance
+    ) -> None:
+        """
+        Reserve the element to be contained in the spatial structure.
+        :param relating_structure: Entity of IfcSpatialStructureElement
+        :param element: Entity of IfcProduct
+        """
+        self._add("IfcRelContainedInSpatialStructure", relating_structure, element)
+
+    def add_defines_by_type(
+        self,
+        relating_type: entity_instance,
+        related_object: entity_instance,
+        name: str | None = None
+    ) -> None:
+        """
+        Reserve the object to be defined by the type.
+        :param relating_type: Entity of IfcTypeObject
+        :param related_object: Entity of IfcObject
+        :param name: Name of relation. The first given name of the type is used.
+        """
+        self._add("IfcRelDefinesByType", relating_type, related_object, name)
+
+    def add_associates_material(
+        self,
+        relating_material: entity_instance,
+        related_object: entity_instance
+    ) -> None:
+        """
+        Reserve the object to be associated with the material.
+        :param relating_material: Entity of IfcMaterialSelect (IfcMaterial, IfcMaterialLayerSet, IfcMaterialLayerSetUsage, ...)
+        :param related_object: Entity of IfcObjectDefinition
+        """
+        self._add("IfcRelAssociatesMaterial", relating_material, related_object)
+
+    def add_styled_item(
+        self,
+        item: entity_instance,
+        styles: list[entity_instance]
+    ) -> None:
+        """
+        Reserve the styles of representation item. The representation item shared by several elements is styled once.
+        :param item: Entity of IfcRepresentationItem
+        :param styles: Set of IfcPresentationStyleAssignment
+        """
+        item_id = item.id()
+        if item_id in self.styled_item_ids or item_id in self.pending_styles:
+            return
+
+        self.pending_styles[item_id] = styles
+
+    def flush(self) -> None:
+        """
+        Emit all reserved relationships. If the relationship for the same relating entity was emitted before,
+        the related objects are appended to it instead of creating another one. Objects already related are skipped.
+        """
+        model = self.writer.model
+        for key, record in self.pending.items():
+            related_objects = [model.by_id(related_id) for related_id in record["Related"].keys()]
+            rel_class = key[0]
+
+            if key in self.emitted:
+                rel = self.emitted[key]
+                attribute_name = "RelatedElements" if rel_class == "IfcRelContainedInSpatialStructure" else "RelatedObjects"
+                existing = tuple(getattr(rel, attribute_name))
+                existing_ids = {entity.id() for entity in existing}
+                appended = tuple(entity for entity in related_objects if entity.id() not in existing_ids)
+                setattr(rel, attribute_name, existing + appended)
+                continue
+
+            if rel_class == "IfcRelContainedInSpatialStructure":
+                rel = self.writer.ifcCoreDataUtil.create_rel_contained_in_spatial_structure(
+                    related_elements=related_objects,
+                    relating_structure=record["Relating"]
+                )
+            elif rel_class == "IfcRelDefinesByType":
+                rel = self.writer.ifcResourceEntityUtil.create_rel_defines_by_type(
+                    name=record["Name"],
+                    related_objects=related_objects,
+                    relating_type=record["Relating"]
+                )
+            else:
+                rel = self.writer.ifcResourceEntityUtil.create_rel_associates_material(
+                    related_objects=related_objects,
+                    relating_material=record["Relating"]
+                )
+
+            self.emitted[key] = rel
+
+        self.pending.clear()
+
+        for item_id, styles in self.pending_styles.items():
+            self.writer.ifcResourceEntityUtil.create_styled_item(
+                styles=styles,
+                item=model.by_id(item_id)
+            )
+            self.styled_item_ids.add(item_id)
+
+        self.pending_styles.clear()
@@ -1,38 +1,105 @@
-from multiprocessing.managers import Value
-
-from dist.mainPython.writer.ifcWriter import IfcWriter
-from typing import Literal
+from typing import Literal, TYPE_CHECKING
 from ifcopenshell import entity_instance
-import ifcopenshell.guid
 import math
 
+from ..registryRecords import MaterialRecord, MaterialLayerSetRecord
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
+
 class IfcResourceEntityUtil:
-    def __init__(self, ifc_writer: IfcWriter):
+    def __init__(self, ifc_writer: "IfcWriter"):
         self.writer = ifc_writer
 
+        # Interned IfcCartesianPoint, IfcDirection entities, keyed by the coordinates quantized to the model precision.
+        self.interned_points: dict[tuple[int, ...], entity_instance] = {}
+        self.interned_directions: dict[tuple[int, ...], entity_instance] = {}
+        self.interning_hits = 0
+        self.interning_misses = 0
+
+    def quantize(self, values: tuple[float, ...]) -> tuple[int, ...]:
+        """
+        Quantize the values to the precision of the writer's geometric representation context.
+        Values closer than the precision share the same key.
+        :param values: Coordinates or any set of numeric values.
+        """
+        precision = self.writer.precision
+        return tuple(round(value / precision) for value in values)
+
+    def intern_entity(
+        self,
+        cache: dict[tuple[int, ...], entity_instance],
+        ifc_class: Literal["IfcCartesianPoint", "IfcDirection"],
+        attribute_name: Literal["Coordinates", "DirectionRatios"],
+        coordinate: tuple[float, ...]
+    ) -> entity_instance:
+        """
+        Return the existing entity with the same (quantized) coordinate, or create a new one.
+        :param cache: Interning cache of the writer to look up.
+        :param ifc_class: Name of IfcClass to create on cache miss.
+        :param attribute_name: Name of the attribute which holds the coordinate.
+        :param coordinate: Coordinate of the entity.
+        """
+        key = self.quantize(coordinate)
+        entity = cache.get(key)
+        if entity is not None:
+            self.interning_hits += 1
+            return entity
+
+        self.interning_misses += 1
+        entity = self.writer.model.create_entity(ifc_class, **{attribute_name: coordinate})
+        cache[key] = entity
+        return entity
+
+    def seed_interning(self) -> None:
+        """
+        Register the existing points and directions of the model to the interning cache.
+        Use when the model is loaded instead of being built by this writer.
+        """
+        for point in self.writer.model.by_type("IfcCartesianPoint"):
+            self.interned_points.setdefault(self.quantize(point.Coordinates), point)
+
+        for direction in self.writer.model.by_type("IfcDirection"):
+            self.interned_directions.setdefault(self.quantize(direction.DirectionRatios), direction)
+
+    def forget_interned(self, entity: entity_instance) -> None:
+        """
+        Remove the point or direction from the interning cache. Use before removing it from the model.
+        """
+        if entity.is_a("IfcCartesianPoint"):
+            cache, coordinate = self.interned_points, entity.Coordinates
+        elif entity.is_a("IfcDirection"):
+            cache, coordinate = self.interned_directions, entity.DirectionRatios
+        else:
+            return
+
+        key = self.quantize(coordinate)
+        interned = cache.get(key)
+        if interned is not None and interned.id() == entity.id():
+            del cache[key]
+
+    def get_interning_stats(self) -> dict[str, int]:
+        """
+        Counters of the interning cache of IfcCartesianPoint, IfcDirection.
+        """
+        return {
+            "hits": self.interning_hits,
+            "misses": self.interning_misses,
+            "points": len(self.interned_points),
+            "directions": len(self.interned_directions),
+        }
+
     def create_cartesian_point_2d(self, coordinate:tuple[float, float]) -> entity_instance:
-        return self.writer.model.create_entity(
-            type="IfcCartesianPoint",
-            Coordinates=coordinate
-        )
+        return self.intern_entity(self.interned_points, "IfcCartesianPoint", "Coordinates", coordinate)
 
     def create_cartesian_point_3d(self, coordinate:tuple[float, float, float]) -> entity_instance:
-        return self.writer.model.create_entity(
-            type="IfcCartesianPoint",
-            Coordinates=coordinate
-        )
+        return self.intern_entity(self.interned_points, "IfcCartesianPoint", "Coordinates", coordinate)
 
     def create_direction_2d(self, coordinate: tuple[float, float]) -> entity_instance:
-        return self.writer.model.create_entity(
-            type="IfcDirection",
-            DirectionRatios=coordinate
-        )
+        return self.intern_entity(self.interned_directions, "IfcDirection", "DirectionRatios", coordinate)
 
     def create_direction_3d(self, coordinate: tuple[float, float, float]) -> entity_instance:
-        return self.writer.model.create_entity(
-            type="IfcDirection",
-            DirectionRatios=coordinate
-        )
+        return self.intern_entity(self.interned_directions, "IfcDirection", "DirectionRatios", coordinate)
 
     def create_axis2placement_2d(
             self,
@@ -166,6 +233,7 @@ class IfcResourceEntityUtil:
         extruded_direction: entity_instance,
         depth: float,
         rotation_degree: float = 0.,
+        rotation: tuple[float, float] | None = None
     ) -> entity_instance:
         """
         Create extruded area solid. Adjusting z_coordinate makes difference while placing the extrusion.
@@ -176,12 +244,16 @@ class IfcResourceEntityUtil:
         :param z_coordinate: Absolute level of extrusion's base level,
         :param extruded_direction: Entity of IfcDirection
         :param depth: Extrusion distance.
+        :param rotation: (cos, sin) of the negated rotation, if computed already (e.g. for a batch). Overrides rotation_degree.
         """
-        radian = -math.radians(rotation_degree)
+        if rotation is None:
+            radian = -math.radians(rotation_degree)
+            rotation = (math.cos(radian), math.sin(radian))
+
         position=self.create_axis2placement_3d(
             location=self.writer.origin3d,
             axis=extruded_direction,
-            ref_direction=self.create_direction_3d((0.0, math.cos(radian), math.sin(radian)))
+            ref_direction=self.create_direction_3d((0.0, rotation[0], rotation[1]))
         )
 
         return self.writer.model.create_entity(
@@ -409,7 +481,7 @@ class IfcResourceEntityUtil:
 
         return self.writer.model.create_entity(
             type="IfcRelDefinesByType",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcRelDefinesByType"),
             OwnerHistory=owner_history,
             Name=name,
             Description=description,
@@ -475,11 +547,13 @@ class IfcResourceEntityUtil:
 
     def create_styled_item(
         self,
-        styles: list[entity_instance]
+        styles: list[entity_instance],
+        item: entity_instance | None = None
     ) -> entity_instance:
 
         return self.writer.model.create_entity(
             type="IfcStyledItem",
+            Item=item,
             Styles=styles
         )
 
@@ -502,7 +576,7 @@ class IfcResourceEntityUtil:
         self,
         name: str,
         rgba: dict[str, float]
-    ) -> entity_instance:
+    ) -> MaterialRecord:
 
         if name in self.writer.materials.keys():
             raise ValueError(f"Duplication Error : Material {name} already exists.")
@@ -541,19 +615,16 @@ class IfcResourceEntityUtil:
             Representations = [styled_representation]
         )
 
-        entity_set = {
-            "Definition": material_definition_representation,
-            "Material": material,
-        }
+        material_record = MaterialRecord(material, material_definition_representation)
 
-        self.writer.materials[name] = entity_set
-        return entity_set
+        self.writer.materials[name] = material_record
+        return material_record
 
     def create_material_layer_set(
         self,
         name: str,
         layer_args: list[dict[str, any]],
-    ) -> dict[str, entity_instance]:
+    ) -> MaterialLayerSetRecord:
         """
         layer_args = {
             "name": "MAT_LY_01",
@@ -569,16 +640,14 @@ class IfcResourceEntityUtil:
         total_thickness = 0.
         for layer_arg in layer_args:
             if layer_arg["name"] in self.writer.materials.keys():
-                material = self.writer.materials[name]['Material']
+                material = self.writer.materials[layer_arg["name"]].material
             else:
                 material = self.writer.model.create_entity(
                     type="IfcMaterial",
-                    Name=name
+                    Name=layer_arg["name"]
                 )
 
-                self.writer.materials[layer_arg["name"]] = {
-                    "Entity": material
-                }
+                self.writer.materials[layer_arg["name"]] = MaterialRecord(material)
 
 
             material_layer = self.writer.model.create_entity(
@@ -619,11 +688,7 @@ class IfcResourceEntityUtil:
             styles=surface_styles
         )
 
-        defined_material_layer_set = {
-            "MaterialSet": material_layer_set,
-            "MaterialSetUsage": material_layer_usage,
-            "StyleAssignment": style_assignment
-        }
+        defined_material_layer_set = MaterialLayerSetRecord(material_layer_set, material_layer_usage, style_assignment)
 
         self.writer.material_layer_sets[name]=defined_material_layer_set
 
@@ -638,13 +703,33 @@ class IfcResourceEntityUtil:
         if material_name not in self.writer.materials.keys():
             raise ValueError(f"Not Exist Error : Material ${material_name} does not exist")
 
-        material_entity = self.writer.materials[material_name]["Material"]
+        material_entity = self.writer.materials[material_name].material
+        return self.create_rel_associates_material(
+            related_objects=target_objects,
+            relating_material=material_entity
+        )
+
+    def create_rel_associates_material(
+        self,
+        related_objects: set[entity_instance],
+        relating_material: entity_instance,
+        owner_history: entity_instance | None = None,
+    ) -> entity_instance:
+        """
+        This associates the material with the objects.
+        :param related_objects: Set of IfcObjectDefinition
+        :param relating_material: Entity of IfcMaterialSelect
+        :param owner_history: Entity of IfcOwnerHistory
+        """
+        if owner_history is None:
+            owner_history = self.writer.owner_history
+
         return self.writer.model.create_entity(
             type="IfcRelAssociatesMaterial",
-            GlobalId=ifcopenshell.guid.new(),
-            OwnerHistory=self.writer.owner_history,
-            RelatedObjects=target_objects,
-            RelatingMaterial=material_entity
+            GlobalId=self.writer.ifcGuidUtil.new("IfcRelAssociatesMaterial"),
+            OwnerHistory=owner_history,
+            RelatedObjects=related_objects,
+            RelatingMaterial=relating_material
         )
 
     def assign_material_set(
@@ -660,7 +745,7 @@ class IfcResourceEntityUtil:
         return self.writer.model.create_entity(
             type="IfcStyledItem",
             Item=target_presentation,
-            Styles=target_material_set["StyleAssignment"],
+            Styles=target_material_set.style_assignment,
         )
 
     def assign_material_set_wall(
@@ -674,25 +759,21 @@ class IfcResourceEntityUtil:
             raise ValueError(f"Not exist error : Material Set '{material_set_name}' does not exist.")
 
         target_material_set = self.writer.material_layer_sets[material_set_name]
+        accumulator = self.writer.ifcRelationshipAccumulator
 
-        self.writer.model.create_entity(
-            type="IfcStyledItem",
-            Item=target_presentation,
-            Styles=[target_material_set["StyleAssignment"]],
+        accumulator.add_styled_item(
+            item=target_presentation,
+            styles=[target_material_set.style_assignment]
         )
 
-        self.writer.model.create_entity(
-            type="IfcRelAssociatesMaterial",
-            GlobalId=ifcopenshell.guid.new(),
-            RelatedObjects=[target_wall_entity],
-            RelatingMaterial=target_material_set["MaterialSetUsage"]
+        accumulator.add_associates_material(
+            relating_material=target_material_set.usage,
+            related_object=target_wall_entity
         )
 
-        self.writer.model.create_entity(
-            type="IfcRelAssociatesMaterial",
-            GlobalId=ifcopenshell.guid.new(),
-            RelatedObjects=[target_wall_type],
-            RelatingMaterial=target_material_set["MaterialSet"]
+        accumulator.add_associates_material(
+            relating_material=target_material_set.material_set,
+            related_object=target_wall_type
         )
 
     #Arbitary Profile
@@ -1,13 +1,15 @@
+from typing import TYPE_CHECKING
 import math
 
 from ifcopenshell import entity_instance
-import ifcopenshell.guid
-import ifcopenshell.util.selector
-from dist.mainPython.writer.ifcWriter import IfcWriter
-from .simpleVectorUtils import SimpleVectorUtil
+
+from ..registryRecords import StoreyRecord, ElementTypeRecord, WallGeometryRecord
+
+if TYPE_CHECKING:
+    from dist.mainPython.writer.ifcWriter import IfcWriter
 
 class IfcSharedElementDataUtil:
-    def __init__(self, ifc_writer: IfcWriter):
+    def __init__(self, ifc_writer: "IfcWriter"):
         self.writer = ifc_writer
 
     def create_column(
@@ -21,56 +23,140 @@ class IfcSharedElementDataUtil:
         base_offset: float = 0.,
         profile_arg: dict[str, float] | None = None
     ) -> entity_instance:
+        profile = self.get_column_profile(profile_name, profile_arg)
+        target_storey = self.get_target_storeys(target_storey_name, 1)[0]
+        column_type = self.get_column_type(col_type_name)
 
-        if profile_name in self.writer.profiles.keys():
-            profile = self.writer.profiles[profile_name]
-        else:
-            profile = self.writer.ifcResourceEntityUtil.create_profile_IShape (
-                profile_name=profile_name,
-                overall_width=profile_arg['w'],
-                overall_depth=profile_arg['h'],
-                web_thickness=profile_arg['tw'],
-                flange_thickness=profile_arg['tf'],
-                fillet_radius=profile_arg['r']
+        radian = -math.radians(rotation_degree)
+        return self._create_column_entities(
+            profile=profile,
+            column_type=column_type,
+            col_type_name=col_type_name,
+            target_storey=target_storey,
+            coordinate=coordinate,
+            height=height,
+            base_offset=base_offset,
+            ref_direction=(math.cos(radian), math.sin(radian))
+        )
+
+    def create_columns(
+        self,
+        profile_name: str,
+        col_type_name: str,
+        target_storey_names: str | list[str],
+        coordinates,
+        heights,
+        rotation_degrees=0.,
+        base_offsets=0.,
+        profile_arg: dict[str, float] | None = None
+    ) -> list[entity_instance]:
+        """
+        Create columns at once. The placements of all columns are computed in one vectorized pass,
+        and only the entities are created one by one.
+        :param target_storey_names: Name of storey for all columns, or names for each column.
+        :param coordinates: Array-like of (x, y), shape (N, 2).
+        :param heights: Array-like of heights, shape (N,), or a value for all columns.
+        :param rotation_degrees: Array-like of rotations, shape (N,), or a value for all columns.
+        :param base_offsets: Array-like of base offsets, shape (N,), or a value for all columns.
+        :return: Created IfcColumn entities, in the given order.
+        """
+        import numpy as np
+
+        coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        count = len(coordinates)
+        heights = np.broadcast_to(np.asarray(heights, dtype=float), (count, ))
+        base_offsets = np.broadcast_to(np.asarray(base_offsets, dtype=float), (count, ))
+        radians = -np.radians(np.broadcast_to(np.asarray(rotation_degrees, dtype=float), (count, )))
+        ref_directions = np.column_stack((np.cos(radians), np.sin(radians)))
+
+        profile = self.get_column_profile(profile_name, profile_arg)
+        target_storeys = self.get_target_storeys(target_storey_names, count)
+        column_type = self.get_column_type(col_type_name)
+
+        return [
+            self._create_column_entities(
+                profile=profile,
+                column_type=column_type,
+                col_type_name=col_type_name,
+                target_storey=target_storey,
+                coordinate=coordinate,
+                height=height,
+                base_offset=base_offset,
+                ref_direction=ref_direction
             )
+            for target_storey, coordinate, height, base_offset, ref_direction in zip(
+                target_storeys, coordinates.tolist(), heights.tolist(), base_offsets.tolist(), ref_directions.tolist()
+            )
+        ]
 
-        if target_storey_name not in self.writer.storeys.keys():
-            raise ValueError(f"Not Exist Error: Storey f'{target_storey_name}' does not exist.")
-
-        target_storey = self.writer.storeys[target_storey_name]
+    def get_column_profile(self, profile_name: str, profile_arg: dict[str, float] | None = None) -> entity_instance:
+        if profile_name in self.writer.profiles.keys():
+            return self.writer.profiles[profile_name]
 
-        context = self.writer.ifcResourceEntityUtil.create_geometric_representation_context(
-            coordinate_space_dimension=3,
-            context_type="Model",
+        return self.writer.ifcResourceEntityUtil.create_profile_IShape (
+            profile_name=profile_name,
+            overall_width=profile_arg['w'],
+            overall_depth=profile_arg['h'],
+            web_thickness=profile_arg['tw'],
+            flange_thickness=profile_arg['tf'],
+            fillet_radius=profile_arg['r']
         )
 
-        sub_context = self.writer.sub_context_body
+    def get_column_type(self, col_type_name: str) -> entity_instance:
+        if col_type_name in self.writer.element_types['column_types'].keys():
+            return self.writer.element_types['column_types'][col_type_name].entity
 
-        extrusion_solid = self.writer.ifcResourceEntityUtil.create_extruded_area_solid(
-            swept_area=profile,
-            z_coordinate=target_storey['Elevation'] + base_offset,
-            extruded_direction=self.writer.axis_z,
-            depth=height
+        column_type = self.writer.model.create_entity(
+            type="IfcColumnType",
+            GlobalId=self.writer.ifcGuidUtil.new("IfcColumnType"),
+            OwnerHistory=self.writer.owner_history,
+            Name=col_type_name
         )
+        self.writer.element_types["column_types"][col_type_name] = ElementTypeRecord(column_type)
+        return column_type
 
-        extrusion_solid_shape_representation = self.writer.ifcResourceEntityUtil.create_shape_representation(
-            context_of_items=sub_context,
-            representation_identifier="Body",
-            representation_type="SweptSolid",
-            items=[extrusion_solid]
-        )
+    def get_target_storeys(self, target_storey_names: str | list[str], count: int) -> list[StoreyRecord]:
+        """
+        Look up the storeys of elements.
+        :param target_storey_names: Name of storey for all elements, or names for each element.
+        :param count: Count of elements.
+        """
+        if isinstance(target_storey_names, str):
+            target_storey_names = [target_storey_names] * count
+
+        storeys = self.writer.storeys
+        for target_storey_name in set(target_storey_names):
+            if target_storey_name not in storeys.keys():
+                raise ValueError(f"Not Exist Error: Storey f'{target_storey_name}' does not exist.")
 
-        representation_map = self.writer.ifcResourceEntityUtil.create_representation_map(
-            mapped_representation=extrusion_solid_shape_representation
+        return [storeys[target_storey_name] for target_storey_name in target_storey_names]
+
+    def _create_column_entities(
+        self,
+        profile: entity_instance,
+        column_type: entity_instance,
+        col_type_name: str,
+        target_storey: StoreyRecord,
+        coordinate: tuple[float, float],
+        height: float,
+        base_offset: float,
+        ref_direction: tuple[float, float]
+    ) -> entity_instance:
+        # Map the shared geometry of the type
+        representation_map = self.get_column_representation_map(
+            column_type=column_type,
+            profile=profile,
+            z_coordinate=target_storey.elevation + base_offset,
+            height=height
         )
 
         mapped_item = self.writer.ifcResourceEntityUtil.create_mapped_item(
             mapping_source=representation_map,
-            mapping_target=self.writer.ifcResourceEntityUtil.create_cartesian_transformation_operator3d()
+            mapping_target=self.writer.identity_transformation_3d
         )
 
         mapped_representation = self.writer.ifcResourceEntityUtil.create_shape_representation(
-            context_of_items=sub_context,
+            context_of_items=self.writer.sub_context_body,
             representation_type="MappedRepresentation",
             representation_identifier="Body",
             items=[mapped_item]
@@ -80,38 +166,22 @@ class IfcSharedElementDataUtil:
             representations=[mapped_representation]
         )
 
-        # Create column type
-        if col_type_name in self.writer.element_types['column_types'].keys():
-            column_type=self.writer.element_types['column_types'][col_type_name]['Entity']
-        else:
-            column_type = self.writer.model.create_entity(
-                type="IfcColumnType",
-                GlobalId=ifcopenshell.guid.new(),
-                OwnerHistory=self.writer.owner_history,
-                Name=col_type_name,
-                RepresentationMaps=[mapped_item]
-            )
-            self.writer.element_types["column_types"][col_type_name] = {
-                "Entity": column_type
-            }
-
         # Create column's Placement
-        radian = -math.radians(rotation_degree)
         col_relative_placement = self.writer.ifcResourceEntityUtil.create_axis2placement_3d(
-            location=self.writer.ifcResourceEntityUtil.create_cartesian_point_3d((coordinate[0], coordinate[1], abs(target_storey['Elevation']))),
+            location=self.writer.ifcResourceEntityUtil.create_cartesian_point_3d((coordinate[0], coordinate[1], abs(target_storey.elevation))),
             axis=self.writer.axis_z,
-            ref_direction=self.writer.ifcResourceEntityUtil.create_direction_3d((math.cos(radian), math.sin(radian), 0.0))
+            ref_direction=self.writer.ifcResourceEntityUtil.create_direction_3d((ref_direction[0], ref_direction[1], 0.0))
         )
 
         column_placement = self.writer.ifcResourceEntityUtil.create_local_placement(
-            placement_rel_to=target_storey['ObjectPlacement'],
+            placement_rel_to=target_storey.object_placement,
             relative_placement=col_relative_placement
         )
 
         # Create column entity
         column = self.writer.model.create_entity(
             type="IfcColumn",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcColumn"),
             OwnerHistory=self.writer.owner_history,
             Name=col_type_name,
             ObjectType=col_type_name,
@@ -119,22 +189,64 @@ class IfcSharedElementDataUtil:
             Representation=product_definition_shape
         )
 
-        # Create RelContainedSpatialStructure
-        self.writer.ifcCoreDataUtil.create_rel_contained_in_spatial_structure(
-            related_elements=[column],
-            relating_structure=target_storey["Entity"],
-            owner_history=self.writer.owner_history
+        # Reserve RelContainedSpatialStructure, RelDefinesByType
+        self.writer.ifcRelationshipAccumulator.add_contained_in_spatial_structure(
+            relating_structure=target_storey.entity,
+            element=column
         )
 
-        # Create RelDefinesByType
-        self.writer.ifcResourceEntityUtil.create_rel_defines_by_type(
+        self.writer.ifcRelationshipAccumulator.add_defines_by_type(
             name=col_type_name,
-            related_objects=[column],
-            relating_type=column_type
+            relating_type=column_type,
+            related_object=column
         )
 
         return column
 
+    def get_column_representation_map(
+        self,
+        column_type: entity_instance,
+        profile: entity_instance,
+        z_coordinate: float,
+        height: float
+    ) -> entity_instance:
+        """
+        Get the representation map of column geometry. The geometry is created once per (type, profile, base level, height),
+        and added to the RepresentationMaps of column type. Maps are not shared between types, since a map belongs to one type.
+        :param column_type: Entity of IfcColumnType
+        :param profile: Entity of IfcProfileDef
+        :param z_coordinate: Absolute level of extrusion's base level.
+        :param height: Extrusion distance.
+        """
+        key = (column_type.id(), profile.id()) + self.writer.ifcResourceEntityUtil.quantize((z_coordinate, height))
+        representation_map = self.writer.column_representation_maps.get(key)
+
+        if representation_map is None:
+            extrusion_solid = self.writer.ifcResourceEntityUtil.create_extruded_area_solid(
+                swept_area=profile,
+                z_coordinate=z_coordinate,
+                extruded_direction=self.writer.axis_z,
+                depth=height
+            )
+
+            extrusion_solid_shape_representation = self.writer.ifcResourceEntityUtil.create_shape_representation(
+                context_of_items=self.writer.sub_context_body,
+                representation_identifier="Body",
+                representation_type="SweptSolid",
+                items=[extrusion_solid]
+            )
+
+            representation_map = self.writer.ifcResourceEntityUtil.create_representation_map(
+                mapped_representation=extrusion_solid_shape_representation
+            )
+            self.writer.column_representation_maps[key] = representation_map
+
+            # The key has the type, so each map is attached once, when it is created.
+            # Maps indexed from an opened file are in the RepresentationMaps of their type already.
+            column_type.RepresentationMaps = tuple(column_type.RepresentationMaps or ()) + (representation_map, )
+
+        return representation_map
+
     def create_beam(
         self,
         profile_name: str,
@@ -146,33 +258,149 @@ class IfcSharedElementDataUtil:
         z_offset: float = 0.,
         profile_arg: dict[str, float]|None = None
     ) -> entity_instance:
-        if profile_name in self.writer.profiles.keys():
-            profile = self.writer.profiles[profile_name]
-        else:
-            profile = self.writer.ifcResourceEntityUtil.create_I_shape_beam_profile(
-                profile_name=profile_name,
-                overall_width=profile_arg['w'],
-                overall_depth=profile_arg['h'],
-                web_thickness=profile_arg['tw'],
-                flange_thickness=profile_arg['tf'],
-                fillet_radius=profile_arg['r']
-            )
+        profile = self.get_beam_profile(profile_name, profile_arg)
+        target_storey = self.get_target_storeys(target_storey_name, 1)[0]
 
-        if target_storey_name not in self.writer.storeys.keys():
-            raise ValueError(f"Not Exist Error: Storey f'{target_storey_name}' does not exist.")
+        delta = (pt_end[0] - pt_start[0], pt_end[1] - pt_start[1])
+        distance = math.hypot(delta[0], delta[1])
+        if distance <= self.writer.precision:
+            raise ValueError("Zero Length Error: The start and end points of beam are the same.")
 
-        target_storey = self.writer.storeys[target_storey_name]
+        radian = -math.radians(rotation_degree)
+        return self._create_beam_entities(
+            profile=profile,
+            beam_type=self.get_beam_type(beam_type_name),
+            beam_type_name=beam_type_name,
+            target_storey=target_storey,
+            pt_start=pt_start,
+            distance=distance,
+            direction=(delta[0] / distance, delta[1] / distance),
+            rotation=(math.cos(radian), math.sin(radian)),
+            z_offset=z_offset
+        )
+
+    def create_beams(
+        self,
+        profile_name: str,
+        beam_type_name: str,
+        target_storey_names: str | list[str],
+        pts_start,
+        pts_end,
+        rotation_degrees=0.,
+        z_offsets=0.,
+        profile_arg: dict[str, float] | None = None
+    ) -> list[entity_instance | None]:
+        """
+        Create beams at once. Lengths, directions, rotations and zero length masks of all beams are computed in one vectorized pass,
+        and only the entities are created one by one.
+        :param target_storey_names: Name of storey for all beams, or names for each beam.
+        :param pts_start: Array-like of start points, shape (N, 2).
+        :param pts_end: Array-like of end points, shape (N, 2).
+        :param rotation_degrees: Array-like of rotations, shape (N,), or a value for all beams.
+        :param z_offsets: Array-like of z offsets, shape (N,), or a value for all beams.
+        :return: Created IfcBeam entities in the given order. None for the beams of zero length.
+        """
+        import numpy as np
+
+        pts_start = np.asarray(pts_start, dtype=float).reshape(-1, 2)
+        pts_end = np.asarray(pts_end, dtype=float).reshape(-1, 2)
+        count = len(pts_start)
+        radians = -np.radians(np.broadcast_to(np.asarray(rotation_degrees, dtype=float), (count, )))
+        rotations = np.column_stack((np.cos(radians), np.sin(radians)))
+        z_offsets = np.broadcast_to(np.asarray(z_offsets, dtype=float), (count, ))
+        distances, directions, valid = self.vectorize_segments(pts_start, pts_end)
+
+        profile = self.get_beam_profile(profile_name, profile_arg)
+        target_storeys = self.get_target_storeys(target_storey_names, count)
+        beam_type = self.get_beam_type(beam_type_name)
+
+        beams: list[entity_instance | None] = []
+        for target_storey, pt_start, distance, direction, rotation, z_offset, is_valid in zip(
+            target_storeys, pts_start.tolist(), distances.tolist(), directions.tolist(),
+            rotations.tolist(), z_offsets.tolist(), valid.tolist()
+        ):
+            if not is_valid:
+                beams.append(None)
+                continue
+
+            beams.append(self._create_beam_entities(
+                profile=profile,
+                beam_type=beam_type,
+                beam_type_name=beam_type_name,
+                target_storey=target_storey,
+                pt_start=pt_start,
+                distance=distance,
+                direction=direction,
+                rotation=rotation,
+                z_offset=z_offset
+            ))
+
+        return beams
+
+    def get_beam_profile(self, profile_name: str, profile_arg: dict[str, float] | None = None) -> entity_instance:
+        if profile_name in self.writer.profiles.keys():
+            return self.writer.profiles[profile_name]
 
+        return self.writer.ifcResourceEntityUtil.create_I_shape_beam_profile(
+            profile_name=profile_name,
+            overall_width=profile_arg['w'],
+            overall_depth=profile_arg['h'],
+            web_thickness=profile_arg['tw'],
+            flange_thickness=profile_arg['tf'],
+            fillet_radius=profile_arg['r']
+        )
 
-        vector_util = SimpleVectorUtil()
-        distance = vector_util.vector_size(vector_util.vector_subtract(pt_end, pt_start))
+    def get_beam_type(self, beam_type_name: str) -> entity_instance:
+        if beam_type_name in self.writer.element_types['beam_types'].keys():
+            return self.writer.element_types['beam_types'][beam_type_name].entity
 
+        beam_type = self.writer.model.create_entity(
+            type="IfcBeamType",
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBeamType"),
+            OwnerHistory=self.writer.owner_history,
+            Name=beam_type_name,
+            PredefinedType="BEAM"
+        )
+        self.writer.element_types['beam_types'][beam_type_name] = ElementTypeRecord(beam_type)
+        return beam_type
+
+    def vectorize_segments(self, pts_start, pts_end):
+        """
+        Lengths, unit directions and the mask of non zero length, of the segments from start to end points.
+        :param pts_start: Array of start points, shape (N, 2).
+        :param pts_end: Array of end points, shape (N, 2).
+        :return: (lengths (N,), unit directions (N, 2), mask of valid segments (N,))
+        """
+        import numpy as np
+
+        deltas = pts_end - pts_start
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        valid = lengths > self.writer.precision
+        directions = np.zeros_like(deltas)
+        np.divide(deltas, lengths[:, np.newaxis], out=directions, where=valid[:, np.newaxis])
+        return lengths, directions, valid
+
+    def _create_beam_entities(
+        self,
+        profile: entity_instance,
+        beam_type: entity_instance,
+        beam_type_name: str,
+        target_storey: StoreyRecord,
+        pt_start: tuple[float, float],
+        distance: float,
+        direction: tuple[float, float],
+        rotation: tuple[float, float],
+        z_offset: float
+    ) -> entity_instance:
+        """
+        :param rotation: (cos, sin) of the negated rotation of profile.
+        """
         #region Production Definition Shape
         extruded_solid = self.writer.ifcResourceEntityUtil.create_extruded_area_solid_beam(
             swept_area=profile,
             depth=distance,
             extruded_direction=self.writer.axis_x_3d_neg,
-            rotation_degree=rotation_degree
+            rotation=rotation
         )
 
         body_representation = self.writer.ifcResourceEntityUtil.create_shape_representation(
@@ -207,41 +435,22 @@ class IfcSharedElementDataUtil:
             coordinate=(pt_start[0], pt_start[1], z_offset)
         )
 
-        vector_direction = vector_util.vector_normalize(vector_util.vector_subtract(pt_end, pt_start))
-        direction = self.writer.ifcResourceEntityUtil.create_direction_3d((vector_direction[0], vector_direction[1], 0.))
-
         relative_placement = self.writer.ifcResourceEntityUtil.create_axis2placement_3d(
             location = pt_start_position,
             axis = self.writer.axis_z,
-            ref_direction=direction
+            ref_direction=self.writer.ifcResourceEntityUtil.create_direction_3d((direction[0], direction[1], 0.))
         )
 
         object_placement = self.writer.ifcResourceEntityUtil.create_local_placement(
-            placement_rel_to=target_storey["ObjectPlacement"],
+            placement_rel_to=target_storey.object_placement,
             relative_placement=relative_placement
         )
 
         #endregion
 
-        #region Define beam type
-        if beam_type_name in self.writer.element_types['beam_types'].keys():
-            beam_type = self.writer.element_types['beam_types'][beam_type_name]['Entity']
-        else:
-            beam_type = self.writer.model.create_entity(
-                type="IfcBeamType",
-                GlobalId=ifcopenshell.guid.new(),
-                OwnerHistory=self.writer.owner_history,
-                Name=beam_type_name,
-                PredefinedType="BEAM"
-            )
-            self.writer.element_types['beam_types'][beam_type_name] = {
-                'Entity' : beam_type
-            }
-        #endregion
-
         beam = self.writer.model.create_entity(
             type="IfcBeam",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBeam"),
             OwnerHistory=self.writer.owner_history,
             Name=beam_type_name,
             ObjectType=beam_type_name,
@@ -249,18 +458,16 @@ class IfcSharedElementDataUtil:
             Representation=product_definition_shape
         )
 
-        # Create RelContainedSpatialStructure
-        self.writer.ifcCoreDataUtil.create_rel_contained_in_spatial_structure(
-            related_elements=[beam],
-            relating_structure=target_storey["Entity"],
-            owner_history=self.writer.owner_history,
+        # Reserve RelContainedSpatialStructure, RelDefinesByType
+        self.writer.ifcRelationshipAccumulator.add_contained_in_spatial_structure(
+            relating_structure=target_storey.entity,
+            element=beam
         )
 
-        # Create RelDefinesByType
-        self.writer.ifcResourceEntityUtil.create_rel_defines_by_type(
+        self.writer.ifcRelationshipAccumulator.add_defines_by_type(
             name=beam_type_name,
-            related_objects=[beam],
-            relating_type=beam_type
+            relating_type=beam_type,
+            related_object=beam
         )
 
         return beam
@@ -344,7 +551,7 @@ class IfcSharedElementDataUtil:
         ea_double_name = f"EA_DOUBLE_{dipping_free}-{dipping_fixed}-{dipping_degree}"
         self.writer.model.create_entity(
             type="IfcBuildingElementProxyType",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBuildingElementProxyType"),
             OwnerHistory=self.writer.owner_history,
             Name=ea_double_name,
             RepresentationMaps=[mapped_item]
@@ -362,7 +569,7 @@ class IfcSharedElementDataUtil:
         )
 
         object_placement = self.writer.ifcResourceEntityUtil.create_local_placement(
-            placement_rel_to=target_storey["ObjectPlacement"],
+            placement_rel_to=target_storey.object_placement,
             relative_placement=relative_placement
         )
         # endregion
@@ -370,7 +577,7 @@ class IfcSharedElementDataUtil:
         # Create Element
         self.writer.model.create_entity(
             type="IfcBuildingElementProxy",
-            GlobalId = ifcopenshell.guid.new(),
+            GlobalId = self.writer.ifcGuidUtil.new("IfcBuildingElementProxy"),
             OwnerHistory = self.writer.owner_history,
             ObjectPlacement=object_placement,
         )
@@ -391,7 +598,7 @@ class IfcSharedElementDataUtil:
         )
 
         entity_placement = self.writer.ifcResourceEntityUtil.create_local_placement(
-            placement_rel_to=target_storey['ObjectPlacement'],
+            placement_rel_to=target_storey.object_placement,
             relative_placement=entity_point,
         )
 
@@ -481,7 +688,7 @@ class IfcSharedElementDataUtil:
         # Create proxy element
         entity = model.create_entity(
             type="IfcBuildingElementProxy",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBuildingElementProxy"),
             OwnerHistory=owner_history,
             ObjectPlacement=entity_placement,
             Representation=product_definition_shape
@@ -489,24 +696,23 @@ class IfcSharedElementDataUtil:
 
         entity_type = model.create_entity(
             type="IfcBuildingElementProxyType",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcBuildingElementProxyType"),
             OwnerHistory=owner_history,
             Name=type_name,
             PredefinedType="NOTDEFINED",
             RepresentationMaps=[mapped_item]
         )
 
-        self.writer.ifcResourceEntityUtil.create_rel_defines_by_type(
+        self.writer.ifcRelationshipAccumulator.add_defines_by_type(
             name=type_name,
-            related_objects=[entity],
-            relating_type=entity_type
+            relating_type=entity_type,
+            related_object=entity
         )
 
         #Assign storey
-        self.writer.ifcCoreDataUtil.create_rel_contained_in_spatial_structure(
-            related_elements=[entity],
-            relating_structure=target_storey['Entity'],
-            owner_history=owner_history,
+        self.writer.ifcRelationshipAccumulator.add_contained_in_spatial_structure(
+            relating_structure=target_storey.entity,
+            element=entity
         )
 
     def create_ea_double_solid(
@@ -738,34 +944,119 @@ class IfcSharedElementDataUtil:
         wall_height: float = 4.,
         rgba: dict[str, float] = {"r": 128, "g": 128, "b": 128, "a": 0.5}
     ) -> entity_instance:
+        target_storey = self.get_target_storeys(target_storey_name, 1)[0]
+
+        wall_cen_vector = (pt_end[0] - pt_start[0], pt_end[1] - pt_start[1])
+        wall_length = math.hypot(wall_cen_vector[0], wall_cen_vector[1])
+        if wall_length <= self.writer.precision:
+            raise ValueError("Zero Length Error: The start and end points of wall are the same.")
+
+        return self._create_wall_entities(
+            wall_type_name=wall_type_name,
+            target_storey=target_storey,
+            pt_start=pt_start,
+            wall_length=wall_length,
+            direction=(wall_cen_vector[0] / wall_length, wall_cen_vector[1] / wall_length),
+            profile_name=profile_name,
+            z_offset=z_offset,
+            wall_thickness=wall_thickness,
+            wall_height=wall_height,
+            rgba=rgba
+        )
+
+    def create_walls(
+        self,
+        wall_type_names: str | list[str],
+        target_storey_names: str | list[str],
+        pts_start,
+        pts_end,
+        z_offsets=0.,
+        wall_thicknesses=0.1,
+        wall_heights=4.,
+        rgba: dict[str, float] = {"r": 128, "g": 128, "b": 128, "a": 0.5}
+    ) -> list[entity_instance | None]:
+        """
+        Create walls at once. Lengths, directions and zero length masks of all walls are computed in one vectorized pass,
+        and only the entities are created one by one.
+        :param wall_type_names: Name of wall type for all walls, or names for each wall.
+        :param target_storey_names: Name of storey for all walls, or names for each wall.
+        :param pts_start: Array-like of start points, shape (N, 2).
+        :param pts_end: Array-like of end points, shape (N, 2).
+        :param z_offsets: Array-like of z offsets, shape (N,), or a value for all walls.
+        :param wall_thicknesses: Array-like of thicknesses, shape (N,), or a value for all walls.
+        :param wall_heights: Array-like of heights, shape (N,), or a value for all walls.
+        :return: Created IfcWallStandardCase entities in the given order. None for the walls of zero length.
+        """
+        import numpy as np
+
+        pts_start = np.asarray(pts_start, dtype=float).reshape(-1, 2)
+        pts_end = np.asarray(pts_end, dtype=float).reshape(-1, 2)
+        count = len(pts_start)
+        z_offsets = np.broadcast_to(np.asarray(z_offsets, dtype=float), (count, ))
+        wall_thicknesses = np.broadcast_to(np.asarray(wall_thicknesses, dtype=float), (count, ))
+        wall_heights = np.broadcast_to(np.asarray(wall_heights, dtype=float), (count, ))
+        wall_lengths, directions, valid = self.vectorize_segments(pts_start, pts_end)
+
+        if isinstance(wall_type_names, str):
+            wall_type_names = [wall_type_names] * count
+        target_storeys = self.get_target_storeys(target_storey_names, count)
+
+        walls: list[entity_instance | None] = []
+        for wall_type_name, target_storey, pt_start, wall_length, direction, z_offset, wall_thickness, wall_height, is_valid in zip(
+            wall_type_names, target_storeys, pts_start.tolist(), wall_lengths.tolist(), directions.tolist(),
+            z_offsets.tolist(), wall_thicknesses.tolist(), wall_heights.tolist(), valid.tolist()
+        ):
+            if not is_valid:
+                walls.append(None)
+                continue
+
+            walls.append(self._create_wall_entities(
+                wall_type_name=wall_type_name,
+                target_storey=target_storey,
+                pt_start=pt_start,
+                wall_length=wall_length,
+                direction=direction,
+                z_offset=z_offset,
+                wall_thickness=wall_thickness,
+                wall_height=wall_height,
+                rgba=rgba
+            ))
+
+        return walls
+
+    def get_wall_type(self, wall_type_name: str) -> entity_instance:
+        if wall_type_name in self.writer.element_types['wall_types'].keys():
+            return self.writer.element_types['wall_types'][wall_type_name].entity
 
-        if target_storey_name not in self.writer.storeys.keys():
-            raise ValueError(f"Not Exist Error: Storey f'{target_storey_name}' does not exist.")
-
-        target_storey = self.writer.storeys[target_storey_name]
-
-        vector_util = SimpleVectorUtil()
-        wall_cen_vector = vector_util.vector_subtract(pt_end, pt_start)
-        wall_length = vector_util.vector_size(wall_cen_vector)
-        wall_cen_normalized = vector_util.vector_normalize(wall_cen_vector)
+        wall_type = self.writer.model.create_entity(
+            type="IfcWallType",
+            GlobalId=self.writer.ifcGuidUtil.new("IfcWallType"),
+            OwnerHistory=self.writer.owner_history,
+            Name=wall_type_name,
+            PredefinedType="STANDARD"
+        )
+        self.writer.element_types['wall_types'][wall_type_name] = ElementTypeRecord(wall_type)
+        return wall_type
 
-        if wall_type_name in self.writer.element_types['wall_types'].keys():
-            wall_type = self.writer.element_types['wall_types'][wall_type_name]['Entity']
-        else:
-            wall_type = self.writer.model.create_entity(
-                type="IfcWallType",
-                GlobalId=ifcopenshell.guid.new(),
-                OwnerHistory=self.writer.owner_history,
-                Name=wall_type_name,
-                PredefinedType="STANDARD"
-            )
+    def _create_wall_entities(
+        self,
+        wall_type_name: str,
+        target_storey: StoreyRecord,
+        pt_start: tuple[float, float],
+        wall_length: float,
+        direction: tuple[float, float],
+        profile_name: str | None = None,
+        z_offset: float = 0.,
+        wall_thickness: float = 0.1,
+        wall_height: float = 4.,
+        rgba: dict[str, float] = {"r": 128, "g": 128, "b": 128, "a": 0.5}
+    ) -> entity_instance:
+        wall_type = self.get_wall_type(wall_type_name)
 
         if profile_name is None:
-            profile_name = f"WAL_L{wall_length}T{wall_thickness}"
-            profile = self.writer.ifcResourceEntityUtil.create_rectangle_profile(
-                profile_name=profile_name,
-                x_dim=wall_length,
-                y_dim=wall_thickness
+            profile = self.get_wall_profile(
+                wall_length=wall_length,
+                wall_thickness=wall_thickness
             )
         elif profile_name in self.writer.profiles.keys():
             profile = self.writer.profiles[profile_name]
@@ -776,20 +1067,13 @@ class IfcSharedElementDataUtil:
                 y_dim=wall_thickness
             )
 
-        #region Create extrusion
-        extrusion_position = self.writer.model.create_entity(
-            type="IfcAxis2Placement3D",
-            Location=self.writer.origin3d
-        )
-
-        extrusion_direction = self.writer.axis_z
-
-        extrusion = self.writer.ifcResourceEntityUtil.create_extruded_area_solid_wall(
-            swept_area=profile,
-            extruded_direction=extrusion_direction,
-            position=extrusion_position,
-            depth=wall_height
+        wall_geometry = self.get_wall_geometry(
+            wall_type=wall_type,
+            profile=profile,
+            wall_length=wall_length,
+            wall_height=wall_height
         )
+        extrusion = wall_geometry.extrusion
 
         shape_representation_extrusion = self.writer.ifcResourceEntityUtil.create_shape_representation(
             context_of_items=self.writer.sub_context_body,
@@ -797,23 +1081,13 @@ class IfcSharedElementDataUtil:
             representation_type="SweptSolid",
             items=[extrusion]
         )
-        #endregion
-
-        #region Create axis shape
-        axis_polyline = self.writer.ifcResourceEntityUtil.create_polyline(
-            pts=[
-                (0., 0.),
-                (wall_length, 0.)
-            ]
-        )
 
         shape_representation_axis = self.writer.ifcResourceEntityUtil.create_shape_representation(
             context_of_items=self.writer.sub_context_axis,
             representation_type="Curve2D",
             representation_identifier="Axis",
-            items=[axis_polyline]
+            items=[wall_geometry.axis]
         )
-        #endregion
 
         representation = self.writer.ifcResourceEntityUtil.create_product_define_shape(
             representations=[shape_representation_axis, shape_representation_extrusion]
@@ -822,17 +1096,17 @@ class IfcSharedElementDataUtil:
         wall_position = self.writer.ifcResourceEntityUtil.create_axis2placement_3d(
             location=self.writer.ifcResourceEntityUtil.create_cartesian_point_3d(coordinate=(pt_start[0], pt_start[1], z_offset)),
             axis=self.writer.axis_z,
-            ref_direction=self.writer.ifcResourceEntityUtil.create_direction_3d(coordinate=(wall_cen_normalized[0], wall_cen_normalized[1], 0.))
+            ref_direction=self.writer.ifcResourceEntityUtil.create_direction_3d(coordinate=(direction[0], direction[1], 0.))
         )
 
         wall_placement = self.writer.ifcResourceEntityUtil.create_local_placement(
-            placement_rel_to=target_storey['ObjectPlacement'],
+            placement_rel_to=target_storey.object_placement,
             relative_placement=wall_position
         )
 
         wall = self.writer.model.create_entity(
             type="IfcWallStandardCase",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self.writer.ifcGuidUtil.new("IfcWallStandardCase"),
             OwnerHistory=self.writer.owner_history,
             Name=wall_type_name,
             ObjectType=wall_type_name,
@@ -840,33 +1114,20 @@ class IfcSharedElementDataUtil:
             Representation=representation
         )
 
-        # Create RelContainedSpatialStructure
-        self.writer.ifcCoreDataUtil.create_rel_contained_in_spatial_structure(
-            related_elements=[wall],
-            relating_structure=target_storey['Entity'],
-            owner_history=self.writer.owner_history
+        # Reserve RelContainedSpatialStructure, RelDefinesByType
+        self.writer.ifcRelationshipAccumulator.add_contained_in_spatial_structure(
+            relating_structure=target_storey.entity,
+            element=wall
         )
 
-        self.writer.ifcResourceEntityUtil.create_rel_defines_by_type(
+        self.writer.ifcRelationshipAccumulator.add_defines_by_type(
             name=wall_type_name,
-            related_objects=[wall],
-            relating_type=wall_type
+            relating_type=wall_type,
+            related_object=wall
         )
 
         # Apply material
-        layer_args = [{
-            "name": "WAL_01",
-            "thickness": wall_thickness,
-            "rgba": rgba,
-        }]
-
-        mat_name = f"MAT_{wall_type_name}"
-        if mat_name not in self.writer.material_layer_sets.keys():
-            self.writer.ifcResourceEntityUtil.create_material_layer_set(
-                name=mat_name,
-                layer_args=layer_args
-            )
-
+        mat_name = self.get_wall_material_layer_set(wall_type_name, wall_thickness, rgba)
         self.writer.ifcResourceEntityUtil.assign_material_set_wall(
             material_set_name=mat_name,
             target_presentation=extrusion,
@@ -876,3 +1137,93 @@ class IfcSharedElementDataUtil:
 
         return wall
 
+    def get_wall_material_layer_set(
+        self,
+        wall_type_name: str,
+        wall_thickness: float,
+        rgba: dict[str, float] = {"r": 128, "g": 128, "b": 128, "a": 0.5}
+    ) -> str:
+        """
+        Get the material layer set of wall type, or create it. The set has a layer of the wall thickness.
+        :return: Name of the material layer set.
+        """
+        mat_name = f"MAT_{wall_type_name}"
+        if mat_name not in self.writer.material_layer_sets.keys():
+            self.writer.ifcResourceEntityUtil.create_material_layer_set(
+                name=mat_name,
+                layer_args=[{
+                    "name": "WAL_01",
+                    "thickness": wall_thickness,
+                    "rgba": rgba,
+                }]
+            )
+
+        return mat_name
+
+    def get_wall_profile(
+        self,
+        wall_length: float,
+        wall_thickness: float
+    ) -> entity_instance:
+        """
+        Get the rectangle profile of wall from the registry, or create it.
+        Walls with the same length and thickness (quantized to the model precision) share the profile.
+        :param wall_length: Length of wall.
+        :param wall_thickness: Thickness of wall.
+        """
+        key = self.writer.ifcResourceEntityUtil.quantize((wall_length, wall_thickness))
+        profile = self.writer.wall_profiles.get(key)
+
+        if profile is None:
+            profile_name = f"WAL_L{wall_length}T{wall_thickness}"
+            if profile_name in self.writer.profiles.keys():
+                profile = self.writer.profiles[profile_name]
+            else:
+                profile = self.writer.ifcResourceEntityUtil.create_rectangle_profile(
+                    profile_name=profile_name,
+                    x_dim=wall_length,
+                    y_dim=wall_thickness
+                )
+            self.writer.wall_profiles[key] = profile
+
+        return profile
+
+    def get_wall_geometry(
+        self,
+        wall_type: entity_instance,
+        profile: entity_instance,
+        wall_length: float,
+        wall_height: float
+    ) -> WallGeometryRecord:
+        """
+        Get the extrusion and axis curve of wall from the registry, or create them.
+        Walls with the same type, profile, length and height share the representation items.
+        The extrusion is styled by the material of the wall type, so walls of other types do not share it.
+        :param wall_type: Entity of IfcWallType
+        :param profile: Entity of IfcProfileDef
+        :param wall_length: Length of wall.
+        :param wall_height: Height of wall.
+        :return: Record of IfcExtrudedAreaSolid and IfcPolyline of axis.
+        """
+        key = (wall_type.id(), profile.id()) + self.writer.ifcResourceEntityUtil.quantize((wall_length, wall_height))
+        wall_geometry = self.writer.wall_geometries.get(key)
+
+        if wall_geometry is None:
+            extrusion = self.writer.ifcResourceEntityUtil.create_extruded_area_solid_wall(
+                swept_area=profile,
+                extruded_direction=self.writer.axis_z,
+                position=self.writer.placement_origin_3d,
+                depth=wall_height
+            )
+
+            axis_polyline = self.writer.ifcResourceEntityUtil.create_polyline(
+                pts=[
+                    (0., 0.),
+                    (wall_length, 0.)
+                ]
+            )
+
+            wall_geometry = WallGeometryRecord(extrusion, axis_polyline)
+            self.writer.wall_geometries[key] = wall_geometry
+
+        return wall_geometry